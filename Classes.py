@@ -1,5 +1,8 @@
 import json
-import csv
+from OOP.export import ExportJob, export_many
+from OOP.formats import course_record, instructor_record, normalize_course, normalize_instructor, normalize_student, student_record
+from OOP.person import Person as RecordPerson
+
 
 class Person:
     """
@@ -71,17 +74,14 @@ class Person:
         """
         Validates if the provided email is in a correct format.
 
+        Uses the same rule as the OOP package so both models accept the same records.
+
         :param email: The email to be validated.
         :type email: str
         :return: True if valid, False otherwise.
         :rtype: bool
         """
-        isMail = False
-        if '@' in email:
-            if len(email.split('@')) == 2:
-                if len(email.split('@')[1].split('.')) == 2 and len(email.split('@')[1].split('.')[1]) > 0:
-                    isMail = True
-        return isMail
+        return RecordPerson.validate_email(email)
 
 
 class Student(Person):
@@ -90,7 +90,7 @@ class Student(Person):
 
     Attributes
     ----------
-    id : int
+    id : str
         The unique identifier for the student.
     registered_courses : list
         A list of registered courses for the student.
@@ -105,7 +105,7 @@ class Student(Person):
         Creates a student object from a dictionary/json file.
     """
     
-    def __init__(self, name, age, email, id, registered_courses=[]):
+    def __init__(self, name, age, email, id, registered_courses=None):
         """
         Constructs all the necessary attributes for the student object.
 
@@ -116,13 +116,15 @@ class Student(Person):
         :param email: The email address of the student.
         :type email: str
         :param id: The student ID.
-        :type id: int
+        :type id: str
         :param registered_courses: A list of courses the student is registered in.
         :type registered_courses: list
         :raises ValueError: If any of the registered courses is not of type Course.
         """
         Person.__init__(self, name, age, email)
-        assert type(id) == int, "Please enter a valid ID"
+        if registered_courses is None:
+            registered_courses = []
+        assert type(id) == str, "Please enter a valid ID"
         assert type(registered_courses) == list, "Please enter a valid format"
         for course in registered_courses:
             if type(course) != Course:
@@ -141,26 +143,30 @@ class Student(Person):
 
     def to_json(self):
         """
-        Converts the student object to a dictionary.
+        Converts the student object to a record in the shared OOP layout.
 
-        :return: A dictionary representation of the student.
+        :return: A dictionary representation of the student, with courses stored by ID.
         :rtype: dict
         """
-        return {'name': self.name, 'age': self.age, 'email': self._email,
-                'student_id': self.id, 'registered_courses': [course.to_dict() for course in self.registered_courses]}
+        return student_record(self.name, self.age, self._email, self.id,
+                              [course.course_id for course in self.registered_courses])
 
     @staticmethod
-    def from_json(data):
+    def from_json(data, courses=None):
         """
-        Creates a student object from a dictionary.
+        Creates a student object from a record in either on-disk layout.
 
         :param data: The dictionary containing student data.
         :type data: dict
+        :param courses: Course objects keyed by record ID, used to resolve registrations.
+        :type courses: dict, optional
         :return: A Student object.
         :rtype: Student
         """
+        data = normalize_student(data)
         student = Student(data['name'], data['age'], data['email'], data['student_id'])
-        student.registered_courses = [Course.from_dict(course) for course in data['registered_courses']]
+        if courses is not None:
+            student.registered_courses = [courses[course_id] for course_id in data['registered_courses'] if course_id in courses]
         return student
 
 
@@ -170,7 +176,7 @@ class Instructor(Person):
 
     Attributes
     ----------
-    instructor_id : int
+    instructor_id : str
         The unique identifier for the instructor.
     assigned_courses : list
         A list of courses assigned to the instructor.
@@ -185,7 +191,7 @@ class Instructor(Person):
         Creates an instructor object from a dictionary.
     """
     
-    def __init__(self, name, age, email, iid, assigned_courses=[]):
+    def __init__(self, name, age, email, iid, assigned_courses=None):
         """
         Constructs all the necessary attributes for the instructor object.
 
@@ -196,13 +202,15 @@ class Instructor(Person):
         :param email: The email address of the instructor.
         :type email: str
         :param iid: The instructor ID.
-        :type iid: int
+        :type iid: str
         :param assigned_courses: A list of courses the instructor is assigned to.
         :type assigned_courses: list
         :raises ValueError: If any of the assigned courses is not of type Course.
         """
         Person.__init__(self, name, age, email)
-        assert type(iid) == int, "Please enter a valid IID"
+        if assigned_courses is None:
+            assigned_courses = []
+        assert type(iid) == str, "Please enter a valid IID"
         assert type(assigned_courses) == list, "Please enter a valid format"
         for course in assigned_courses:
             if type(course) != Course:
@@ -221,26 +229,30 @@ class Instructor(Person):
 
     def to_json(self):
         """
-        Converts the instructor object to a dictionary.
+        Converts the instructor object to a record in the shared OOP layout.
 
-        :return: A dictionary representation of the instructor.
+        :return: A dictionary representation of the instructor, with courses stored by ID.
         :rtype: dict
         """
-        return {'name': self.name, 'age': self.age, 'email': self._email,
-                'instructor_id': self.instructor_id, 'assigned_courses': [course.to_dict() for course in self.assigned_courses]}
+        return instructor_record(self.name, self.age, self._email, self.instructor_id,
+                                 [course.course_id for course in self.assigned_courses])
 
     @staticmethod
-    def from_json(data):
+    def from_json(data, courses=None):
         """
-        Creates an instructor object from a dictionary.
+        Creates an instructor object from a record in either on-disk layout.
 
         :param data: The dictionary containing instructor data.
         :type data: dict
+        :param courses: Course objects keyed by record ID, used to resolve assignments.
+        :type courses: dict, optional
         :return: An Instructor object.
         :rtype: Instructor
         """
+        data = normalize_instructor(data)
         instructor = Instructor(data['name'], data['age'], data['email'], data['instructor_id'])
-        instructor.assigned_courses = [Course.from_dict(course) for course in data['assigned_courses']]
+        if courses is not None:
+            instructor.assigned_courses = [courses[course_id] for course_id in data['assigned_courses'] if course_id in courses]
         return instructor
 
 class Course:
@@ -249,7 +261,7 @@ class Course:
 
     Attributes
     ----------
-    course_id : int
+    course_id : str
         The unique identifier for the course.
     course_name : str
         The name of the course.
@@ -257,6 +269,12 @@ class Course:
         The instructor assigned to the course (default is an empty string).
     enrolled_students : list
         A list of students enrolled in the course.
+    capacity : int, optional
+        The number of seats, or None when the course has no limit.
+    waitlist : list
+        The IDs of the students waiting for a seat, in arrival order.
+    meeting_times : list
+        The weekly meetings of the course, as {'day', 'start', 'end'} dictionaries.
     
     Methods
     -------
@@ -268,22 +286,31 @@ class Course:
         Creates a course object from a dictionary.
     """
     
-    def __init__(self, course_id, course_name, instructor="", enrolled_students=[]):
+    def __init__(self, course_id, course_name, instructor="", enrolled_students=None, capacity=None, waitlist=None,
+                 meeting_times=None):
         """
         Constructs all the necessary attributes for the course object.
 
         :param course_id: The unique identifier for the course.
-        :type course_id: int
+        :type course_id: str
         :param course_name: The name of the course.
         :type course_name: str
         :param instructor: The instructor for the course (optional).
         :type instructor: Instructor, optional
         :param enrolled_students: A list of students enrolled in the course (optional).
         :type enrolled_students: list
+        :param capacity: The number of seats (optional); kept as read, the seat rules live in OOP.seats.
+        :type capacity: int, optional
+        :param waitlist: The IDs of the waitlisted students (optional).
+        :type waitlist: list
+        :param meeting_times: The weekly meetings of the course (optional).
+        :type meeting_times: list
         :raises ValueError: If any of the enrolled students is not of type Student.
-        :raises AssertionError: If course_id is not an integer or course_name is not a string.
+        :raises AssertionError: If course_id is not a string, or course_name is not a string.
         """
-        assert type(course_id) == int, "Please enter a valid Course_ID"
+        if enrolled_students is None:
+            enrolled_students = []
+        assert type(course_id) == str, "Please enter a valid Course_ID"
         assert type(course_name) == str, "Please enter a valid course name"
         assert type(enrolled_students) == list, "Please enter a valid format"
         for student in enrolled_students:
@@ -293,6 +320,9 @@ class Course:
         self.course_name = course_name
         self.instructor = instructor
         self.enrolled_students = enrolled_students
+        self.capacity = capacity
+        self.waitlist = waitlist if waitlist is not None else []
+        self.meeting_times = meeting_times if meeting_times is not None else []
 
     def add_student(self, student):
         """
@@ -305,30 +335,89 @@ class Course:
 
     def to_json(self):
         """
-        Converts the course object to a dictionary.
+        Converts the course object to a record in the shared OOP layout.
 
-        :return: A dictionary representation of the course.
+        :return: A dictionary representation of the course, with students stored by ID.
         :rtype: dict
         """
-        return {'course_id': self.course_id, 'course_name': self.course_name,
-                'instructor': self.instructor.to_json(), 'enrolled_students': [student.to_json() for student in self.enrolled_students]}
+        instructor = self.instructor.to_json() if isinstance(self.instructor, Instructor) else None
+        return course_record(self.course_id, self.course_name, instructor,
+                             [student.id for student in self.enrolled_students],
+                             self.capacity, self.waitlist, self.meeting_times)
 
     @staticmethod
-    def from_json(data):
+    def from_json(data, students=None, instructors=None):
         """
-        Creates a course object from a dictionary.
+        Creates a course object from a record in either on-disk layout.
 
         :param data: The dictionary containing course data.
         :type data: dict
+        :param students: Student objects keyed by record ID, used to resolve the roster.
+        :type students: dict, optional
+        :param instructors: Instructor objects keyed by record ID; the embedded instructor
+            record is used when its instructor is not listed.
+        :type instructors: dict, optional
         :return: A Course object.
         :rtype: Course
         """
-        instructor = Instructor.from_json(data['instructor'])
-        course = Course(data['course_id'], data['course_name'], instructor)
-        course.enrolled_students = [Student.from_json(student) for student in data['enrolled_students']]
+        data = normalize_course(data)
+        instructor = ""
+        if data['instructor'] is not None:
+            instructor = (instructors or {}).get(data['instructor']['instructor_id']) or Instructor.from_json(data['instructor'])
+        course = Course(data['course_id'], data['course_name'], instructor, capacity=data.get('capacity'),
+                        waitlist=list(data.get('waitlist', [])), meeting_times=data.get('meeting_times'))
+        if students is not None:
+            course.enrolled_students = [students[student_id] for student_id in data['enrolled_students'] if student_id in students]
         return course
 
 
+def build_objects(bundle):
+    """
+    Builds linked objects from a bundle of records in one pass per kind.
+
+    Every entity is constructed once; relations are resolved through dictionaries
+    keyed by record ID, so the cost is linear in the number of records and links.
+
+    :param bundle: Lists of records under 'students', 'instructors' and 'courses',
+        in either on-disk layout (see OOP.formats.read_bundle).
+    :type bundle: dict
+    :return: The students, instructors and courses.
+    :rtype: tuple of (list of Student, list of Instructor, list of Course)
+    """
+    student_records = [normalize_student(record) for record in bundle.get('students', [])]
+    instructor_records = [normalize_instructor(record) for record in bundle.get('instructors', [])]
+    course_records = [normalize_course(record) for record in bundle.get('courses', [])]
+
+    students = {record['student_id']: Student.from_json(record) for record in student_records}
+    instructors = {record['instructor_id']: Instructor.from_json(record) for record in instructor_records}
+    courses = {record['course_id']: Course.from_json(record, students, instructors) for record in course_records}
+    for record in student_records:
+        students[record['student_id']].registered_courses = [courses[course_id] for course_id in record['registered_courses'] if course_id in courses]
+    for record in instructor_records:
+        instructors[record['instructor_id']].assigned_courses = [courses[course_id] for course_id in record['assigned_courses'] if course_id in courses]
+    return list(students.values()), list(instructors.values()), list(courses.values())
+
+
+def to_bundle(students, instructors, courses):
+    """
+    Converts the objects to a bundle of records in the shared OOP layout.
+
+    :param students: The students to convert.
+    :type students: list of Student
+    :param instructors: The instructors to convert.
+    :type instructors: list of Instructor
+    :param courses: The courses to convert.
+    :type courses: list of Course
+    :return: Lists of records under 'students', 'instructors' and 'courses'.
+    :rtype: dict
+    """
+    return {
+        'students': [student.to_json() for student in students],
+        'instructors': [instructor.to_json() for instructor in instructors],
+        'courses': [course.to_json() for course in courses]
+    }
+
+
 def save_json_all(filename, data):
     """
     Saves a list of objects (students, instructors, or courses) as a JSON file.
@@ -394,10 +483,11 @@ def save_data_csv(filename, courses):
     :param courses: The list of courses to save.
     :type courses: list of Course
     """
-    with open(filename, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(['course_id', 'course_name', 'instructor_name', 'instructor_email', 'enrolled_students'])
-        for course in courses:
-            instructor = course.instructor
-            students = ','.join([student.name for student in course.enrolled_students])
-            writer.writerow([course.course_id, course.course_name, instructor.name, instructor._email, students])
+    columns = [
+        ('course_id', lambda course: course.course_id),
+        ('course_name', lambda course: course.course_name),
+        ('instructor_name', lambda course: course.instructor.name),
+        ('instructor_email', lambda course: course.instructor._email),
+        ('enrolled_students', lambda course: ','.join(student.name for student in course.enrolled_students))
+    ]
+    export_many([ExportJob(filename, columns, records=courses)])
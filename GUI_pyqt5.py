@@ -25,26 +25,175 @@ Functions:
 - setup_courses_table(table): Populates a table with course data.
 - set_table(students_table, instructors_table, courses_table): Sets up the tables for students, instructors, and courses.
 - filter_records(search_term, students_table, instructors_table, courses_table): Filters and displays records based on a search term.
+- show_rows(table, objects, data_type, render): Fills a table with one row per object.
+- refresh_rows(*objects): Redraws only the rows showing the given objects.
 - setup_table_with_buttons(table, data_type): Adds "Edit" and "Delete" buttons to the table for the provided data type.
-- delete_record(row, data_type, table): Deletes rows of instances of objects (Student, Instructor, Course) from the local lists
+- edit_record(data): Edits a Student, Instructor or Course and redraws the rows showing it.
+- delete_record(data, data_type): Deletes instances of objects (Student, Instructor, Course) from the local lists and their rows
 - load_from_json(): Load into the list from a json file.
 - save_to_json():Save to a json file the content of the lists.
 - export_to_csv():Save the content of the lists into a csv file.
+- undo_last(students_table, instructors_table, courses_table): Reverts the last edit or deletion.
+- redo_last(students_table, instructors_table, courses_table): Applies the last undone edit or deletion again.
 
 """
 
 
+import os
 import sys
-from PyQt5.QtWidgets import QScrollArea, QApplication, QMainWindow, QLabel, QLineEdit, QPushButton, QVBoxLayout, QWidget, QFormLayout, QMessageBox, QComboBox, QTableWidget, QTableWidgetItem, QInputDialog
+import threading
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QScrollArea, QApplication, QMainWindow, QLabel, QLineEdit, QPushButton, QVBoxLayout, QWidget, QFormLayout, QMessageBox, QComboBox, QTableWidget, QTableWidgetItem, QInputDialog, QProgressDialog
 from Classes import *
-import json
-import csv
+from OOP import instrumentation
+from OOP.autosave import AutoSaver, journal_path, read_journaled_bundle
+from OOP.export import ExportJob, export_many
+from OOP.formats import write_bundle
+from OOP.history import CommandLog, ObjectCommand
+from OOP.labels import LabelCache
+from OOP.loader import DATA_FILES, load_dataset
 
 # Global lists to store data
 students = []
 instructors = []
 courses = []
 
+# CSV columns for each list, as (header, getter) pairs
+STUDENT_CSV_COLUMNS = [
+    ('Name', lambda student: student.name),
+    ('Age', lambda student: student.age),
+    ('Email', lambda student: student._email),
+    ('ID', lambda student: student.id),
+    ('Registered Courses', lambda student: registered_courses_label(student))
+]
+INSTRUCTOR_CSV_COLUMNS = [
+    ('Name', lambda instructor: instructor.name),
+    ('Age', lambda instructor: instructor.age),
+    ('Email', lambda instructor: instructor._email),
+    ('Instructor ID', lambda instructor: instructor.instructor_id),
+    ('Assigned Courses', lambda instructor: assigned_courses_label(instructor))
+]
+COURSE_CSV_COLUMNS = [
+    ('Course ID', lambda course: course.course_id),
+    ('Course Name', lambda course: course.course_name),
+    ('Instructor', lambda course: course.instructor.name if course.instructor else "None"),
+    ('Enrolled Students', lambda course: enrolled_students_label(course))
+]
+
+# Running exports, kept referenced until their thread finishes
+export_threads = []
+
+# Every change is journaled next to AUTOSAVE_FILE and restored on the next start;
+# Save and Load still write and read complete files chosen by the user
+AUTOSAVE_FILE = 'autosave.json'
+AUTOSAVE_INTERVAL_MS = 2000
+autosaver = AutoSaver(AUTOSAVE_FILE)
+
+# Edits and deletions can be undone; each one is also appended to HISTORY_FILE for audit
+HISTORY_FILE = 'history.jsonl'
+history = CommandLog(HISTORY_FILE)
+
+
+def kind_of(data):
+    """
+    Returns the autosave kind ('students', 'instructors' or 'courses') of an object.
+
+    :param data: A Student, Instructor or Course.
+    :return: The name of the list the object belongs to.
+    """
+    if isinstance(data, Student):
+        return 'students'
+    if isinstance(data, Instructor):
+        return 'instructors'
+    return 'courses'
+
+
+def restored(kind, obj, present):
+    """
+    Tells the autosaver about an object put back or taken away by undo or redo.
+
+    :param kind: 'students', 'instructors' or 'courses'.
+    :param obj: The Student, Instructor or Course.
+    :param present: Whether the object is in its list afterwards.
+    """
+    if present:
+        autosaver.mark(kind, obj)
+    else:
+        autosaver.mark_deleted(kind, obj)
+
+
+def restore_autosave():
+    """
+    Loads the data autosaved by a previous session, if there is any.
+
+    Reads `AUTOSAVE_FILE` with its journal replayed on top into the global lists.
+
+    :return: Whether autosaved data was restored.
+    :rtype: bool
+    """
+    global students, instructors, courses
+    if not os.path.exists(AUTOSAVE_FILE) and not os.path.exists(journal_path(AUTOSAVE_FILE)):
+        return False
+    try:
+        students, instructors, courses = build_objects(read_journaled_bundle(AUTOSAVE_FILE))
+    except (KeyError, TypeError, ValueError, AssertionError):
+        print(f"Error decoding {AUTOSAVE_FILE}. Autosaved data not restored.")
+        return False
+    autosaver.reset(AUTOSAVE_FILE, students, instructors, courses)
+    history.clear()
+    print(f"Autosaved data restored from {AUTOSAVE_FILE}.")
+    return True
+
+
+def load_data_files():
+    """
+    Loads the shared `Data/*.json` files into the global lists.
+
+    Used at startup when there is no autosaved session. The files are read
+    concurrently and, for large files on a multi-core machine, the objects are
+    built on a process pool; they are then linked in one pass (see OOP.loader).
+    Records that do not validate are left out and reported.
+    """
+    global students, instructors, courses
+    if not any(os.path.exists(filename) for filename in DATA_FILES.values()):
+        return
+    dataset = load_dataset(models='Classes')
+    students = list(dataset.students.values())
+    instructors = list(dataset.instructors.values())
+    courses = list(dataset.courses.values())
+    autosaver.rewrite(AUTOSAVE_FILE, to_bundle(students, instructors, courses), students, instructors, courses)
+    history.clear()
+    for kind, count in dataset.rejected.items():
+        if count:
+            print(f"{count} invalid {kind} records in {DATA_FILES[kind]} were not loaded.")
+
+
+class ExportThread(QThread):
+    """
+    Runs a CSV export off the GUI thread and reports progress through signals.
+
+    Signals
+    -------
+    progress(int, int)
+        Rows written so far and the total number of rows.
+    failed(str)
+        Emitted with the error message if the export could not be written.
+    """
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, jobs):
+        super().__init__()
+        self.jobs = jobs
+        self.cancel = threading.Event()
+
+    def run(self):
+        try:
+            export_many(self.jobs, lambda done, total: self.progress.emit(done, total or 0), self.cancel)
+        except (OSError, ValueError) as error:
+            self.failed.emit(str(error))
+
+@instrumentation.action('add_student')
 def add_student():
     """
     Collects data from input fields and creates a new Student object.
@@ -52,14 +201,14 @@ def add_student():
     The function validates the following:
     
     - The `name`, `age`, `email`, and `student_id` fields are not empty.
-    - `age` and `student_id` are converted to integers.
+    - `age` is converted to an integer; `student_id` is kept as entered.
     
     Upon successful validation, a Student object is created and appended
     to the global `students` list. The input fields are then cleared.
     
     Raises:
     -------
-    ValueError : If `age` or `student_id` cannot be converted to integers.
+    ValueError : If `age` cannot be converted to an integer.
     AssertionError : If validation on the `Student` object fails.
     
     GUI Messages:
@@ -77,13 +226,13 @@ def add_student():
         return
     try:
         age = int(age)
-        student_id=int(student_id)
     except:
-        QMessageBox.warning(window, "Input Error", "Make sure the age and id are integers")
+        QMessageBox.warning(window, "Input Error", "Make sure the age is an integer")
 
     try:
         student = Student(name, age, email, student_id)
         students.append(student)
+        autosaver.mark('students', student)
         student_name.clear()
         student_age.clear()
         student_email.clear()
@@ -94,6 +243,7 @@ def add_student():
         QMessageBox.warning(window, "Input Error", str(e))
 
 
+@instrumentation.action('add_instructor')
 def add_instructor():
     """
     Collects data from input fields and creates a new Instructor object.
@@ -101,14 +251,14 @@ def add_instructor():
     The function validates the following:
     
     - The `name`, `age`, `email`, and `instructor_id` fields are not empty.
-    - `age` and `instructor_id` are converted to integers.
+    - `age` is converted to an integer; `instructor_id` is kept as entered.
     
     Upon successful validation, an Instructor object is created and appended
     to the global `instructors` list. The input fields are then cleared.
     
     Raises:
     -------
-    ValueError : If `age` or `instructor_id` cannot be converted to integers.
+    ValueError : If `age` cannot be converted to an integer.
     AssertionError : If validation on the `Instructor` object fails.
     
     GUI Messages:
@@ -126,13 +276,13 @@ def add_instructor():
         return
     try:
         age = int(age)
-        instructor_id=int(instructor_id)
     except:
-        QMessageBox.warning(window, "Input Error", "Make sure the age and id are integers")
+        QMessageBox.warning(window, "Input Error", "Make sure the age is an integer")
     
     try:
         instructor = Instructor(name, age, email, instructor_id)
         instructors.append(instructor)
+        autosaver.mark('instructors', instructor)
         QMessageBox.information(window, "Success", f"Instructor {name} added successfully!")
         instructor_name.clear()
         instructor_age.clear()
@@ -142,6 +292,7 @@ def add_instructor():
         QMessageBox.warning(window, "Input Error", str(e))
 
 
+@instrumentation.action('add_course')
 def add_course():
     """
     Collects data from input fields and creates a new Course object.
@@ -149,7 +300,6 @@ def add_course():
     The function validates the following:
     
     - The `course_id` and `course_name` fields are not empty.
-    - `course_id` is converted to an integer.
     
     Optionally, the function allows selecting an instructor by name.
     
@@ -158,7 +308,6 @@ def add_course():
     
     Raises:
     -------
-    ValueError : If `course_id` cannot be converted to an integer.
     AssertionError : If validation on the `Course` object fails.
     
     GUI Messages:
@@ -173,16 +322,12 @@ def add_course():
     if not course_id or not course_name:
         QMessageBox.warning(window, "Input Error", "Please fill all fields")
         return
-    try:
-        course_id=int(course_id)
-    except:
-        QMessageBox.warning(window, "Input Error", "Make sure the course id is an integer")
-    
     instructor = next((i for i in instructors if i.name == instructor_name), None) if instructor_name else None
 
     try:
         course = Course(course_id, course_name, instructor)
         courses.append(course)
+        autosaver.mark('courses', course)
         QMessageBox.information(window, "Success", f"Course {course_name} added successfully!")
         course_id_field.clear()
         course_name_field.clear()
@@ -206,6 +351,7 @@ def update_course_dropdown():
         course_dropdown_i.addItem(course.course_name, course.course_id)
 
 
+@instrumentation.action('register_student_to_course')
 def register_student_to_course(student_id_str, course_id_str):
     """
     Registers a student to a course by their ID.
@@ -218,8 +364,8 @@ def register_student_to_course(student_id_str, course_id_str):
     course_id_str : str
         The course ID as a string.
     
-    This function converts the student and course IDs to integers, finds
-    the respective objects in `students` and `courses`, registers the student
+    This function finds the student and course with these IDs (compared as
+    the strings stored in the records) in `students` and `courses`, registers the student
     to the course, and adds the student to the course's enrolled students list.
 
     Raises:
@@ -232,8 +378,8 @@ def register_student_to_course(student_id_str, course_id_str):
     - A warning message if an error occurs.
     """
     try:
-        student_id = int(student_id_str)
-        course_id = int(course_id_str)
+        student_id = (student_id_str or '').strip()
+        course_id = (course_id_str or '').strip()
         
         student = next((s for s in students if s.id == student_id), None)
         course = next((c for c in courses if c.course_id == course_id), None)
@@ -245,11 +391,16 @@ def register_student_to_course(student_id_str, course_id_str):
         
         student.register_courses(course)
         course.add_student(student)
+        autosaver.mark('students', student)
+        autosaver.mark('courses', course)
+        display_labels.forget(student, course)
+        refresh_rows(student, course)
         QMessageBox.information(window, "Success", f"Student {student_id} registered to course {course_id}")
     except ValueError as e:
         QMessageBox.warning(window, "Input Error", str(e))
 
 
+@instrumentation.action('assign_instructor_to_course')
 def assign_instructor_to_course(iid, course_id):
     """
     Assigns an instructor to a course by their ID.
@@ -262,8 +413,8 @@ def assign_instructor_to_course(iid, course_id):
     course_id : str
         The course ID as a string.
     
-    This function converts the instructor and course IDs to integers, finds
-    the respective objects in `instructors` and `courses`, and assigns the
+    This function finds the instructor and course with these IDs (compared as
+    the strings stored in the records) in `instructors` and `courses`, and assigns the
     instructor to the course.
 
     Raises:
@@ -276,8 +427,8 @@ def assign_instructor_to_course(iid, course_id):
     - A warning message if an error occurs.
     """
     try:
-        instrcutor_id = int(iid)
-        course_id = int(course_id)
+        instrcutor_id = (iid or '').strip()
+        course_id = (course_id or '').strip()
         
         instructor = next((s for s in instructors if s.instructor_id == instrcutor_id), None)
         course = next((c for c in courses if c.course_id == course_id), None)
@@ -287,12 +438,184 @@ def assign_instructor_to_course(iid, course_id):
         if course is None:
             raise ValueError(f"No course found with ID {course_id}")
         
-        course.assign_instructor(instructor)
+        course.instructor = instructor
+        instructor.assign_course(course)
+        autosaver.mark('courses', course)
+        autosaver.mark('instructors', instructor)
+        display_labels.forget(course, instructor)
+        refresh_rows(course, instructor)
         QMessageBox.information(window, "Success", f"Instructor {instrcutor_id} assigned to course {course_id}")
     except ValueError as e:
         QMessageBox.warning(window, "Input Error", str(e))
 
 
+class TableRows:
+    """
+    Keeps track of which object each row of a table shows.
+
+    The Edit and Delete buttons of a row are bound to its object rather than to a row
+    number, so removing a row never leaves the rows after it pointing at the wrong
+    object, and an edit redraws only the rows showing the edited object.
+
+    Parameters:
+    -----------
+    table : QTableWidget
+        The table widget the rows belong to.
+
+    objects : list
+        The objects shown, one per row and in row order.
+
+    data_type : list
+        The list (students, instructors, or courses) the objects belong to.
+
+    render : function
+        Fills the cells of one row from its object, called as render(table, row, obj).
+    """
+
+    def __init__(self, table, objects, data_type, render):
+        self.table = table
+        self.objects = list(objects)
+        self.data_type = data_type
+        self.render = render
+        self._rows = None
+
+    def row_of(self, obj):
+        # Positions are recomputed lazily, once after any number of removals
+        if self._rows is None:
+            self._rows = {id(shown): row for row, shown in enumerate(self.objects)}
+        return self._rows.get(id(obj))
+
+    def update(self, obj):
+        row = self.row_of(obj)
+        if row is not None:
+            self.render(self.table, row, obj)
+
+    def remove(self, obj):
+        row = self.row_of(obj)
+        if row is not None:
+            del self.objects[row]
+            self.table.removeRow(row)
+            self._rows = None
+
+
+# The rows of each table, keyed by the table widget
+table_rows = {}
+
+# Roster columns joined once per object; entries are forgotten when the roster or a name in it changes
+display_labels = LabelCache(weak=True)
+
+
+def registered_courses_label(student):
+    """
+    Returns the names of a student's courses as one string, joined on first use.
+
+    :param student: The Student.
+    """
+    return display_labels.label(student, (course.course_name for course in student.registered_courses))
+
+
+def assigned_courses_label(instructor):
+    """
+    Returns the names of an instructor's courses as one string, joined on first use.
+
+    :param instructor: The Instructor.
+    """
+    return display_labels.label(instructor, (course.course_name for course in instructor.assigned_courses))
+
+
+def enrolled_students_label(course):
+    """
+    Returns the names of a course's students as one string, joined on first use.
+
+    :param course: The Course.
+    """
+    return display_labels.label(course, (student.name for student in course.enrolled_students))
+
+
+def student_row(table, row, student):
+    """
+    Fills one row of the students table.
+
+    :param table: The students table widget.
+    :param row: The row to fill.
+    :param student: The Student shown in the row.
+    """
+    table.setItem(row, 0, QTableWidgetItem(student.name))
+    table.setItem(row, 1, QTableWidgetItem(str(student.age)))
+    table.setItem(row, 2, QTableWidgetItem(student._email))
+    table.setItem(row, 3, QTableWidgetItem(registered_courses_label(student)))
+
+
+def instructor_row(table, row, instructor):
+    """
+    Fills one row of the instructors table.
+
+    :param table: The instructors table widget.
+    :param row: The row to fill.
+    :param instructor: The Instructor shown in the row.
+    """
+    table.setItem(row, 0, QTableWidgetItem(instructor.name))
+    table.setItem(row, 1, QTableWidgetItem(str(instructor.age)))
+    table.setItem(row, 2, QTableWidgetItem(instructor._email))
+    table.setItem(row, 3, QTableWidgetItem(assigned_courses_label(instructor)))
+
+
+def course_row(table, row, course):
+    """
+    Fills one row of the courses table.
+
+    :param table: The courses table widget.
+    :param row: The row to fill.
+    :param course: The Course shown in the row.
+    """
+    table.setItem(row, 0, QTableWidgetItem(str(course.course_id)))
+    table.setItem(row, 1, QTableWidgetItem(course.course_name))
+    instructor_str = course.instructor.name if course.instructor else "None"
+    table.setItem(row, 2, QTableWidgetItem(instructor_str))
+    table.setItem(row, 3, QTableWidgetItem(enrolled_students_label(course)))
+
+
+def show_rows(table, objects, data_type, render):
+    """
+    Fills a table with one row per object and binds the row buttons to the objects.
+
+    :param table: The table widget to fill.
+    :param objects: The objects to show, in row order.
+    :param data_type: The list (students, instructors, or courses) the objects belong to.
+    :param render: The row function for the table (student_row, instructor_row or course_row).
+    """
+    rows = table_rows[table] = TableRows(table, objects, data_type, render)
+    table.setRowCount(len(rows.objects))
+    for row, obj in enumerate(rows.objects):
+        render(table, row, obj)
+    setup_table_with_buttons(table, data_type)
+
+
+def related_objects(data):
+    """
+    Returns the objects whose rows display something taken from `data`.
+
+    :param data: A Student, Instructor or Course.
+    :return: The courses of a student or instructor, or the instructor and students of a course.
+    """
+    if isinstance(data, Student):
+        return list(data.registered_courses)
+    if isinstance(data, Instructor):
+        return list(data.assigned_courses)
+    return ([data.instructor] if data.instructor else []) + list(data.enrolled_students)
+
+
+def refresh_rows(*objects):
+    """
+    Redraws the rows showing the given objects in every table, leaving all other rows alone.
+
+    :param objects: The Students, Instructors or Courses that changed.
+    """
+    for rows in table_rows.values():
+        for obj in objects:
+            rows.update(obj)
+
+
 def setup_students_table(table):
     """
     Sets up the students table with name, age, email, registered courses, and action buttons.
@@ -309,12 +632,7 @@ def setup_students_table(table):
     table.setColumnCount(6)  # name, age, email, registered courses, edit, delete
     table.setHorizontalHeaderLabels(["Name", "Age", "Email", "Registered Courses", "Edit", "Delete"])
 
-    for row, student in enumerate(students):
-        table.setItem(row, 0, QTableWidgetItem(student.name))
-        table.setItem(row, 1, QTableWidgetItem(str(student.age)))
-        table.setItem(row, 2, QTableWidgetItem(student._email))
-        courses_str = ", ".join([course.course_name for course in student.registered_courses])
-        table.setItem(row, 3, QTableWidgetItem(courses_str))
+    show_rows(table, students, students, student_row)
 
 
 def setup_instructors_table(table):
@@ -333,12 +651,7 @@ def setup_instructors_table(table):
     table.setColumnCount(6)  # name, age, email, assigned courses, edit, delete
     table.setHorizontalHeaderLabels(["Name", "Age", "Email", "Assigned Courses", "Edit", "Delete"])
 
-    for row, instructor in enumerate(instructors):
-        table.setItem(row, 0, QTableWidgetItem(instructor.name))
-        table.setItem(row, 1, QTableWidgetItem(str(instructor.age)))
-        table.setItem(row, 2, QTableWidgetItem(instructor._email))
-        courses_str = ", ".join([course.course_name for course in instructor.assigned_courses])
-        table.setItem(row, 3, QTableWidgetItem(courses_str))
+    show_rows(table, instructors, instructors, instructor_row)
 
 
 def setup_courses_table(table):
@@ -357,15 +670,10 @@ def setup_courses_table(table):
     table.setColumnCount(6)  # course_id, course_name, instructor, enrolled students, edit, delete
     table.setHorizontalHeaderLabels(["Course ID", "Course Name", "Instructor", "Enrolled Students", "Edit", "Delete"])
 
-    for row, course in enumerate(courses):
-        table.setItem(row, 0, QTableWidgetItem(str(course.course_id)))
-        table.setItem(row, 1, QTableWidgetItem(course.course_name))
-        instructor_str = course.instructor.name if course.instructor else "None"
-        table.setItem(row, 2, QTableWidgetItem(instructor_str))
-        students_str = ", ".join([student.name for student in course.enrolled_students])
-        table.setItem(row, 3, QTableWidgetItem(students_str))
+    show_rows(table, courses, courses, course_row)
 
 
+@instrumentation.action('set_table')
 def set_table(students_table, instructors_table, courses_table):
     """
     Sets up the tables for students, instructors, and courses.
@@ -381,17 +689,15 @@ def set_table(students_table, instructors_table, courses_table):
     courses_table : QTableWidget
         The table widget for displaying course data.
     
-    This function calls the setup functions for students, instructors, and courses. It
-    also adds "Edit" and "Delete" buttons to each table.
+    This function calls the setup functions for students, instructors, and courses,
+    which also add "Edit" and "Delete" buttons to each table.
     """
     setup_students_table(students_table)
     setup_instructors_table(instructors_table)
     setup_courses_table(courses_table)
-    setup_table_with_buttons(students_table, students)
-    setup_table_with_buttons(instructors_table, instructors)
-    setup_table_with_buttons(courses_table, courses)
 
 
+@instrumentation.action('filter_records')
 def filter_records(search_term, students_table, instructors_table, courses_table):
     """
     Filters and displays records based on a search term.
@@ -421,34 +727,15 @@ def filter_records(search_term, students_table, instructors_table, courses_table
 
     # Filter Students by name or ID
     filtered_students = [student for student in students if search_term.lower() in student.name.lower() or search_term in str(student.id)]
-    students_table.setRowCount(len(filtered_students))
-    for row, student in enumerate(filtered_students):
-        students_table.setItem(row, 0, QTableWidgetItem(student.name))
-        students_table.setItem(row, 1, QTableWidgetItem(str(student.age)))
-        students_table.setItem(row, 2, QTableWidgetItem(student._email))
-        courses_str = ", ".join([course.course_name for course in student.registered_courses])
-        students_table.setItem(row, 3, QTableWidgetItem(courses_str))
+    show_rows(students_table, filtered_students, students, student_row)
 
     # Filter Instructors by name or ID
     filtered_instructors = [instructor for instructor in instructors if search_term.lower() in instructor.name.lower() or search_term in str(instructor.instructor_id)]
-    instructors_table.setRowCount(len(filtered_instructors))
-    for row, instructor in enumerate(filtered_instructors):
-        instructors_table.setItem(row, 0, QTableWidgetItem(instructor.name))
-        instructors_table.setItem(row, 1, QTableWidgetItem(str(instructor.age)))
-        instructors_table.setItem(row, 2, QTableWidgetItem(instructor._email))
-        courses_str = ", ".join([course.course_name for course in instructor.assigned_courses])
-        instructors_table.setItem(row, 3, QTableWidgetItem(courses_str))
+    show_rows(instructors_table, filtered_instructors, instructors, instructor_row)
 
     # Filter Courses by course name or ID
     filtered_courses = [course for course in courses if search_term.lower() in course.course_name.lower() or search_term in str(course.course_id)]
-    courses_table.setRowCount(len(filtered_courses))
-    for row, course in enumerate(filtered_courses):
-        courses_table.setItem(row, 0, QTableWidgetItem(str(course.course_id)))
-        courses_table.setItem(row, 1, QTableWidgetItem(course.course_name))
-        instructor_str = course.instructor.name if course.instructor else "None"
-        courses_table.setItem(row, 2, QTableWidgetItem(instructor_str))
-        students_str = ", ".join([student.name for student in course.enrolled_students])
-        courses_table.setItem(row, 3, QTableWidgetItem(students_str))
+    show_rows(courses_table, filtered_courses, courses, course_row)
 
 
 def setup_table_with_buttons(table, data_type):
@@ -461,12 +748,12 @@ def setup_table_with_buttons(table, data_type):
         The table widget where buttons will be added.
     
     data_type : list
-        The list of data items (students, instructors, or courses) to display in the table.
+        The list of data items (students, instructors, or courses) the rows belong to.
     
-    This function iterates over the data and adds an "Edit" and "Delete" button to each row.
-    The buttons are connected to respective functions to handle editing and deleting records.
+    This function iterates over the rows shown in the table and adds an "Edit" and "Delete" button to each row.
+    The buttons are connected to respective functions to handle editing and deleting the object shown in the row.
     """
-    for row, data in enumerate(data_type):
+    for row, data in enumerate(table_rows[table].objects):
         edit_button = QPushButton("Edit")
         delete_button = QPushButton("Delete")
 
@@ -475,221 +762,255 @@ def setup_table_with_buttons(table, data_type):
         table.setCellWidget(row, 5, delete_button)  # Column for Delete
 
         # Connect the buttons to functions
-        edit_button.clicked.connect(lambda ch, r=row: edit_record(r, data_type, table))
-        delete_button.clicked.connect(lambda ch, r=row: delete_record(r, data_type, table))
-def edit_record(row, data_type, table):
+        edit_button.clicked.connect(lambda ch, d=data: edit_record(d))
+        delete_button.clicked.connect(lambda ch, d=data: delete_record(d, data_type))
+@instrumentation.action('edit_record')
+def edit_record(data):
     '''
     Edits the values of the locally stored Students, Instrcutors and Courses.
 
     Parameters:
     --------------
-    row: integer
-        The index of the row to be edited
-
-    data_type : list
-        The list of data items (students, instructors, or courses) to choose in the table.
+    data: Student, Instructor or Course
+        The object shown in the row whose "Edit" button was clicked
 
-    table : QTableWidget
-        The table widget where buttons to edit the rows will be added.
-
-    This function takes the value to be edited through the row and object type, loops through the different attributes and parameters and asks the user to input new values.
+    This function takes the object to be edited, loops through the different attributes and parameters and asks the user to input new values.
     For each new value, it asks if the user wants to change it. Depending on their choice, it prompts the new value or goes on to the next.
     '''
-    data = data_type[row]  # Get the object to be edited
+    command = ObjectCommand(f"Edit {kind_of(data)}", restored)
+    command.capture(kind_of(data), data)
+    if isinstance(data, Course) and data.instructor:
+        command.capture('instructors', data.instructor)
 
     if isinstance(data, Student):
         # Edit student details
         new_name, ok = QInputDialog.getText(None, "Edit Student", "Enter new name:", text=data.name)
         if ok:
             data.name = new_name
-            table.setItem(row, 0, QTableWidgetItem(new_name))
 
         new_age, ok = QInputDialog.getInt(None, "Edit Student", "Enter new age:", value=data.age)
         if ok:
             data.age = new_age
-            table.setItem(row, 1, QTableWidgetItem(str(new_age)))
 
         new_email, ok = QInputDialog.getText(None, "Edit Student", "Enter new email:", text=data._email)
         if ok:
             if Person.validMail(new_email):  # Check if email is valid
                 data.edit_email(new_email)
-                table.setItem(row, 2, QTableWidgetItem(new_email))
             else:
                 QMessageBox.warning(None, "Invalid Email", "Please enter a valid email.")
 
-        new_id, ok = QInputDialog.getInt(None, "Edit Student", "Enter new student ID:", value=data.id)
-        if ok:
+        new_id, ok = QInputDialog.getText(None, "Edit Student", "Enter new student ID:", text=data.id)
+        if ok and new_id:
             data.id = new_id
-            table.setItem(row, 3, QTableWidgetItem(str(new_id)))
 
     elif isinstance(data, Instructor):
         # Edit instructor details
         new_name, ok = QInputDialog.getText(None, "Edit Instructor", "Enter new name:", text=data.name)
         if ok:
             data.name = new_name
-            table.setItem(row, 0, QTableWidgetItem(new_name))
 
         new_age, ok = QInputDialog.getInt(None, "Edit Instructor", "Enter new age:", value=data.age)
         if ok:
             data.age = new_age
-            table.setItem(row, 1, QTableWidgetItem(str(new_age)))
 
         new_email, ok = QInputDialog.getText(None, "Edit Instructor", "Enter new email:", text=data._email)
         if ok:
             if Person.validMail(new_email):  # Check if email is valid
                 data.edit_email(new_email)
-                table.setItem(row, 2, QTableWidgetItem(new_email))
             else:
                 QMessageBox.warning(None, "Invalid Email", "Please enter a valid email.")
 
-        new_iid, ok = QInputDialog.getInt(None, "Edit Instructor", "Enter new instructor ID:", value=data.instructor_id)
-        if ok:
+        new_iid, ok = QInputDialog.getText(None, "Edit Instructor", "Enter new instructor ID:", text=data.instructor_id)
+        if ok and new_iid:
             data.instructor_id = new_iid
-            table.setItem(row, 3, QTableWidgetItem(str(new_iid)))
 
     elif isinstance(data, Course):
         # Edit course details
         new_course_name, ok = QInputDialog.getText(None, "Edit Course", "Enter new course name:", text=data.course_name)
         if ok:
             data.course_name = new_course_name
-            table.setItem(row, 0, QTableWidgetItem(new_course_name))
 
-        new_course_id, ok = QInputDialog.getInt(None, "Edit Course", "Enter new course ID:", value=data.course_id)
-        if ok:
+        new_course_id, ok = QInputDialog.getText(None, "Edit Course", "Enter new course ID:", text=data.course_id)
+        if ok and new_course_id:
             data.course_id = new_course_id
-            table.setItem(row, 1, QTableWidgetItem(str(new_course_id)))
 
         # Since instructor may not always be assigned, check if they want to change the instructor
         if data.instructor:
             new_instructor, ok = QInputDialog.getText(None, "Edit Instructor", "Enter new instructor name:", text=data.instructor.name)
             if ok:
                 data.instructor.name = new_instructor
-                table.setItem(row, 2, QTableWidgetItem(new_instructor))
+                autosaver.mark('instructors', data.instructor)
         else:
             assign_instructor = QMessageBox.question(None, "Assign Instructor", "Do you want to assign an instructor?",
                                                      QMessageBox.Yes | QMessageBox.No)
             if assign_instructor == QMessageBox.Yes:
                 instructor_id, ok = QInputDialog.getText(None, "Assign Instructor", "Enter instructor id:")
                 if ok:
-                    instructor = next((s for s in students if s.instructor_id == instructor_id), None)
-                    if instructor:
-                        table.setItem(row, 2, QTableWidgetItem(instructor.name))
-                    else:
+                    instructor = next((i for i in instructors if i.instructor_id == instructor_id.strip()), None)
+                    if instructor is None:
                         QMessageBox.warning(None, "Invalid Instructor", "Please enter a valid instructor ID.")
-
-def delete_record(row, data_type, table):
+                    else:
+                        command.capture('instructors', instructor)
+                        data.instructor = instructor
+                        instructor.assign_course(data)
+                        autosaver.mark('instructors', instructor)
+
+    autosaver.mark(kind_of(data), data)
+    history.push(command.finish())
+    display_labels.forget(data, *related_objects(data))
+    refresh_rows(data, *related_objects(data))
+
+@instrumentation.action('delete_record')
+def delete_record(data, data_type):
     """
     Delete a record from the specified data type and table after confirmation.
 
     This function displays a confirmation dialog to the user. If the user confirms,
-    the specified record is removed from the data type list and the table.
+    the specified record is removed from the data type list and its row from the tables.
 
-    :param row: The index of the record to delete.
+    :param data: The Student, Instructor or Course to delete.
     :param data_type: The list of data records (e.g., students, instructors, courses).
-    :param table: The table widget from which the row should be removed.
 
     """
     reply = QMessageBox.question(None, "Delete", "Are you sure you want to delete this record?",
                                  QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
 
     if reply == QMessageBox.Yes:
-        data_type.pop(row)
-        table.removeRow(row)
-
+        index = next((index for index, obj in enumerate(data_type) if obj is data), None)
+        if index is None:
+            # Already gone, e.g. removed by an undo or a load since the row was drawn
+            for rows in table_rows.values():
+                rows.remove(data)
+            return
+        data_type.pop(index)
+        autosaver.mark_deleted(kind_of(data), data)
+        command = ObjectCommand(f"Delete {kind_of(data)}", restored)
+        command.removed(kind_of(data), data_type, index, data)
+        history.push(command)
+        for rows in table_rows.values():
+            rows.remove(data)
+
+@instrumentation.action('load_from_json')
 def load_from_json():
     """
     Load data from a JSON file into the global lists of students, instructors, and courses.
 
     Prompts the user for a filename, reads the JSON file, and populates the global 
-    lists with the data. Handles FileNotFoundError and JSONDecodeError exceptions.
+    lists with the data. Handles FileNotFoundError and invalid files.
 
-    The expected structure of the JSON file is:
+    The expected structure of the JSON file is the one written by `save_to_json`:
 
     {
-        "students": [...],
-        "instructors": [...],
-        "courses": [...],
+        "students": {"<student_id>": {...}},
+        "instructors": {"<instructor_id>": {...}},
+        "courses": {"<course_id>": {..., "instructor_id": ...}},
     }
 
+    Files holding lists of records under the same keys, in either the OOP or the
+    older Classes layout, are also accepted. References are resolved by ID in one pass.
+
     :raises FileNotFoundError: If the specified file cannot be found.
-    :raises json.JSONDecodeError: If the file is not a valid JSON.
+    :raises ValueError: If the file is not a valid bundle.
     """
     global students, instructors, courses
     name, ok = QInputDialog.getText(None, "Input", "Enter file name")
     if ok:
         try:
             filename = name + '.json'
-            with open(filename, 'r') as file:
-                data = json.load(file)
-                students = [Student(**s) for s in data.get('students', [])]
-                instructors = [Instructor(**i) for i in data.get('instructors', [])]
-                courses = [Course(**c) for c in data.get('courses', [])]
+            students, instructors, courses = build_objects(read_journaled_bundle(filename))
+            autosaver.rewrite(AUTOSAVE_FILE, to_bundle(students, instructors, courses), students, instructors, courses)
+            history.clear()
             print(f"Data loaded from {filename}.")
         except FileNotFoundError:
             print(f"{filename} not found. Loading skipped.")
-        except json.JSONDecodeError:
+        except (KeyError, TypeError, ValueError, AssertionError):
             print(f"Error decoding JSON in {filename}. Loading skipped.")
 
+@instrumentation.action('save_to_json')
 def save_to_json():
     """
     Save the current lists of students, instructors, and courses to a JSON file.
 
     Prompts the user for a filename and writes the current state of the data
-    to a JSON file. The saved data structure includes lists of students, 
-    instructors, and courses.
+    to a JSON file. Every student, instructor, and course is stored once under
+    its ID, and relations between them are stored as IDs, so the file grows
+    linearly with the data and can be read back by `load_from_json`.
 
     :raises Exception: Raises an exception if there's an error writing the file.
     """
     name, ok = QInputDialog.getText(None, "Input", "Enter file name")
     if ok:
         filename = name + '.json'
-        data = {
-            'students': [student.__dict__ for student in students],
-            'instructors': [instructor.__dict__ for instructor in instructors],
-            'courses': [course.__dict__ for course in courses]
-        }
-        with open(filename, 'w') as file:
-            json.dump(data, file, indent=4)
+        write_bundle(filename, to_bundle(students, instructors, courses))
         print(f"Data saved to {filename}.")
 
+@instrumentation.action('export_to_csv')
 def export_to_csv():
     """
     Export the current lists of students, instructors, and courses to CSV files.
 
-    Prompts the user for filenames for each data type and writes the current state
-    to separate CSV files. The exported files will include details such as names, 
-    email addresses, and registered courses for students, and similarly for instructors
-    and courses.
-
-    :raises Exception: Raises an exception if there's an error writing the files.
-    """
-    s_name, s_ok = QInputDialog.getText(None, "Student Input", "Enter file name for students")
-    if s_ok:
-        with open(s_name + '.csv', 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Name', 'Age', 'Email', 'ID', 'Registered Courses'])
-            for student in students:
-                courses = ", ".join([course.course_name for course in student.registered_courses])
-                writer.writerow([student.name, student.age, student._email, student.id, courses])
-
-    i_name, i_ok = QInputDialog.getText(None, "Instructor Input", "Enter file name for instructors")
-    if i_ok:
-        with open(i_name + '.csv', 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Name', 'Age', 'Email', 'Instructor ID', 'Assigned Courses'])
-            for instructor in instructors:
-                courses = ", ".join([course.course_name for course in instructor.assigned_courses])
-                writer.writerow([instructor.name, instructor.age, instructor._email, instructor.instructor_id, courses])
-
-    c_name, c_ok = QInputDialog.getText(None, "Course Input", "Enter file name for courses")
-    if c_ok:
-        with open(c_name + '.csv', 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Course ID', 'Course Name', 'Instructor', 'Enrolled Students'])
-            for course in courses:
-                students_list = ", ".join([student.name for student in course.enrolled_students])
-                instructor_name = course.instructor.name if course.instructor else "None"
-                writer.writerow([course.course_id, course.course_name, instructor_name, students_list])
+    Prompts once for a base name and writes `<base>_students.csv`,
+    `<base>_instructors.csv` and `<base>_courses.csv` on a background thread,
+    showing a cancellable progress dialog. A base name ending in `.gz` writes
+    gzip-compressed files instead.
+    """
+    name, ok = QInputDialog.getText(None, "Export", "Enter base file name (end with .gz to compress)")
+    if not ok or not name:
+        return
+    suffix = '.csv'
+    if name.endswith('.gz'):
+        name, suffix = name[:-len('.gz')], '.csv.gz'
+
+    # Shallow copies so edits made while the export runs do not change the lists being written
+    jobs = [
+        ExportJob(name + '_students' + suffix, STUDENT_CSV_COLUMNS, records=list(students)),
+        ExportJob(name + '_instructors' + suffix, INSTRUCTOR_CSV_COLUMNS, records=list(instructors)),
+        ExportJob(name + '_courses' + suffix, COURSE_CSV_COLUMNS, records=list(courses))
+    ]
+    total = sum(len(job.records) for job in jobs)
+    dialog = QProgressDialog("Exporting to CSV...", "Cancel", 0, max(total, 1), window)
+    dialog.setMinimumDuration(500)
+
+    thread = ExportThread(jobs)
+    thread.progress.connect(lambda done, _: dialog.setValue(done))
+    thread.failed.connect(lambda message: QMessageBox.warning(window, "Export Error", message))
+    dialog.canceled.connect(thread.cancel.set)
+    thread.finished.connect(dialog.reset)
+    thread.finished.connect(lambda: export_threads.remove(thread))
+    export_threads.append(thread)
+    thread.start()
+
+
+@instrumentation.action('undo')
+def undo_last(students_table, instructors_table, courses_table):
+    """
+    Reverts the last edit or deletion and redraws the tables.
+
+    :param students_table: The table widget for displaying student data.
+    :param instructors_table: The table widget for displaying instructor data.
+    :param courses_table: The table widget for displaying course data.
+    """
+    if history.undo() is None:
+        QMessageBox.information(None, "Undo", "Nothing to undo.")
+        return
+    display_labels.clear()
+    set_table(students_table, instructors_table, courses_table)
+
+
+@instrumentation.action('redo')
+def redo_last(students_table, instructors_table, courses_table):
+    """
+    Applies the last undone edit or deletion again and redraws the tables.
+
+    :param students_table: The table widget for displaying student data.
+    :param instructors_table: The table widget for displaying instructor data.
+    :param courses_table: The table widget for displaying course data.
+    """
+    if history.redo() is None:
+        QMessageBox.information(None, "Redo", "Nothing to redo.")
+        return
+    display_labels.clear()
+    set_table(students_table, instructors_table, courses_table)
 
 
 def main():
@@ -699,6 +1020,15 @@ def main():
     global course_dropdown, course_dropdown_i
 
     app = QApplication(sys.argv)
+    instrumentation.start_periodic_log()
+    if not restore_autosave():
+        load_data_files()
+
+    # Edits made between two ticks are written as one batch; quitting flushes synchronously
+    autosave_timer = QTimer()
+    autosave_timer.timeout.connect(lambda: autosaver.flush())
+    autosave_timer.start(AUTOSAVE_INTERVAL_MS)
+    app.aboutToQuit.connect(autosaver.close)
     window = QMainWindow()
     window.setWindowTitle("School Management System")
     window.setGeometry(100, 100, 500, 400)
@@ -716,7 +1046,7 @@ def main():
     student_form.addRow(QLabel("Email:"), student_email)
     student_form.addRow(QLabel("Student ID:"), student_id_field)
     add_student_button = QPushButton("Add Student")
-    add_student_button.clicked.connect(add_student)
+    add_student_button.clicked.connect(lambda: add_student())
     student_form.addWidget(add_student_button)
     main_layout.addLayout(student_form)
 
@@ -731,7 +1061,7 @@ def main():
     instructor_form.addRow(QLabel("Email:"), instructor_email)
     instructor_form.addRow(QLabel("Instructor ID:"), instructor_id_field)
     add_instructor_button = QPushButton("Add Instructor")
-    add_instructor_button.clicked.connect(add_instructor)
+    add_instructor_button.clicked.connect(lambda: add_instructor())
     instructor_form.addWidget(add_instructor_button)
     main_layout.addLayout(instructor_form)
 
@@ -744,7 +1074,7 @@ def main():
     course_form.addRow(QLabel("Course Name:"), course_name_field)
     course_form.addRow(QLabel("Instructor Name:"), instructor_name_for_course)
     add_course_button = QPushButton("Add Course")
-    add_course_button.clicked.connect(add_course)
+    add_course_button.clicked.connect(lambda: add_course())
     course_form.addWidget(add_course_button)
     main_layout.addLayout(course_form)
 
@@ -813,19 +1143,23 @@ def main():
     main_layout.addWidget(refresh_table_button)
     refresh_table_button.clicked.connect(lambda: set_table(students_table,instructors_table,courses_table))
 
+    undo_button = QPushButton("Undo", window)
+    redo_button = QPushButton("Redo", window)
+    main_layout.addWidget(undo_button)
+    main_layout.addWidget(redo_button)
+    undo_button.clicked.connect(lambda: undo_last(students_table, instructors_table, courses_table))
+    redo_button.clicked.connect(lambda: redo_last(students_table, instructors_table, courses_table))
+
     search_button.clicked.connect(lambda: filter_records(search_input.text(), students_table, instructors_table, courses_table))
-    setup_table_with_buttons(students_table,students)
-    setup_table_with_buttons(instructors_table,instructors)
-    setup_table_with_buttons(courses_table,courses)
 
 
     save_button = QPushButton("Save")
     load_button = QPushButton("Load")
     export_button = QPushButton("Export to CSV")
 
-    save_button.clicked.connect(save_to_json)
-    load_button.clicked.connect(load_from_json)
-    export_button.clicked.connect(export_to_csv)
+    save_button.clicked.connect(lambda: save_to_json())
+    load_button.clicked.connect(lambda: load_from_json())
+    export_button.clicked.connect(lambda: export_to_csv())
 
     main_layout.addWidget(save_button)
     main_layout.addWidget(load_button)
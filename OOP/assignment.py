@@ -0,0 +1,272 @@
+from . import instrumentation
+from .course import Course
+from .instructor import Instructor
+from .schedule import Timetable, meeting_intervals
+from .storage import load_records, replace_records
+from collections import deque
+import json
+import sys
+
+# Courses an instructor may hold in total when their constraints do not give a max_load
+DEFAULT_MAX_LOAD = 4
+
+class AssignmentResult:
+
+    def __init__(self, assigned, unassigned):
+        # assigned: {course_id: instructor_id}; unassigned: course IDs left without an instructor.
+        # The plan is maximal for loads and allowed courses but not guaranteed maximal once
+        # clashes between the new courses come in (see plan_assignment), so a course can be
+        # unassigned even though some other plan would have covered it
+        self.assigned = assigned
+        self.unassigned = unassigned
+
+    def __repr__(self):
+        return f"AssignmentResult(assigned={len(self.assigned)}, unassigned={self.unassigned!r})"
+
+class _FlowNetwork:
+    # Dinic's max flow over adjacency lists of [to, capacity, index of the reverse edge].
+    # Each phase saturates every shortest augmenting path at once, so a term's catalogue is
+    # matched in O(E sqrt V) rather than one augmenting search per course.
+
+    def __init__(self, size):
+        self.graph = [[] for _ in range(size)]
+
+    def add_edge(self, source, target, capacity):
+        self.graph[source].append([target, capacity, len(self.graph[target])])
+        self.graph[target].append([source, 0, len(self.graph[source]) - 1])
+        return self.graph[source][-1]
+
+    def max_flow(self, source, sink):
+        total = 0
+        while True:
+            level = self._levels(source, sink)
+            if level[sink] < 0:
+                return total
+            pointer = [0] * len(self.graph)
+            flow = self._augment(source, sink, level, pointer)
+            while flow:
+                total += flow
+                flow = self._augment(source, sink, level, pointer)
+
+    def _levels(self, source, sink):
+        level = [-1] * len(self.graph)
+        level[source] = 0
+        queue = deque([source])
+        while queue and level[sink] < 0:
+            node = queue.popleft()
+            for target, capacity, _ in self.graph[node]:
+                if capacity > 0 and level[target] < 0:
+                    level[target] = level[node] + 1
+                    queue.append(target)
+        return level
+
+    def _augment(self, source, sink, level, pointer):
+        # One path through the level graph, walked iteratively: residual paths can be as long
+        # as the network is large, well past the recursion limit
+        path = []
+        node = source
+        while node != sink:
+            edges = self.graph[node]
+            while pointer[node] < len(edges):
+                target, capacity, _ = edges[pointer[node]]
+                if capacity > 0 and level[target] == level[node] + 1:
+                    break
+                pointer[node] += 1
+            else:
+                # Dead end: nothing more flows through this node in this phase
+                if not path:
+                    return 0
+                node = path.pop()
+                pointer[node] += 1
+                continue
+            path.append(node)
+            node = target
+        edges = [self.graph[node][pointer[node]] for node in path]
+        flow = min(edge[1] for edge in edges)
+        for edge in edges:
+            edge[1] -= flow
+            self.graph[edge[0]][edge[2]][1] += flow
+        return flow
+
+def _load_limit(instructor, constraint):
+    max_load = constraint.get('max_load', DEFAULT_MAX_LOAD)
+    if max_load is None:
+        return None
+    if type(max_load) is not int or max_load < 0:
+        raise ValueError(f"max_load of instructor {instructor.instructor_id} must be a non-negative integer")
+    return max(0, max_load - len(instructor.assigned_courses))
+
+def plan_assignment(instructors, courses, constraints=None):
+    # instructors and courses are objects (Instructor.load_all_instructors,
+    # Course.load_all_courses_fully); constraints is {instructor_id: {'max_load': n or None,
+    # 'allowed_courses': [course_id, ...] or None}}. Only courses without an instructor are
+    # planned, and no instructor is given a course clashing with one they already hold.
+    constraints = constraints or {}
+    unknown = set(constraints) - {instructor.instructor_id for instructor in instructors}
+    if unknown:
+        raise ValueError(f"Constraints given for unknown instructors: {', '.join(sorted(unknown))}")
+
+    meetings = {course.course_id: meeting_intervals(course.meeting_times) for course in courses}
+    open_courses = [course.course_id for course in courses if course.instructor is None]
+    held = {}
+    candidates = {}
+    for instructor in instructors:
+        constraint = constraints.get(instructor.instructor_id, {})
+        allowed = constraint.get('allowed_courses')
+        allowed = set(allowed) if allowed is not None else None
+        held[instructor.instructor_id] = [(start, end, course_id) for course_id in instructor.assigned_courses
+                                          for start, end in meetings.get(course_id, ())]
+        timetable = _timetable(held[instructor.instructor_id])
+        candidates[instructor.instructor_id] = (
+            _load_limit(instructor, constraint),
+            [course_id for course_id in open_courses
+             if (allowed is None or course_id in allowed) and timetable.conflict(meetings[course_id]) is None])
+
+    # The flow keeps loads and allowed courses but knows nothing of clashes between the new
+    # courses; a clashing pair found afterwards is taken out of the network and the flow
+    # topped up from where it was, which only searches for the courses that lost their match.
+    # This is a greedy heuristic, not an exact solution: the later course of a clashing pair
+    # is banned for good and the other course is never tried in its place, so the result can
+    # leave more courses unassigned than the best clash-free plan would (finding that plan is
+    # NP-hard in general)
+    with instrumentation.timer('assignment.plan'):
+        matching = _Matching(candidates, len(open_courses))
+        while True:
+            assigned = matching.solve()
+            clashes = _clashes(assigned, meetings, held)
+            if not clashes:
+                break
+            for instructor_id, course_id in clashes:
+                matching.ban(instructor_id, course_id)
+    instrumentation.increment('assignment.courses', len(assigned))
+    return AssignmentResult(assigned, [course_id for course_id in open_courses if course_id not in assigned])
+
+class _Matching:
+    # source -> instructor (remaining load) -> allowed course (1) -> sink (1)
+    SOURCE, SINK = 0, 1
+
+    def __init__(self, candidates, course_count):
+        self.network = _FlowNetwork(2 + len(candidates) + course_count)
+        self.edges = {}
+        self._instructor_edges = {}
+        self._course_edges = {}
+        course_nodes = {}
+        for node, (instructor_id, (limit, course_ids)) in enumerate(candidates.items(), start=2):
+            if not course_ids or limit == 0:
+                continue
+            self._instructor_edges[instructor_id] = self.network.add_edge(
+                self.SOURCE, node, len(course_ids) if limit is None else limit)
+            for course_id in course_ids:
+                if course_id not in course_nodes:
+                    course_nodes[course_id] = 2 + len(candidates) + len(course_nodes)
+                    self._course_edges[course_id] = self.network.add_edge(course_nodes[course_id], self.SINK, 1)
+                self.edges[(instructor_id, course_id)] = self.network.add_edge(node, course_nodes[course_id], 1)
+
+    def solve(self):
+        self.network.max_flow(self.SOURCE, self.SINK)
+        return {course_id: instructor_id for (instructor_id, course_id), edge in self.edges.items() if edge[1] == 0}
+
+    def ban(self, instructor_id, course_id):
+        # Only called for a matched pair: its unit of flow is sent back along source ->
+        # instructor -> course -> sink and the edge is removed from both directions
+        edge = self.edges.pop((instructor_id, course_id))
+        self.network.graph[edge[0]][edge[2]][1] = 0
+        for path_edge in (self._instructor_edges[instructor_id], self._course_edges[course_id]):
+            path_edge[1] += 1
+            self.network.graph[path_edge[0]][path_edge[2]][1] -= 1
+
+def _timetable(meetings):
+    timetable = Timetable()
+    for start, end, course_id in meetings:
+        timetable.insert(start, end, course_id)
+    return timetable
+
+def _clashes(assigned, meetings, held):
+    # (instructor_id, course_id) pairs that cannot all be kept: every planned course clashing
+    # with one planned before it for the same instructor
+    clashes = set()
+    planned = {}
+    for course_id, instructor_id in sorted(assigned.items()):
+        if meetings[course_id]:
+            planned.setdefault(instructor_id, []).append(course_id)
+    for instructor_id, course_ids in planned.items():
+        if len(course_ids) < 2:
+            continue
+        timetable = _timetable(held[instructor_id])
+        for course_id in course_ids:
+            if timetable.conflict(meetings[course_id]) is not None:
+                clashes.add((instructor_id, course_id))
+                continue
+            for start, end in meetings[course_id]:
+                timetable.insert(start, end, course_id)
+    return clashes
+
+def apply_assignment(result, instructors_file='Data/instructors.json', courses_file='Data/courses.json'):
+    # Writes the whole plan as one write per file. If the instructor write raises, the course
+    # write is put back; this is only a best-effort rollback within this process, not a
+    # transaction: if the process dies between the two writes, the course file is left
+    # naming instructors whose records do not list those courses yet
+    from .reports import record_assignment
+    if not result.assigned:
+        return 0
+    planned = {}
+    for course_id, instructor_id in result.assigned.items():
+        planned.setdefault(instructor_id, []).append(course_id)
+
+    instructors = {record['instructor_id']: record for record in load_records(instructors_file)
+                   if record['instructor_id'] in planned}
+    missing = set(planned) - set(instructors)
+    if missing:
+        raise ValueError(f"Instructors not found: {', '.join(sorted(missing))}")
+    for instructor_id, course_ids in planned.items():
+        record = instructors[instructor_id]
+        instructors[instructor_id] = dict(record, assigned_courses=list(dict.fromkeys(record.get('assigned_courses', []) + course_ids)))
+
+    # The planned courses get their instructor; the instructors' other courses embed a copy
+    # that has to list the new courses too
+    courses = []
+    before = []
+    found = set()
+    for course in load_records(courses_file):
+        embedded = course.get('instructor')
+        if course['course_id'] in result.assigned:
+            if embedded:
+                raise ValueError(f"Course {course['course_id']} already has an instructor assigned")
+            instructor_id = result.assigned[course['course_id']]
+            found.add(course['course_id'])
+        elif embedded and embedded['instructor_id'] in planned:
+            instructor_id = embedded['instructor_id']
+        else:
+            continue
+        before.append(course)
+        courses.append(dict(course, instructor=dict(instructors[instructor_id])))
+    if len(found) < len(result.assigned):
+        raise ValueError(f"Courses not found: {', '.join(sorted(set(result.assigned) - found))}")
+
+    with instrumentation.timer('assignment.apply'):
+        replace_records(courses_file, 'course_id', courses)
+        try:
+            replace_records(instructors_file, 'instructor_id', list(instructors.values()))
+        except Exception:
+            replace_records(courses_file, 'course_id', before)
+            raise
+    for course_id, instructor_id in result.assigned.items():
+        record_assignment(instructors_file, courses_file, instructor_id, course_id)
+    return len(courses) + len(instructors)
+
+def assign_term(constraints=None, instructors_file='Data/instructors.json', courses_file='Data/courses.json'):
+    result = plan_assignment(Instructor.load_all_instructors(instructors_file),
+                             Course.load_all_courses_fully(courses_file), constraints)
+    apply_assignment(result, instructors_file, courses_file)
+    return result
+
+if __name__ == '__main__':
+    # python -m OOP.assignment [CONSTRAINTS.json]  ({"I1": {"max_load": 3, "allowed_courses": ["C1"]}})
+    constraints = None
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r') as f:
+            constraints = json.load(f)
+    result = assign_term(constraints)
+    for course_id, instructor_id in sorted(result.assigned.items()):
+        print(course_id, instructor_id)
+    print(f"{len(result.assigned)} assigned, {len(result.unassigned)} left unassigned:", ', '.join(result.unassigned))
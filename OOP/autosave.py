@@ -0,0 +1,138 @@
+from . import instrumentation
+from .formats import ID_FIELDS, KINDS, normalize, read_bundle, write_bundle
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import weakref
+
+# Journal entries written before the bundle is rewritten with everything folded in
+COMPACT_AFTER = 1000
+
+def journal_path(path):
+    return path + '.journal'
+
+def read_journaled_bundle(path):
+    # The bundle (if any) with the journal replayed on top, as lists of records per kind
+    if not os.path.exists(path) and not os.path.exists(journal_path(path)):
+        raise FileNotFoundError(path)
+    bundle = read_bundle(path) if os.path.exists(path) else {kind: [] for kind in KINDS}
+    records = {kind: {record[ID_FIELDS[kind]]: record for record in bundle[kind]} for kind in KINDS}
+    try:
+        with open(journal_path(path), 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line torn by a crash mid-append; the entries around it are intact
+                    continue
+                if entry['op'] == 'put':
+                    records[entry['kind']][entry['id']] = entry['record']
+                else:
+                    records[entry['kind']].pop(entry['id'], None)
+    except FileNotFoundError:
+        pass
+    return {kind: normalize(kind, list(records[kind].values())) for kind in KINDS}
+
+def _append_entries(path, entries):
+    with open(journal_path(path), 'a') as f:
+        f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+        f.flush()
+        os.fsync(f.fileno())
+
+def _compact(path):
+    write_bundle(path, read_journaled_bundle(path))
+    os.remove(journal_path(path))
+
+class AutoSaver:
+
+    def __init__(self, path, compact_after=COMPACT_AFTER):
+        self.path = path
+        self.compact_after = compact_after
+        self._dirty = {}
+        self._deleted = {}
+        self._saved_ids = weakref.WeakKeyDictionary()
+        self._journal_entries = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='autosave')
+
+    @property
+    def dirty(self):
+        return bool(self._dirty or self._deleted)
+
+    def mark(self, kind, obj):
+        # Repeated edits of the same object before a flush coalesce into one journal entry
+        self._dirty[obj] = kind
+
+    def mark_deleted(self, kind, obj):
+        self._dirty.pop(obj, None)
+        saved_id = self._saved_ids.pop(obj, None)
+        if saved_id is not None:
+            self._deleted[(kind, saved_id)] = None
+
+    def reset(self, path, students=(), instructors=(), courses=()):
+        # Called after a full load (from read_journaled_bundle) of the objects
+        self.flush(wait=True)
+        self.path = path
+        self._dirty.clear()
+        self._deleted.clear()
+        self._saved_ids.clear()
+        for kind, objects in zip(KINDS, (students, instructors, courses)):
+            for obj in objects:
+                self._saved_ids[obj] = obj.to_json()[ID_FIELDS[kind]]
+        self._journal_entries = 0
+
+    def rewrite(self, path, bundle, students=(), instructors=(), courses=()):
+        # Replaces what is saved at path with bundle, the records of the objects. The old
+        # session's writes finish first and its journal is dropped before the bundle is
+        # written, all on the writer thread, so no flush or compaction of the old session
+        # can land in the new bundle or run alongside the write.
+        self.flush(wait=True)
+        self._executor.submit(self._replace, path, bundle).result()
+        self.reset(path, students, instructors, courses)
+
+    def flush(self, wait=False):
+        if not self.dirty:
+            return None
+        # Records are taken on the calling (GUI) thread; only the file work is moved off it
+        # Deletes go first so an ID freed by one object and taken by another ends up with the latter
+        deletes = [{'op': 'delete', 'kind': kind, 'id': record_id} for kind, record_id in self._deleted]
+        puts = []
+        for obj, kind in self._dirty.items():
+            record = obj.to_json()
+            record_id = record[ID_FIELDS[kind]]
+            saved_id = self._saved_ids.get(obj)
+            if saved_id is not None and saved_id != record_id:
+                deletes.append({'op': 'delete', 'kind': kind, 'id': saved_id})
+            puts.append({'op': 'put', 'kind': kind, 'id': record_id, 'record': record})
+            self._saved_ids[obj] = record_id
+        entries = deletes + puts
+        self._dirty.clear()
+        self._deleted.clear()
+        instrumentation.increment('autosave.entries', len(entries))
+
+        self._journal_entries += len(entries)
+        compact = self._journal_entries >= self.compact_after
+        if compact:
+            self._journal_entries = 0
+        future = self._executor.submit(self._write, self.path, entries, compact)
+        if wait:
+            future.result()
+        return future
+
+    def close(self):
+        self.flush(wait=True)
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _write(path, entries, compact):
+        with instrumentation.timer('autosave.flush'):
+            _append_entries(path, entries)
+            if compact:
+                _compact(path)
+
+    @staticmethod
+    def _replace(path, bundle):
+        try:
+            os.remove(journal_path(path))
+        except FileNotFoundError:
+            pass
+        write_bundle(path, bundle)
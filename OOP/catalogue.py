@@ -0,0 +1,100 @@
+from . import instrumentation
+from .course import Course
+from .storage import file_signature
+from bisect import bisect_left, insort
+
+class CourseCatalogue:
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.course_ids = []
+        self.course_names = {}
+        self._keys = []
+        self._signature = None
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self.refresh()
+        self._subscribers.append(callback)
+        callback(self)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _file_signature(self):
+        return file_signature(self.filename)
+
+    def refresh(self, force=False):
+        signature = self._file_signature()
+        if not force and self._signature is not None and signature == self._signature:
+            instrumentation.increment('catalogue.hit')
+            return False
+        instrumentation.increment('catalogue.miss')
+        self.load(Course._load_json(self.filename), signature)
+        return True
+
+    def load(self, data, signature):
+        # Fills the catalogue from already parsed records, e.g. from the startup loader
+        self.course_ids = [course_data['course_id'] for course_data in data]
+        self.course_names = {course_data['course_id']: course_data['course_name'] for course_data in data}
+
+        # Sorted (key, course_id) pairs so type-ahead is a bisect plus a short walk
+        keys = []
+        for course_id, course_name in self.course_names.items():
+            keys.append((course_id.lower(), course_id))
+            keys.append((course_name.lower(), course_id))
+        keys.sort()
+        self._keys = keys
+        self._signature = signature
+
+        for callback in list(self._subscribers):
+            callback(self)
+
+    def apply_changes(self, added, changed, removed):
+        if self._signature is None:
+            return self.refresh(force=True)
+        for course_id in removed:
+            if course_id in self.course_names:
+                self._discard_keys(course_id)
+                del self.course_names[course_id]
+                self.course_ids.remove(course_id)
+        for course_id, course_data in list(changed.items()) + list(added.items()):
+            if course_id in self.course_names:
+                self._discard_keys(course_id)
+            else:
+                self.course_ids.append(course_id)
+            self.course_names[course_id] = course_data['course_name']
+            insort(self._keys, (course_id.lower(), course_id))
+            insort(self._keys, (course_data['course_name'].lower(), course_id))
+        self._signature = self._file_signature()
+
+        for callback in list(self._subscribers):
+            callback(self)
+        return True
+
+    def _discard_keys(self, course_id):
+        for key in ((course_id.lower(), course_id), (self.course_names[course_id].lower(), course_id)):
+            index = bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+
+    def filter(self, text, limit=None):
+        self.refresh()
+        prefix = text.strip().lower()
+        if not prefix:
+            return self.course_ids[:limit] if limit is not None else list(self.course_ids)
+
+        matches = []
+        seen = set()
+        index = bisect_left(self._keys, (prefix, ''))
+        while index < len(self._keys) and self._keys[index][0].startswith(prefix):
+            course_id = self._keys[index][1]
+            if course_id not in seen:
+                seen.add(course_id)
+                matches.append(course_id)
+                if limit is not None and len(matches) >= limit:
+                    break
+            index += 1
+        return matches
@@ -1,10 +1,15 @@
-import json
+from . import instrumentation
+from .formats import course_record, normalize_course
+from .storage import append_record, find_record, load_records, replace_record, write_json
 import re
 
 class Course:
 
-    def __init__(self, course_id, course_name, instructor, enrolled_students=None):
+    def __init__(self, course_id, course_name, instructor, enrolled_students=None, capacity=None, waitlist=None,
+                 meeting_times=None):
         from .instructor import Instructor
+        from .schedule import meeting_intervals
+        instrumentation.increment('objects.Course')
         if not isinstance(course_id, str):
             raise TypeError("Course ID must be a string")
         if not course_id.strip():
@@ -21,11 +26,27 @@ class Course:
             enrolled_students = []
         elif not isinstance(enrolled_students, list):
             raise TypeError("Enrolled students must be a list")
+        if capacity is not None and (type(capacity) is not int or capacity < 0):
+            raise ValueError("Capacity must be a non-negative integer")
+        if waitlist is None:
+            waitlist = []
+        elif not isinstance(waitlist, list):
+            raise TypeError("Waitlist must be a list")
+        if meeting_times is None:
+            meeting_times = []
+        elif not isinstance(meeting_times, list):
+            raise TypeError("Meeting times must be a list")
+        # Raises ValueError for a malformed meeting; see schedule.py for the layout
+        meeting_intervals(meeting_times)
 
         self.course_id = course_id
         self.course_name = course_name
         self.instructor = instructor
         self.enrolled_students = enrolled_students
+        # Students beyond the capacity wait here in arrival order; see seats.py for batches
+        self.capacity = capacity
+        self.waitlist = waitlist
+        self.meeting_times = meeting_times
 
     def add_student(self, student):
         from .student import Student
@@ -33,27 +54,66 @@ class Course:
             raise TypeError("The student parameter must be an instance of Student")
         self.enrolled_students.append(student.student_id)
 
+    def is_full(self):
+        return self.capacity is not None and len(self.enrolled_students) >= self.capacity
+
+    def join_waitlist(self, student_id):
+        if student_id in self.waitlist:
+            raise ValueError("This student is already on the waitlist")
+        self.waitlist.append(student_id)
+        return len(self.waitlist)
+
+    def remove_student(self, student_id, admits=None):
+        # Frees the student's seat or waitlist place; returns whoever was promoted into a freed
+        # seat. Promotion goes through the seat engine: waitlisted students admits(student_id)
+        # turns down (Student.drop_course turns down timetable clashes) keep their place.
+        from .seats import CourseSeats
+        seats = CourseSeats(self.to_json())
+        if not seats.leave(student_id):
+            if student_id not in seats.enrolled:
+                raise ValueError("This student is not registered in the course")
+            del seats.enrolled[student_id]
+        promoted = seats.promote(admits)
+        self.enrolled_students = list(seats.enrolled)
+        self.waitlist = seats.waitlist()
+        return promoted[0] if promoted else None
+
     def to_json(self):
-        return {
-            'course_id': self.course_id,
-            'course_name': self.course_name,
-            'instructor': self.instructor.to_json() if self.instructor is not None else None,
-            'enrolled_students': self.enrolled_students
-        }
+        instructor = self.instructor.to_json() if self.instructor is not None else None
+        return course_record(self.course_id, self.course_name, instructor, self.enrolled_students, self.capacity, self.waitlist,
+                             self.meeting_times)
+
+    @classmethod
+    def from_json(cls, data):
+        from .instructor import Instructor
+        data = normalize_course(data)
+        instructor_data = data.get('instructor')
+        instructor = Instructor.from_json(instructor_data) if instructor_data else None
+        return cls(
+            course_id=data['course_id'],
+            course_name=data['course_name'],
+            instructor=instructor,
+            enrolled_students=data.get('enrolled_students', []),
+            capacity=data.get('capacity'),
+            waitlist=data.get('waitlist', []),
+            meeting_times=data.get('meeting_times', [])
+        )
+
+    @classmethod
+    def query(cls, filename='Data/courses.json'):
+        from .query import Query
+        return Query(cls, filename, 'course_id')
 
     def save_to_file(self, filename):
         if not self.is_unique_id(filename, self.course_id):
             raise ValueError("Course ID already exists!")
         if not self.is_unique_name(filename, self.course_name):
             raise ValueError("Course name already exists!") 
-        data = self._load_json(filename)
-        data.append(self.to_json())
-        self._write_json(filename, data)
+        append_record(filename, 'course_id', self.to_json())
 
     @classmethod
     def is_unique_id(cls, filename, course_id):
-        existing_ids = cls.load_existing_ids(filename)
-        return course_id not in existing_ids
+        return find_record(filename, 'course_id', course_id) is None
 
     @classmethod
     def load_existing_ids(cls, filename):
@@ -62,25 +122,9 @@ class Course:
 
     @classmethod
     def load_course_by_id(cls, filename, course_id):
-        from .instructor import Instructor
-        data = cls._load_json(filename)
-        for course_data in data:
-            if course_data['course_id'] == course_id:
-                instructor_data = course_data.get('instructor')
-                instructor = Instructor(
-                    name=instructor_data['name'],
-                    age=instructor_data['age'],
-                    email=instructor_data['email'],
-                    instructor_id=instructor_data['instructor_id'],
-                    assigned_courses=instructor_data['assigned_courses']
-                ) if instructor_data else None
-
-                return cls(
-                    course_id=course_data['course_id'],
-                    course_name=course_data['course_name'],
-                    instructor=instructor,
-                    enrolled_students=course_data.get('enrolled_students', [])
-                )
+        course_data = find_record(filename, 'course_id', course_id)
+        if course_data is not None:
+            return cls.from_json(course_data)
         return None
 
     @classmethod
@@ -99,55 +143,33 @@ class Course:
         return {course['course_name'] for course in data}
 
     def update(self, filename):
-        data = self._load_json(filename)
-        for i, course_data in enumerate(data):
-            if course_data['course_id'] == self.course_id:
-                data[i] = self.to_json()
-                break
-        else:
+        if not replace_record(filename, 'course_id', self.to_json()):
             raise ValueError("Course ID not found!")
-        self._write_json(filename, data)
 
     @classmethod
     def load_all_courses_fully(cls, filename):
-        from .instructor import Instructor
         data = cls._load_json(filename)
-        courses = []
-        for course_data in data:
-            instructor_data = course_data.get('instructor')
-            instructor = Instructor(
-                name=instructor_data['name'],
-                age=instructor_data['age'],
-                email=instructor_data['email'],
-                instructor_id=instructor_data['instructor_id'],
-                assigned_courses=instructor_data['assigned_courses']
-            ) if instructor_data else None
-
-            courses.append(cls(
-                course_id=course_data['course_id'],
-                course_name=course_data['course_name'],
-                instructor=instructor,
-                enrolled_students=course_data.get('enrolled_students', [])
-            ))
-        return courses
+        return [cls.from_json(course_data) for course_data in data]
 
     def delete_from_file(self, filename):
-        courses = self.load_all_courses_fully(filename)
-        courses = [course for course in courses if course.course_id != self.course_id]
-        self._write_json(filename, [course.to_json() for course in courses])
+        self.delete_many(filename, [self.course_id])
+
+    @classmethod
+    def delete_many(cls, filename, course_ids):
+        from .references import index_near
+        return index_near(filename, 'courses').delete_courses(course_ids)
+
+    def rename(self, filename, new_course_id):
+        from .references import index_near
+        if not isinstance(new_course_id, str) or not re.match(r"^[a-zA-Z0-9]+$", new_course_id):
+            raise ValueError("Course ID must contain only alphanumeric characters")
+        index_near(filename, 'courses').rename_course(self.course_id, new_course_id)
+        self.course_id = new_course_id
 
     @staticmethod
     def _load_json(filename):
-        try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-                if not isinstance(data, list):
-                    return []
-                return data
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        return load_records(filename)
 
     @staticmethod
     def _write_json(filename, data):
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=4)
+        write_json(filename, data)
@@ -0,0 +1,143 @@
+from . import instrumentation
+from .storage import load_records
+from itertools import islice
+import csv
+import gzip
+import io
+import json
+import threading
+
+CHUNK_SIZE = 1000
+BUFFER_SIZE = 1 << 20
+
+def field(name):
+    # Getter for a storage record; lists are flattened into one cell
+    def get(record):
+        value = record.get(name)
+        if isinstance(value, list):
+            return ', '.join(str(item) for item in value)
+        return value
+    return get
+
+def json_field(name):
+    # Getter for a nested value, written as JSON so the importer can read it back
+    def get(record):
+        value = record.get(name)
+        return json.dumps(value, separators=(',', ':')) if value else None
+    return get
+
+def instructor_field(name):
+    def get(record):
+        instructor = record.get('instructor')
+        return instructor.get(name) if instructor else None
+    return get
+
+COLUMNS = {
+    'students': {
+        'student_id': field('student_id'),
+        'name': field('name'),
+        'age': field('age'),
+        'email': field('email'),
+        'registered_courses': field('registered_courses')
+    },
+    'instructors': {
+        'instructor_id': field('instructor_id'),
+        'name': field('name'),
+        'age': field('age'),
+        'email': field('email'),
+        'assigned_courses': field('assigned_courses')
+    },
+    'courses': {
+        'course_id': field('course_id'),
+        'course_name': field('course_name'),
+        'instructor_id': instructor_field('instructor_id'),
+        'instructor_name': instructor_field('name'),
+        'enrolled_students': field('enrolled_students'),
+        'capacity': field('capacity'),
+        'meeting_times': json_field('meeting_times')
+    }
+}
+
+def columns_for(kind, selected=None):
+    available = COLUMNS[kind]
+    if selected is None:
+        selected = list(available)
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown {kind} columns: {', '.join(unknown)}")
+    return [(name, available[name]) for name in selected]
+
+class ExportJob:
+
+    def __init__(self, path, columns, source=None, records=None):
+        if (source is None) == (records is None):
+            raise ValueError("An export job needs either a source file or records")
+        self.path = path
+        self.columns = columns
+        self.source = source
+        self.records = records
+
+def _open_output(path):
+    # A .gz suffix compresses on the fly; either way writes go through a large buffer
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'wb'), newline='')
+    return open(path, 'w', newline='', buffering=BUFFER_SIZE)
+
+def export_many(jobs, progress=None, cancel=None, chunk_size=CHUNK_SIZE):
+    # Jobs reading the same source file share one load and one pass over its records
+    groups = {}
+    for job in jobs:
+        key = job.source if job.source is not None else id(job)
+        groups.setdefault(key, []).append(job)
+
+    sources = []
+    for group in groups.values():
+        first = group[0]
+        records = load_records(first.source) if first.source is not None else first.records
+        sources.append((records, group))
+    total = sum(len(records) for records, _ in sources if hasattr(records, '__len__')) or None
+
+    done = 0
+    with instrumentation.timer('export.csv'):
+        for records, group in sources:
+            outputs = [_open_output(job.path) for job in group]
+            try:
+                writers = [csv.writer(output) for output in outputs]
+                for job, writer in zip(group, writers):
+                    writer.writerow([name for name, _ in job.columns])
+                records = iter(records)
+                while True:
+                    chunk = list(islice(records, chunk_size))
+                    if not chunk:
+                        break
+                    for job, writer in zip(group, writers):
+                        getters = [get for _, get in job.columns]
+                        writer.writerows([get(record) for get in getters] for record in chunk)
+                    done += len(chunk)
+                    if progress is not None:
+                        progress(done, total)
+                    if cancel is not None and cancel.is_set():
+                        return done
+            finally:
+                for output in outputs:
+                    output.close()
+    return done
+
+def start_export(jobs, progress=None, finished=None, chunk_size=CHUNK_SIZE):
+    # Runs export_many on a worker thread; set the returned event to stop early.
+    # finished(rows, error) is called from the worker thread when it is done
+    cancel = threading.Event()
+
+    def run():
+        try:
+            rows = export_many(jobs, progress, cancel, chunk_size)
+        except (OSError, ValueError) as error:
+            if finished is not None:
+                finished(0, error)
+            return
+        if finished is not None:
+            finished(rows, None)
+
+    thread = threading.Thread(target=run, name='csv-export', daemon=True)
+    thread.start()
+    return thread, cancel
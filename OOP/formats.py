@@ -0,0 +1,150 @@
+from .storage import load_records, loads, write_json
+import os
+
+# The one record layout shared by the OOP package, the tkinter app and (through the
+# adapters in Classes.py) the PyQt5 app: string IDs, relations stored as ID lists and
+# the course's instructor embedded as an instructor record. The normalize_* functions
+# also accept the older layouts written by Classes.py (int IDs, nested objects) and
+# raw __dict__ dumps (id/iid/_email keys), so either on-disk format can be read.
+KINDS = ('students', 'instructors', 'courses')
+ID_FIELDS = {'students': 'student_id', 'instructors': 'instructor_id', 'courses': 'course_id'}
+
+def _id(value):
+    # Rejected rather than converted, so a model's "ID must be a string" check cannot be bypassed
+    if type(value) is not str:
+        raise TypeError(f"IDs must be strings, not {type(value).__name__} {value!r}")
+    return value
+
+def _legacy_id(value):
+    # The old Classes.py layout stored int IDs; they are read back as the strings they stand for
+    return str(value) if type(value) is int else _id(value)
+
+def _ids(values, id_field):
+    # Relations may be ID lists or lists of nested records
+    return [_legacy_id(value[id_field]) if isinstance(value, dict) else _legacy_id(value) for value in values or []]
+
+def _email(data):
+    return data['email'] if 'email' in data else data['_email']
+
+def _is_canonical(data, id_field, list_field):
+    values = data.get(list_field)
+    return (type(data.get(id_field)) is str and 'email' in data and type(values) is list
+            and (not values or type(values[0]) is str))
+
+def student_record(name, age, email, student_id, course_ids):
+    return {
+        'name': name,
+        'age': age,
+        'email': email,
+        'student_id': _id(student_id),
+        'registered_courses': [_id(course_id) for course_id in course_ids]
+    }
+
+def instructor_record(name, age, email, instructor_id, course_ids):
+    return {
+        'name': name,
+        'age': age,
+        'email': email,
+        'instructor_id': _id(instructor_id),
+        'assigned_courses': [_id(course_id) for course_id in course_ids]
+    }
+
+def course_record(course_id, course_name, instructor, student_ids, capacity=None, waitlist=None, meeting_times=None):
+    record = {
+        'course_id': _id(course_id),
+        'course_name': course_name,
+        'instructor': instructor,
+        'enrolled_students': [_id(student_id) for student_id in student_ids]
+    }
+    # Optional fields are only written when set, so courses without them keep the old layout
+    if capacity is not None:
+        record['capacity'] = capacity
+    if waitlist:
+        record['waitlist'] = [_id(student_id) for student_id in waitlist]
+    if meeting_times:
+        record['meeting_times'] = meeting_times
+    return record
+
+def normalize_student(data):
+    if _is_canonical(data, 'student_id', 'registered_courses'):
+        return data
+    student_id = data['student_id'] if 'student_id' in data else data['id']
+    return student_record(data['name'], data['age'], _email(data), _legacy_id(student_id),
+                          _ids(data.get('registered_courses'), 'course_id'))
+
+def normalize_instructor(data):
+    if _is_canonical(data, 'instructor_id', 'assigned_courses'):
+        return data
+    instructor_id = data['instructor_id'] if 'instructor_id' in data else data['iid']
+    return instructor_record(data['name'], data['age'], _email(data), _legacy_id(instructor_id),
+                             _ids(data.get('assigned_courses'), 'course_id'))
+
+def normalize_course(data):
+    instructor = data.get('instructor')
+    if isinstance(instructor, dict):
+        instructor = normalize_instructor(instructor)
+    elif not instructor:
+        # Classes.py used "" for a course without an instructor
+        instructor = None
+    if type(data['course_id']) is str and instructor is data.get('instructor'):
+        students = data.get('enrolled_students')
+        if type(students) is list and (not students or type(students[0]) is str):
+            return data
+    return course_record(_legacy_id(data['course_id']), data['course_name'], instructor,
+                         _ids(data.get('enrolled_students'), 'student_id'), data.get('capacity'),
+                         _ids(data.get('waitlist'), 'student_id'), data.get('meeting_times'))
+
+NORMALIZERS = {
+    'students': normalize_student,
+    'instructors': normalize_instructor,
+    'courses': normalize_course
+}
+
+def normalize(kind, records):
+    normalizer = NORMALIZERS[kind]
+    return [normalizer(record) for record in records]
+
+BUNDLE_VERSION = 2
+
+def write_bundle(filename, bundle):
+    # Each entity is stored once under its ID; a course refers to its instructor by
+    # instructor_id instead of embedding a copy
+    data = {'version': BUNDLE_VERSION}
+    for kind, id_field in zip(KINDS, ('student_id', 'instructor_id', 'course_id')):
+        data[kind] = {record[id_field]: record for record in bundle[kind]}
+    for course_id, course in data['courses'].items():
+        course = dict(course)
+        instructor = course.pop('instructor')
+        course['instructor_id'] = instructor['instructor_id'] if instructor else None
+        data['courses'][course_id] = course
+    write_json(filename, data)
+
+def read_bundle(path):
+    # Accepts a Data directory (students.json, instructors.json, courses.json, sharded or not)
+    # or a single JSON bundle with one list or one {id: record} mapping per kind
+    if os.path.isdir(path):
+        return {kind: normalize(kind, load_records(os.path.join(path, kind + '.json'))) for kind in KINDS}
+    with open(path, 'rb') as f:
+        data = loads(f.read())
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} is not a students/instructors/courses bundle")
+    bundle = {}
+    for kind in KINDS:
+        records = data.get(kind, [])
+        if isinstance(records, dict):
+            records = list(records.values())
+        bundle[kind] = records
+    bundle['instructors'] = normalize('instructors', bundle['instructors'])
+
+    # Courses written by write_bundle refer to their instructor by ID
+    instructors = {record['instructor_id']: record for record in bundle['instructors']}
+    courses = []
+    for course in bundle['courses']:
+        if 'instructor' not in course and 'instructor_id' in course:
+            instructor_id = course['instructor_id']
+            course = {key: value for key, value in course.items() if key != 'instructor_id'}
+            course['instructor'] = instructors.get(_legacy_id(instructor_id)) if instructor_id is not None else None
+        courses.append(course)
+    bundle['courses'] = normalize('courses', courses)
+    bundle['students'] = normalize('students', bundle['students'])
+    return bundle
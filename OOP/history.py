@@ -0,0 +1,251 @@
+from . import instrumentation
+from .formats import ID_FIELDS
+from .storage import add_change_listener, append_records, apply_changes, dumps, remove_change_listener
+from contextlib import contextmanager
+import json
+import sys
+import time
+
+# Commands kept for undo; older ones only remain in the audit log
+UNDO_LIMIT = 100
+
+class StorageCommand:
+    # Changes made to the data files, kept as {filename: (id_field, {record_id: [before, after]})}.
+    # Only the touched records are held; everything else stays shared with the live files, so
+    # undo and redo write O(changes) records however large the files are.
+
+    def __init__(self, description):
+        self.description = description
+        self.files = {}
+
+    @property
+    def empty(self):
+        return not self.files
+
+    def record(self, filename, id_field, changes):
+        records = self.files.setdefault(filename, (id_field, {}))[1]
+        for record_id, before, after in changes:
+            if record_id in records:
+                # A record written twice by one command keeps its state from before the first write
+                records[record_id][1] = after
+            else:
+                records[record_id] = [before, after]
+
+    def changes(self):
+        return [(filename, record_id, before, after)
+                for filename, (_, records) in self.files.items()
+                for record_id, (before, after) in records.items()]
+
+    def undo(self):
+        self._restore(0)
+
+    def redo(self):
+        self._restore(1)
+
+    def _restore(self, side):
+        for filename, (id_field, records) in self.files.items():
+            updated = []
+            added = []
+            deleted = []
+            for record_id, states in records.items():
+                target, present = states[side], states[1 - side] is not None
+                if target is None:
+                    if present:
+                        deleted.append(record_id)
+                elif present:
+                    updated.append(target)
+                else:
+                    added.append(target)
+            apply_changes(filename, id_field, updated=updated, deleted=deleted)
+            append_records(filename, id_field, added)
+
+def _state(obj):
+    # Each object's own lists are copied; the objects inside them are shared
+    return {name: list(value) if isinstance(value, list) else value for name, value in vars(obj).items()}
+
+class ObjectCommand:
+    # Changes made to in-memory objects (GUI_pyqt5.py): attribute snapshots of the edited
+    # objects and the list and position of the removed ones. listener(kind, obj, present)
+    # is called for every object undo or redo puts back or takes away.
+
+    def __init__(self, description, listener=None):
+        self.description = description
+        self.listener = listener
+        self._edits = {}
+        self._removals = []
+
+    @property
+    def empty(self):
+        return not self._edits and not self._removals
+
+    def capture(self, kind, obj):
+        # Call before changing obj; later captures of the same object are ignored
+        if id(obj) not in self._edits:
+            self._edits[id(obj)] = [kind, obj, _state(obj), obj.to_json(), None, None]
+
+    def removed(self, kind, container, index, obj):
+        self._removals.append((kind, container, index, obj, obj.to_json()))
+
+    def finish(self):
+        for key, edit in list(self._edits.items()):
+            edit[4] = _state(edit[1])
+            edit[5] = edit[1].to_json()
+            if edit[5] == edit[3]:
+                del self._edits[key]
+        return self
+
+    def changes(self):
+        changes = []
+        for kind, _, _, before, _, after in self._edits.values():
+            old_id, new_id = before[ID_FIELDS[kind]], after[ID_FIELDS[kind]]
+            if old_id == new_id:
+                changes.append((kind, old_id, before, after))
+            else:
+                # An edited ID is logged as a removal and an addition
+                changes += [(kind, old_id, before, None), (kind, new_id, None, after)]
+        changes += [(kind, record[ID_FIELDS[kind]], record, None) for kind, _, _, _, record in self._removals]
+        return changes
+
+    def undo(self):
+        for kind, obj, before, _, _, _ in self._edits.values():
+            obj.__dict__.update(before)
+            self._notify(kind, obj, True)
+        for kind, container, index, obj, _ in reversed(self._removals):
+            container.insert(index, obj)
+            self._notify(kind, obj, True)
+
+    def redo(self):
+        for kind, container, index, obj, _ in self._removals:
+            container.remove(obj)
+            self._notify(kind, obj, False)
+        for kind, obj, _, _, after, _ in self._edits.values():
+            obj.__dict__.update(after)
+            self._notify(kind, obj, True)
+
+    def _notify(self, kind, obj, present):
+        if self.listener is not None:
+            self.listener(kind, obj, present)
+
+class CommandLog:
+
+    def __init__(self, audit_path=None, limit=UNDO_LIMIT):
+        self.audit_path = audit_path
+        self.limit = limit
+        self._undo = []
+        self._redo = []
+        self._active = None
+        self._restoring = False
+        add_change_listener(self._on_change)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    @contextmanager
+    def command(self, description):
+        # Data file writes made inside the block become one command; nested blocks join the outer one
+        if self._active is not None:
+            yield self._active
+            return
+        self._active = StorageCommand(description)
+        try:
+            yield self._active
+        finally:
+            # Kept even if the block failed half-way, so whatever it did write can be undone
+            command, self._active = self._active, None
+            self.push(command)
+
+    def push(self, command):
+        if command.empty:
+            return
+        self._undo.append(command)
+        del self._undo[:-self.limit]
+        self._redo.clear()
+        self._audit('do', command)
+
+    def undo(self):
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        with instrumentation.timer('history.undo'):
+            self._restore(command.undo)
+        self._redo.append(command)
+        self._audit('undo', command)
+        return command
+
+    def redo(self):
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        with instrumentation.timer('history.redo'):
+            self._restore(command.redo)
+        self._undo.append(command)
+        self._audit('redo', command)
+        return command
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def close(self):
+        remove_change_listener(self._on_change)
+
+    def _restore(self, function):
+        self._restoring = True
+        try:
+            function()
+        finally:
+            self._restoring = False
+
+    def _on_change(self, filename, id_field, changes):
+        if self._active is not None and not self._restoring:
+            self._active.record(filename, id_field, changes)
+
+    def _audit(self, action, command):
+        if self.audit_path is None:
+            return
+        entry = {
+            'time': time.time(),
+            'action': action,
+            'description': command.description,
+            'changes': [{'target': target, 'id': record_id, 'before': before, 'after': after}
+                        for target, record_id, before, after in command.changes()]
+        }
+        with open(self.audit_path, 'ab') as f:
+            f.write(dumps(entry) + b'\n')
+
+def read_audit(path):
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A line torn by a crash mid-append
+                continue
+
+def replay(path, state=None, until=None):
+    # Folds the audit log into {target: {record_id: record}}, starting from state (the records
+    # as they were when the log was started) and stopping after `until` entries if given
+    state = {} if state is None else state
+    for count, entry in enumerate(read_audit(path)):
+        if until is not None and count >= until:
+            break
+        side = 'before' if entry['action'] == 'undo' else 'after'
+        for change in entry['changes']:
+            records = state.setdefault(change['target'], {})
+            if change[side] is None:
+                records.pop(change['id'], None)
+            else:
+                records[change['id']] = change[side]
+    return state
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m OOP.history AUDIT_FILE")
+    for entry in read_audit(sys.argv[1]):
+        print(time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['time'])), entry['action'],
+              entry['description'], f"({len(entry['changes'])} records)")
@@ -0,0 +1,229 @@
+from . import instrumentation
+from .storage import append_records, load_records, replace_records
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import csv
+import gzip
+import json
+import os
+import sys
+
+CHUNK_SIZE = 1000
+# Files smaller than this are validated in-process; starting workers costs more than it saves
+POOL_THRESHOLD_BYTES = 1 << 20
+
+KINDS = {
+    'students': ('student_id', 'Data/students.json'),
+    'instructors': ('instructor_id', 'Data/instructors.json'),
+    'courses': ('course_id', 'Data/courses.json')
+}
+LIST_FIELDS = {'registered_courses', 'assigned_courses', 'enrolled_students'}
+
+def _model(kind):
+    if kind == 'students':
+        from .student import Student
+        return Student
+    if kind == 'instructors':
+        from .instructor import Instructor
+        return Instructor
+    from .course import Course
+    return Course
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', newline='')
+    return open(path, 'r', newline='')
+
+def read_rows(path):
+    # Yields (line number, row) pairs from a CSV or JSON-lines file, optionally gzipped
+    jsonl = path.endswith('.jsonl') or path.endswith('.jsonl.gz')
+    with _open_text(path) as f:
+        if jsonl:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as error:
+                    yield line_number, {'_error': f"Invalid JSON: {error.msg}", '_raw': line.rstrip('\n')}
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+
+def _coerce(row):
+    # CSV gives every value as a string; list columns are comma separated, meeting_times is
+    # JSON (as written by export.py) and an empty capacity means no limit
+    record = {}
+    for key, value in row.items():
+        if key in LIST_FIELDS and isinstance(value, str):
+            value = [item.strip() for item in value.split(',') if item.strip()]
+        elif key in ('age', 'capacity') and isinstance(value, str):
+            if key == 'capacity' and not value.strip():
+                value = None
+            elif value.strip().lstrip('-').isdigit():
+                value = int(value)
+        elif key == 'meeting_times' and isinstance(value, str):
+            try:
+                value = json.loads(value) if value.strip() else []
+            except json.JSONDecodeError as error:
+                raise ValueError(f"meeting_times is not valid JSON: {error.msg}")
+        elif key == 'instructor' and value == '':
+            value = None
+        record[key] = value
+    return record
+
+def _check_ids(record, id_field):
+    # Imported rows never use the old int-ID layout, so IDs are not converted on the way in
+    ids = [record.get(id_field, '')] + [value for field in LIST_FIELDS for value in record.get(field) or ()]
+    for value in ids:
+        if type(value) is not str:
+            raise TypeError(f"IDs must be strings, not {type(value).__name__} {value!r}")
+
+def validate_chunk(kind, rows):
+    # Runs in the worker processes: builds each model so its own checks apply
+    model = _model(kind)
+    results = []
+    for line_number, row in rows:
+        if '_error' in row:
+            results.append((line_number, None, row['_error']))
+            continue
+        try:
+            record = _coerce(row)
+            _check_ids(record, KINDS[kind][0])
+            # A course's instructor_id column is resolved against the instructors file by the importer
+            instructor_id = (record.pop('instructor_id', None) or None) if kind == 'courses' else None
+            results.append((line_number, (model.from_json(record).to_json(), instructor_id), None))
+        except (KeyError, TypeError, ValueError) as error:
+            message = f"Missing field {error}" if isinstance(error, KeyError) else str(error)
+            results.append((line_number, None, message))
+    return results
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _validated(kind, rows, workers):
+    if workers == 0:
+        for chunk in _chunks(rows, CHUNK_SIZE):
+            yield chunk, validate_chunk(kind, chunk)
+        return
+    # Keep only a few chunks in flight so huge files are never held in memory at once
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in _chunks(rows, CHUNK_SIZE):
+            pending.append((chunk, pool.submit(validate_chunk, kind, chunk)))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.pop(0)
+                yield chunk, future.result()
+        for chunk, future in pending:
+            yield chunk, future.result()
+
+class ImportResult:
+
+    def __init__(self, imported, rejected, reject_path):
+        self.imported = imported
+        self.rejected = rejected
+        self.reject_path = reject_path
+
+    def __repr__(self):
+        return f"ImportResult(imported={self.imported}, rejected={self.rejected}, reject_path={self.reject_path!r})"
+
+def import_file(kind, path, filename=None, reject_path=None, workers=None, students_file='Data/students.json',
+                courses_file='Data/courses.json', instructors_file='Data/instructors.json'):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown import kind '{kind}'")
+    id_field, default_filename = KINDS[kind]
+    filename = filename or default_filename
+    reject_path = reject_path or path + '.rejects.csv'
+    if workers is None:
+        workers = 0 if os.path.getsize(path) < POOL_THRESHOLD_BYTES else (os.cpu_count() or 1)
+
+    # The uniqueness checks of save_to_file, done once against in-memory sets
+    existing = load_records(filename)
+    seen_ids = {record[id_field] for record in existing}
+    students = {}
+    instructors = {}
+    courses = {}
+    if kind == 'courses':
+        seen_names = {record['course_name'] for record in existing}
+        students = {record['student_id']: record for record in load_records(students_file)}
+        instructors = {record['instructor_id']: record for record in load_records(instructors_file)}
+    else:
+        seen_names = {record['email'] for record in existing}
+        other = instructors_file if kind == 'students' else students_file
+        seen_names |= {record['email'] for record in load_records(other)}
+        if kind == 'students':
+            courses = {record['course_id']: record for record in load_records(courses_file)}
+    name_field = 'course_name' if kind == 'courses' else 'email'
+
+    accepted = []
+    rejected = 0
+    # Existing records the accepted rows refer to, updated to refer back
+    linked_students = {}
+    linked_instructors = {}
+    linked_courses = {}
+    with instrumentation.timer('import.file'), open(reject_path, 'w', newline='') as reject_file:
+        rejects = csv.writer(reject_file)
+        rejects.writerow(['line', 'error', 'row'])
+        for chunk, results in _validated(kind, read_rows(path), workers):
+            rows = dict(chunk)
+            for line_number, valid, error in results:
+                if valid is not None:
+                    record, instructor_id = valid
+                    # A row listing the same ID twice would otherwise be added to the roster twice
+                    for field in LIST_FIELDS & record.keys():
+                        record[field] = list(dict.fromkeys(record[field]))
+                    if record[id_field] in seen_ids:
+                        error = f"{id_field} {record[id_field]} already exists"
+                    elif record[name_field] in seen_names:
+                        error = f"{name_field} {record[name_field]} already exists"
+                    elif instructor_id is not None and instructor_id not in instructors:
+                        error = f"Instructor {instructor_id} does not exist"
+                    elif kind == 'students' and any(course_id not in courses for course_id in record['registered_courses']):
+                        error = "Registered in a course that does not exist"
+                    elif kind == 'courses' and any(student_id not in students for student_id in record['enrolled_students']):
+                        error = "Enrolls a student that does not exist"
+                    elif kind == 'instructors' and record['assigned_courses']:
+                        error = "Assign instructors by importing courses with an instructor_id"
+                if error is not None:
+                    rejects.writerow([line_number, error, json.dumps(rows[line_number])])
+                    rejected += 1
+                    continue
+                if instructor_id is not None:
+                    # Keep the instructor record and its embedded copies in step with the new course
+                    instructors[instructor_id]['assigned_courses'].append(record['course_id'])
+                    linked_instructors[instructor_id] = instructors[instructor_id]
+                    record['instructor'] = instructors[instructor_id]
+                for student_id in record.get('enrolled_students', ()) if kind == 'courses' else ():
+                    students[student_id]['registered_courses'].append(record['course_id'])
+                    linked_students[student_id] = students[student_id]
+                for course_id in record.get('registered_courses', ()):
+                    courses[course_id]['enrolled_students'].append(record['student_id'])
+                    linked_courses[course_id] = courses[course_id]
+                seen_ids.add(record[id_field])
+                seen_names.add(record[name_field])
+                accepted.append(record)
+
+    if kind == 'courses':
+        # Courses already on file embed a copy of the instructors that were given new courses
+        for course in existing:
+            if course.get('instructor') and course['instructor']['instructor_id'] in linked_instructors:
+                course['instructor'] = linked_instructors[course['instructor']['instructor_id']]
+                linked_courses[course['course_id']] = course
+    append_records(filename, id_field, accepted)
+    replace_records(students_file, 'student_id', linked_students.values())
+    replace_records(instructors_file, 'instructor_id', linked_instructors.values())
+    replace_records(courses_file, 'course_id', linked_courses.values())
+    instrumentation.increment('import.accepted', len(accepted))
+    instrumentation.increment('import.rejected', rejected)
+    return ImportResult(len(accepted), rejected, reject_path)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in KINDS:
+        sys.exit(f"usage: python -m OOP.importer {{{','.join(KINDS)}}} FILE.csv|FILE.jsonl [DATA_FILE]")
+    print(import_file(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None))
@@ -1,5 +1,6 @@
+from .formats import instructor_record, normalize_instructor
 from .person import Person
-import json
+from .storage import append_record, find_record, load_records, replace_record, write_json
 import re
 
 class Instructor(Person):
@@ -22,39 +23,51 @@ class Instructor(Person):
 
     def assign_course(self, course):
         from .course import Course
+        from .reports import record_assignment
+        from .schedule import schedule_for
         if not isinstance(course, Course):
             raise TypeError("The course parameter must be an instance of Course")
         if course.instructor is None:
+            schedule_for().check(('instructor', self.instructor_id), self.assigned_courses, course.course_id, course.meeting_times)
             course.instructor = self
             self.assigned_courses.append(course.course_id)
             course.update('Data/courses.json')
             self.update('Data/instructors.json')
+            record_assignment('Data/instructors.json', 'Data/courses.json', self.instructor_id, course.course_id)
         elif course.instructor.instructor_id == self.instructor_id:
             raise ValueError('You are already assigned to this course')
         else:
             raise ValueError('The course already has an instructor assigned')
 
     def to_json(self):
-        return {
-            'name': self.name,
-            'age': self.age,
-            'email': self.get_email(),
-            'instructor_id': self.instructor_id,
-            'assigned_courses': self.assigned_courses
-        }
+        return instructor_record(self.name, self.age, self.get_email(), self.instructor_id, self.assigned_courses)
+
+    @classmethod
+    def from_json(cls, data):
+        data = normalize_instructor(data)
+        return cls(
+            name=data['name'],
+            age=data['age'],
+            email=data['email'],
+            instructor_id=data['instructor_id'],
+            assigned_courses=data.get('assigned_courses', [])
+        )
+
+    @classmethod
+    def query(cls, filename='Data/instructors.json'):
+        from .query import Query
+        return Query(cls, filename, 'instructor_id')
 
     def save_to_file(self, filename):
         if not self.is_unique_id(filename, self.instructor_id):
             raise ValueError("Instructor ID already exists!")
         if not self.is_unique_email(filename, self.get_email()):
             raise ValueError("Email address already exists!")
-        data = self._load_json(filename)
-        data.append(self.to_json())
-        self._write_json(filename, data)
+        append_record(filename, 'instructor_id', self.to_json())
 
     @classmethod
     def is_unique_id(cls, filename, instructor_id):
-        return instructor_id not in cls.load_existing_ids(filename)
+        return find_record(filename, 'instructor_id', instructor_id) is None
 
     @classmethod
     def load_existing_ids(cls, filename):
@@ -63,16 +76,9 @@ class Instructor(Person):
 
     @classmethod
     def load_instructor_by_id(cls, filename, instructor_id):
-        data = cls._load_json(filename)
-        for instructor_data in data:
-            if instructor_data['instructor_id'] == instructor_id:
-                return cls(
-                    name=instructor_data['name'],
-                    age=instructor_data['age'],
-                    email=instructor_data['email'],
-                    instructor_id=instructor_data['instructor_id'],
-                    assigned_courses=instructor_data.get('assigned_courses', [])
-                )
+        instructor_data = find_record(filename, 'instructor_id', instructor_id)
+        if instructor_data is not None:
+            return cls.from_json(instructor_data)
         return None
 
     @classmethod
@@ -88,45 +94,26 @@ class Instructor(Person):
         return {instructor['email'] for instructor in data}
 
     def update(self, filename):
-        data = self._load_json(filename)
-        for i, instructor_data in enumerate(data):
-            if instructor_data['instructor_id'] == self.instructor_id:
-                data[i] = self.to_json()
-                break
-        else:
+        if not replace_record(filename, 'instructor_id', self.to_json()):
             raise ValueError("Instructor ID not found!")
-        self._write_json(filename, data)
 
     @classmethod
     def load_all_instructors(cls, filename):
         data = cls._load_json(filename)
-        return [
-            cls(
-                name=instructor_data['name'],
-                age=instructor_data['age'],
-                email=instructor_data['email'],
-                instructor_id=instructor_data['instructor_id'],
-                assigned_courses=instructor_data.get('assigned_courses', [])
-            ) for instructor_data in data
-        ]
+        return [cls.from_json(instructor_data) for instructor_data in data]
 
     def delete_from_file(self, filename):
-        instructors = self.load_all_instructors(filename)
-        instructors = [instructor for instructor in instructors if instructor.instructor_id != self.instructor_id]
-        self._write_json(filename, [instructor.to_json() for instructor in instructors])
+        self.delete_many(filename, [self.instructor_id])
+
+    @classmethod
+    def delete_many(cls, filename, instructor_ids):
+        from .references import index_near
+        return index_near(filename, 'instructors').delete_instructors(instructor_ids)
 
     @staticmethod
     def _load_json(filename):
-        try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-                if not isinstance(data, list):
-                    return []
-                return data
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        return load_records(filename)
 
     @staticmethod
     def _write_json(filename, data):
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=4)
+        write_json(filename, data)
@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+from functools import wraps
+import cProfile
+import logging
+import os
+import threading
+import time
+
+# Opt-in: set SMS_INSTRUMENT=1 (and optionally SMS_PROFILE_DIR) or call enable()
+logger = logging.getLogger('sms.instrumentation')
+enabled = os.environ.get('SMS_INSTRUMENT') == '1'
+profile_dir = os.environ.get('SMS_PROFILE_DIR')
+
+_lock = threading.Lock()
+_counters = {}
+_timers = {}
+_log_timer = None
+
+def enable(profile_to=None):
+    global enabled, profile_dir
+    enabled = True
+    if profile_to is not None:
+        profile_dir = profile_to
+
+def disable():
+    global enabled
+    enabled = False
+    stop_periodic_log()
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timers.clear()
+
+def increment(name, amount=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def record_time(name, seconds):
+    with _lock:
+        timer = _timers.get(name)
+        if timer is None:
+            timer = _timers[name] = [0, 0.0, 0.0]
+        timer[0] += 1
+        timer[1] += seconds
+        timer[2] = max(timer[2], seconds)
+
+@contextmanager
+def timer(name):
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_time(name, time.perf_counter() - start)
+
+def timed(name):
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def action(name):
+    # Times a GUI action and, when a profile directory is set, dumps a cProfile per call
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            profiler = cProfile.Profile() if profile_dir else None
+            start = time.perf_counter()
+            try:
+                if profiler is not None:
+                    return profiler.runcall(function, *args, **kwargs)
+                return function(*args, **kwargs)
+            finally:
+                record_time(f"action.{name}", time.perf_counter() - start)
+                if profiler is not None:
+                    os.makedirs(profile_dir, exist_ok=True)
+                    profiler.dump_stats(os.path.join(profile_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns()}.prof"))
+        return wrapper
+    return decorator
+
+def stats():
+    with _lock:
+        counters = dict(_counters)
+        timers = {
+            name: {
+                'count': count,
+                'total_s': total,
+                'mean_ms': total * 1000 / count,
+                'max_ms': longest * 1000
+            } for name, (count, total, longest) in _timers.items()
+        }
+
+    hit_rates = {}
+    for name, hits in counters.items():
+        if name.endswith('.hit'):
+            cache = name[:-len('.hit')]
+            lookups = hits + counters.get(cache + '.miss', 0)
+            hit_rates[cache] = hits / lookups if lookups else 0.0
+    return {'counters': counters, 'timers': timers, 'hit_rates': hit_rates}
+
+def summary_line():
+    current = stats()
+    parts = [f"{name}={value}" for name, value in sorted(current['counters'].items())]
+    parts += [f"{name}:{timer['count']}x{timer['mean_ms']:.1f}ms" for name, timer in sorted(current['timers'].items())]
+    parts += [f"{name}.hit_rate={rate:.0%}" for name, rate in sorted(current['hit_rates'].items())]
+    return ' '.join(parts)
+
+def start_periodic_log(interval=60):
+    global _log_timer
+    if not enabled:
+        return None
+    stop_periodic_log()
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO)
+
+    def log_and_reschedule():
+        global _log_timer
+        logger.info(summary_line())
+        _log_timer = threading.Timer(interval, log_and_reschedule)
+        _log_timer.daemon = True
+        _log_timer.start()
+
+    _log_timer = threading.Timer(interval, log_and_reschedule)
+    _log_timer.daemon = True
+    _log_timer.start()
+    return _log_timer
+
+def stop_periodic_log():
+    global _log_timer
+    if _log_timer is not None:
+        _log_timer.cancel()
+        _log_timer = None
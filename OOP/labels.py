@@ -0,0 +1,60 @@
+from .storage import add_change_listener, file_signature, last_write
+import os
+import weakref
+
+class LabelCache:
+    # Joined display strings ("C1, C2, C3") memoized per key until forget() is called for it.
+    # With weak=True the keys are the displayed objects themselves and drop out with them.
+
+    def __init__(self, separator=', ', weak=False):
+        self.separator = separator
+        self._labels = weakref.WeakKeyDictionary() if weak else {}
+
+    def label(self, key, values):
+        # values is only joined on a miss, so a generator keeps hits free of any per-item work
+        label = self._labels.get(key)
+        if label is None:
+            label = self._labels[key] = self.separator.join(values)
+        return label
+
+    def forget(self, *keys):
+        for key in keys:
+            self._labels.pop(key, None)
+
+    def clear(self):
+        self._labels.clear()
+
+class RecordLabels(LabelCache):
+    # Labels of the records of one data file, keyed by record ID. Records written by this
+    # process are forgotten one by one; a write by anything else empties the cache.
+
+    def __init__(self, filename, separator=', '):
+        super().__init__(separator)
+        self.filename = filename
+        self._path = os.path.normpath(filename)
+        self._signature = file_signature(filename)
+        add_change_listener(self._on_change)
+
+    def validate(self):
+        signature = file_signature(self.filename)
+        if signature != self._signature:
+            self.clear()
+            self._signature = signature
+        return self
+
+    def _on_change(self, filename, id_field, changes):
+        if os.path.normpath(filename) != self._path:
+            return
+        self.forget(*(record_id for record_id, _, _ in changes))
+        write = last_write(filename)
+        if write is not None and write[0] == self._signature:
+            self._signature = write[1]
+
+_record_labels = {}
+
+def labels_for(filename):
+    # Call once per view build: the cache is checked against the file a single time
+    path = os.path.normpath(filename)
+    if path not in _record_labels:
+        _record_labels[path] = RecordLabels(filename)
+    return _record_labels[path].validate()
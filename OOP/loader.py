@@ -0,0 +1,146 @@
+from . import instrumentation
+from .formats import normalize_course, normalize_instructor, normalize_student
+from .storage import file_signature, load_records
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import gc
+import importlib
+import os
+
+CHUNK_SIZE = 5000
+# Files with fewer records than this are constructed in the calling process
+PROCESS_THRESHOLD = 20000
+
+DATA_FILES = {
+    'students': 'Data/students.json',
+    'instructors': 'Data/instructors.json',
+    'courses': 'Data/courses.json'
+}
+
+# The model classes per kind, as (module, class) so worker processes can import them. The
+# Classes models (GUI_pyqt5) link through object lists, the OOP models through IDs
+MODELS = {
+    'OOP': {'students': ('OOP.student', 'Student'), 'instructors': ('OOP.instructor', 'Instructor'),
+            'courses': ('OOP.course', 'Course')},
+    'Classes': {'students': ('Classes', 'Student'), 'instructors': ('Classes', 'Instructor'),
+                'courses': ('Classes', 'Course')}
+}
+
+def _model(models, kind):
+    module, name = MODELS[models][kind]
+    return getattr(importlib.import_module(module), name)
+
+def _read(filename):
+    # The signature is taken first so a write that lands during the read is noticed later
+    signature = file_signature(filename)
+    return load_records(filename), signature
+
+def read_files(filenames):
+    # Reads the files concurrently; returns {filename: (records, signature)}. The threads
+    # overlap the reads and whatever of the parsing releases the GIL (file I/O, decompression)
+    filenames = list(filenames)
+    with instrumentation.timer('loader.read'), ThreadPoolExecutor(max_workers=len(filenames) or 1) as pool:
+        return dict(zip(filenames, pool.map(_read, filenames)))
+
+def construct_chunk(models, kind, records):
+    # Records that do not validate are left out (None) rather than failing the whole load
+    model = _model(models, kind)
+    objects = []
+    for record in records:
+        try:
+            objects.append(model.from_json(record))
+        except (KeyError, TypeError, ValueError, AssertionError):
+            objects.append(None)
+    return objects
+
+def construct(models, kind, records, pool=None):
+    if pool is None or len(records) < PROCESS_THRESHOLD:
+        return construct_chunk(models, kind, records)
+    chunks = [records[start:start + CHUNK_SIZE] for start in range(0, len(records), CHUNK_SIZE)]
+    objects = []
+    for chunk in pool.map(construct_chunk, [models] * len(chunks), [kind] * len(chunks), chunks):
+        objects.extend(chunk)
+    return objects
+
+class Dataset:
+
+    def __init__(self, models, objects, records, signatures):
+        # objects are per kind and in file order, None for the records the models rejected;
+        # records stay as read, for callers that seed their own caches from them
+        self.models = models
+        self.records = records
+        self.rejected = {kind: objects[kind].count(None) for kind in objects}
+        # Keyed by the record IDs, which both model families name differently
+        self.students = self._by_id(records['students'], objects['students'], normalize_student, 'student_id')
+        self.instructors = self._by_id(records['instructors'], objects['instructors'], normalize_instructor,
+                                       'instructor_id')
+        self.courses = self._by_id(records['courses'], objects['courses'], normalize_course, 'course_id')
+        self.signatures = signatures
+        self.course_students = {}
+
+    @staticmethod
+    def _by_id(records, objects, normalize, id_field):
+        return {normalize(record)[id_field]: obj for record, obj in zip(records, objects) if obj is not None}
+
+    def link(self):
+        # One pass over the course records: courses share the loaded Instructor objects instead
+        # of their embedded copies, and rosters point at the loaded Student objects
+        object_links = self.models == 'Classes'
+        for record in self.records['courses']:
+            record = normalize_course(record)
+            course = self.courses.get(record['course_id'])
+            if course is None:
+                continue
+            if record['instructor'] is not None and record['instructor']['instructor_id'] in self.instructors:
+                course.instructor = self.instructors[record['instructor']['instructor_id']]
+            roster = [self.students[student_id] for student_id in record['enrolled_students']
+                      if student_id in self.students]
+            self.course_students[course.course_id] = roster
+            if object_links:
+                course.enrolled_students = roster
+
+        if object_links:
+            # The Classes models also hold their courses as objects
+            for record in self.records['students']:
+                record = normalize_student(record)
+                if record['student_id'] in self.students:
+                    self.students[record['student_id']].registered_courses = [
+                        self.courses[course_id] for course_id in record['registered_courses'] if course_id in self.courses]
+            for record in self.records['instructors']:
+                record = normalize_instructor(record)
+                if record['instructor_id'] in self.instructors:
+                    self.instructors[record['instructor_id']].assigned_courses = [
+                        self.courses[course_id] for course_id in record['assigned_courses'] if course_id in self.courses]
+        return self
+
+    def students_of(self, course_id):
+        return self.course_students.get(course_id, [])
+
+def load_dataset(students_file=DATA_FILES['students'], instructors_file=DATA_FILES['instructors'],
+                 courses_file=DATA_FILES['courses'], models='OOP', workers=None):
+    # Everything allocated here lives on, so cyclic collections during the load only walk an
+    # ever larger heap without freeing anything; they are paused until it is done
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_dataset(students_file, instructors_file, courses_file, models, workers or os.cpu_count() or 1)
+    finally:
+        if collecting:
+            gc.enable()
+
+def _load_dataset(students_file, instructors_file, courses_file, models, workers):
+    files = {'students': students_file, 'instructors': instructors_file, 'courses': courses_file}
+    loaded = read_files(files.values())
+    records = {kind: loaded[filename][0] for kind, filename in files.items()}
+    largest = max(len(kind_records) for kind_records in records.values())
+
+    with instrumentation.timer('loader.construct'):
+        if largest < PROCESS_THRESHOLD or workers < 2:
+            # Shipping objects back from a single worker only adds pickling on top of the same work
+            objects = {kind: construct(models, kind, kind_records) for kind, kind_records in records.items()}
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                objects = {kind: construct(models, kind, kind_records, pool) for kind, kind_records in records.items()}
+
+    signatures = {filename: signature for filename, (_, signature) in loaded.items()}
+    with instrumentation.timer('loader.link'):
+        return Dataset(models, objects, records, signatures).link()
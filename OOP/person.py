@@ -1,8 +1,10 @@
+from . import instrumentation
 import re
 
 class Person:
 
     def __init__(self, name, age, email):
+        instrumentation.increment(f"objects.{type(self).__name__}")
         if not isinstance(name, str):
             raise TypeError("Name must be a string")
         if not name.strip():
@@ -0,0 +1,136 @@
+from .storage import find_record, load_records
+import heapq
+
+def _compare(op, value, expected):
+    if op == 'exact':
+        return value == expected
+    if value is None:
+        return False
+    if op == 'gt':
+        return value > expected
+    if op == 'gte':
+        return value >= expected
+    if op == 'lt':
+        return value < expected
+    if op == 'lte':
+        return value <= expected
+    if op == 'in':
+        return value in expected
+    if op == 'contains':
+        return expected in value
+    if op == 'icontains':
+        return expected.lower() in value.lower()
+    if op == 'startswith':
+        return value.startswith(expected)
+    if op == 'istartswith':
+        return value.lower().startswith(expected.lower())
+    raise ValueError(f"Unknown lookup '{op}'")
+
+def _sort_key(value, descending=False):
+    # Missing and None values sort after every other value in either direction instead of
+    # failing to compare with them
+    return (value is None) != descending, value
+
+LOOKUPS = {'exact', 'gt', 'gte', 'lt', 'lte', 'in', 'contains', 'icontains', 'startswith', 'istartswith'}
+
+class Query:
+
+    def __init__(self, model, filename, id_field, conditions=(), ordering=(), window=(0, None)):
+        self.model = model
+        self.filename = filename
+        self.id_field = id_field
+        self._conditions = tuple(conditions)
+        self._ordering = tuple(ordering)
+        self._window = window
+
+    def _clone(self, **changes):
+        state = {
+            'conditions': self._conditions,
+            'ordering': self._ordering,
+            'window': self._window
+        }
+        state.update(changes)
+        return Query(self.model, self.filename, self.id_field, **state)
+
+    def where(self, **conditions):
+        parsed = []
+        for key, expected in conditions.items():
+            parts = key.split('__')
+            op = parts.pop() if len(parts) > 1 and parts[-1] in LOOKUPS else 'exact'
+            parsed.append((tuple(parts), op, expected))
+        return self._clone(conditions=self._conditions + tuple(parsed))
+
+    def order_by(self, *fields):
+        ordering = tuple((field.lstrip('-').split('__'), field.startswith('-')) for field in fields)
+        return self._clone(ordering=ordering)
+
+    def limit(self, count, offset=0):
+        return self._clone(window=(offset, count))
+
+    def page(self, number, size):
+        if number < 1 or size < 1:
+            raise ValueError("Page number and size must be positive")
+        return self.limit(size, (number - 1) * size).all()
+
+    @staticmethod
+    def _value(record, path):
+        for part in path:
+            if not isinstance(record, dict):
+                return None
+            record = record.get(part)
+        return record
+
+    def _matches(self, record):
+        return all(_compare(op, self._value(record, path), expected) for path, op, expected in self._conditions)
+
+    def _candidates(self):
+        # Conditions on the ID are answered through find_record (and its record file) when possible
+        for path, op, expected in self._conditions:
+            if path == (self.id_field,) and op == 'exact':
+                record = find_record(self.filename, self.id_field, expected)
+                return [record] if record is not None else []
+            if path == (self.id_field,) and op == 'in':
+                # Each ID is looked up once however often it is listed
+                record_ids = dict.fromkeys(expected)
+                return [record for record in (find_record(self.filename, self.id_field, record_id) for record_id in record_ids) if record is not None]
+        return load_records(self.filename)
+
+    def records(self):
+        matching = (record for record in self._candidates() if self._matches(record))
+        offset, count = self._window
+
+        if self._ordering:
+            descending = {desc for _, desc in self._ordering}
+            if len(descending) == 1 and count is not None:
+                # Only the first offset + count rows are needed, so keep a bounded heap
+                key = lambda record: tuple(_sort_key(self._value(record, path), desc) for path, desc in self._ordering)
+                select = heapq.nlargest if descending.pop() else heapq.nsmallest
+                matching = iter(select(offset + count, matching, key=key))
+            else:
+                matching = list(matching)
+                for path, desc in reversed(self._ordering):
+                    matching.sort(key=lambda record: _sort_key(self._value(record, path), desc), reverse=desc)
+                matching = iter(matching)
+
+        for index, record in enumerate(matching):
+            if index < offset:
+                continue
+            if count is not None and index >= offset + count:
+                break
+            yield record
+
+    def __iter__(self):
+        for record in self.records():
+            yield self.model.from_json(record)
+
+    def all(self):
+        return list(self)
+
+    def first(self):
+        return next(iter(self.limit(1, self._window[0])), None)
+
+    def count(self):
+        return sum(1 for _ in self.records())
+
+    def exists(self):
+        return next(self.limit(1).records(), None) is not None
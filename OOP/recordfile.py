@@ -0,0 +1,332 @@
+from contextlib import contextmanager
+import json
+import mmap
+import os
+import struct
+import sys
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Record file layout:
+#   header  magic, version, mtime_ns and size of the JSON file it was last copied to, the
+#           offset up to which its entries are in that JSON file, and the records' ID field
+#   entries [payload length u32][flags u8][id length u16][id][compact JSON payload]
+# Updates append a new entry and re-point the in-memory ID -> offset index; deletes
+# append a tombstone. Entries past synced_end are not in the JSON file yet (see storage.py).
+# compact() rewrites the live entries into a fresh file.
+# The index is saved next to the file (.idx, JSON) on close so reopening only scans the tail.
+MAGIC = b'SMSREC\0\0'
+VERSION = 2
+LIVE = 0
+DELETED = 1
+_HEADER = struct.Struct('<8sHqQQ32s')
+_ENTRY = struct.Struct('<IBH')
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def read_header(path):
+    # (source_signature, synced_end, id_field, inode, size) of a record file, or None
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            stat = os.fstat(f.fileno())
+    except FileNotFoundError:
+        return None
+    if len(header) != _HEADER.size:
+        return None
+    magic, version, mtime_ns, size, synced_end, id_field = _HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return (mtime_ns, size), synced_end, id_field.rstrip(b'\0').decode(), stat.st_ino, stat.st_size
+
+class RecordFile:
+
+    def __init__(self, path, id_field=None):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + '.idx'
+        if not os.path.exists(path):
+            if id_field is None:
+                raise FileNotFoundError(f"{path} does not exist and no ID field was given to create it")
+            with open(path, 'wb') as f:
+                f.write(self._header(id_field, (0, 0), _HEADER.size))
+        self._open()
+
+    @staticmethod
+    def _header(id_field, source_signature, synced_end):
+        return _HEADER.pack(MAGIC, VERSION, source_signature[0], source_signature[1], synced_end, id_field.encode())
+
+    def _open(self):
+        self._file = open(self.path, 'r+b')
+        header = self._file.read(_HEADER.size)
+        if len(header) != _HEADER.size or _HEADER.unpack(header)[:2] != (MAGIC, VERSION):
+            self._file.close()
+            raise ValueError(f"{self.path} is not a record file")
+        self._read_header(header)
+        self._map = None
+        self._index = {}
+        self.dead_entries = 0
+        self._end = _HEADER.size
+        self._load_index()
+        self._scan()
+
+    def _read_header(self, header):
+        _, _, mtime_ns, size, self.synced_end, id_field = _HEADER.unpack(header)
+        self.source_signature = (mtime_ns, size)
+        self.id_field = id_field.rstrip(b'\0').decode()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                saved = json.load(f)
+            end, inode, index, dead_entries = saved['end'], saved['inode'], saved['index'], saved['dead_entries']
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return
+        if inode == os.fstat(self._file.fileno()).st_ino and end <= os.fstat(self._file.fileno()).st_size:
+            self._index = index
+            self.dead_entries = dead_entries
+            self._end = end
+
+    def _scan(self):
+        size = os.fstat(self._file.fileno()).st_size
+        self._file.seek(self._end)
+        offset = self._end
+        while offset + _ENTRY.size <= size:
+            length, flags, id_length = _ENTRY.unpack(self._file.read(_ENTRY.size))
+            if offset + _ENTRY.size + id_length + length > size:
+                # Torn write at the end of the file; it will be overwritten by the next append
+                break
+            record_id = self._file.read(id_length).decode()
+            self._file.seek(length, os.SEEK_CUR)
+            if record_id in self._index:
+                self.dead_entries += 1
+            if flags == DELETED:
+                self._index.pop(record_id, None)
+                self.dead_entries += 1
+            else:
+                self._index[record_id] = offset
+            offset += _ENTRY.size + id_length + length
+        self._end = offset
+
+    def refresh(self):
+        # Picks up what another process did to the file since it was opened or last refreshed
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != os.fstat(self._file.fileno()).st_ino:
+            self._close_handles()
+            self._open()
+            return
+        self._file.seek(0)
+        self._read_header(self._file.read(_HEADER.size))
+        if stat.st_size > self._end:
+            self._scan()
+
+    @contextmanager
+    def _locked(self):
+        # Several desks may write the same file: every write holds an exclusive lock on it, and
+        # under the lock the file is caught up first, so a write always lands after the last
+        # complete entry rather than at this process's idea of the end
+        while True:
+            locked = self._file
+            _lock(locked)
+            if os.stat(self.path).st_ino == os.fstat(locked.fileno()).st_ino:
+                break
+            # Compacted or rebuilt by another process while waiting for the lock
+            _unlock(self._file)
+            self._close_handles()
+            self._open()
+        try:
+            self._file.seek(0)
+            self._read_header(self._file.read(_HEADER.size))
+            self._scan()
+            if os.fstat(self._file.fileno()).st_size > self._end:
+                # Torn entry left by a writer that died mid-append
+                self._file.truncate(self._end)
+            yield
+        finally:
+            # A rewrite under the lock reopens the file; closing the old one released its lock
+            if not locked.closed:
+                _unlock(locked)
+
+    @property
+    def pending(self):
+        # Whether entries were appended after the last copy to the JSON file
+        return self._end > self.synced_end
+
+    def _mapping(self):
+        if self._map is None or len(self._map) < self._end:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), self._end, access=mmap.ACCESS_READ)
+        return self._map
+
+    def __contains__(self, record_id):
+        return record_id in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def ids(self):
+        return list(self._index)
+
+    def _payload(self, record_id):
+        offset = self._index.get(record_id)
+        if offset is None:
+            return None
+        mapping = self._mapping()
+        length, flags, id_length = _ENTRY.unpack_from(mapping, offset)
+        start = offset + _ENTRY.size + id_length
+        return mapping[start:start + length]
+
+    def get(self, record_id):
+        payload = self._payload(record_id)
+        return json.loads(payload) if payload is not None else None
+
+    def records(self):
+        for record_id in list(self._index):
+            yield self.get(record_id)
+
+    def _append(self, record_id, flags, payload):
+        encoded_id = record_id.encode()
+        self._file.seek(self._end)
+        self._file.write(_ENTRY.pack(len(payload), flags, len(encoded_id)) + encoded_id + payload)
+        self._file.flush()
+        offset = self._end
+        self._end += _ENTRY.size + len(encoded_id) + len(payload)
+        return offset
+
+    def put(self, record_id, record):
+        payload = json.dumps(record, separators=(',', ':')).encode()
+        with self._locked():
+            offset = self._append(record_id, LIVE, payload)
+            if record_id in self._index:
+                self.dead_entries += 1
+            self._index[record_id] = offset
+
+    def delete(self, record_id):
+        with self._locked():
+            if record_id not in self._index:
+                return False
+            self._append(record_id, DELETED, b'')
+            del self._index[record_id]
+            self.dead_entries += 2
+            return True
+
+    def mark_synced(self, source_signature, synced_end=None):
+        # Records that the JSON file, now at source_signature, holds every entry up to synced_end
+        with self._locked():
+            self._write_header(source_signature, self._end if synced_end is None else synced_end)
+
+    def copy_out(self, write):
+        # write(records) copies the live records to the JSON file and returns its new signature.
+        # It runs under the lock, so no other desk's entry can be marked as copied without being so
+        with self._locked():
+            records = [json.loads(self._payload(record_id)) for record_id in self._index]
+            self._write_header(write(records), self._end)
+        return records
+
+    def _write_header(self, source_signature, synced_end):
+        self.source_signature = source_signature
+        self.synced_end = synced_end
+        self._file.seek(0)
+        self._file.write(self._header(self.id_field, source_signature, synced_end))
+        self._file.flush()
+
+    @property
+    def needs_compaction(self):
+        return self.dead_entries > 1000 and self.dead_entries > len(self._index)
+
+    def compact(self):
+        # Entries not yet copied to the JSON file stay pending: the whole file is marked unsynced
+        with self._locked():
+            entries = [(record_id, self._payload(record_id)) for record_id in self._index]
+            self._rewrite(entries, self.source_signature, synced=not self.pending)
+
+    def rebuild(self, records, source_signature):
+        # Replaces the contents with records that the JSON file at source_signature holds
+        id_field = self.id_field
+        entries = ((record[id_field], json.dumps(record, separators=(',', ':')).encode()) for record in records)
+        with self._locked():
+            self._rewrite(entries, source_signature, synced=True)
+
+    def _rewrite(self, entries, source_signature, synced):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(self._header(self.id_field, source_signature, 0))
+            for record_id, payload in entries:
+                encoded_id = record_id.encode()
+                f.write(_ENTRY.pack(len(payload), LIVE, len(encoded_id)) + encoded_id + payload)
+            if synced:
+                end = f.tell()
+                f.seek(0)
+                f.write(self._header(self.id_field, source_signature, end))
+        if fcntl is None:
+            # Windows cannot replace a file that is still open
+            self._close_handles()
+        os.replace(temp_path, self.path)
+        if not self._file.closed:
+            self._close_handles()
+        try:
+            os.remove(self.index_path)
+        except FileNotFoundError:
+            pass
+        self._open()
+        self.save_index()
+
+    def save_index(self):
+        # Per process, so desks closing the same file at once do not share a temporary file
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'end': self._end, 'inode': os.fstat(self._file.fileno()).st_ino,
+                       'dead_entries': self.dead_entries, 'index': self._index}, f, separators=(',', ':'))
+        os.replace(temp_path, self.index_path)
+
+    def _close_handles(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.save_index()
+        self._close_handles()
+
+    @classmethod
+    def build(cls, path, records, id_field, source_signature=(0, 0)):
+        if read_header(path) is None and os.path.exists(path):
+            # Left by an older version of the format; the records are rebuilt from their JSON file
+            os.remove(path)
+        record_file = cls(path, id_field)
+        record_file.id_field = id_field
+        record_file.rebuild(records, source_signature)
+        return record_file
+
+if __name__ == '__main__':
+    from .storage import build_record_file
+    files = {'Data/students.json': 'student_id', 'Data/instructors.json': 'instructor_id', 'Data/courses.json': 'course_id'}
+    for filename in sys.argv[1:] or files:
+        print(f"{filename} -> {build_record_file(filename, files[filename])}")
@@ -0,0 +1,295 @@
+from .storage import (add_change_listener, append_records, apply_changes, delete_records, file_signature, last_write,
+                      load_records, remove_change_listener, replace_records)
+from contextlib import contextmanager
+import logging
+import os
+import threading
+
+logger = logging.getLogger('sms.references')
+
+class ReferenceIndex:
+
+    def __init__(self, students_file='Data/students.json', instructors_file='Data/instructors.json', courses_file='Data/courses.json'):
+        self.students_file = students_file
+        self.instructors_file = instructors_file
+        self.courses_file = courses_file
+        self._signatures = None
+
+    def _files(self):
+        return (self.students_file, self.instructors_file, self.courses_file)
+
+    def _current_signatures(self):
+        return tuple(file_signature(f) for f in self._files())
+
+    def refresh(self):
+        signatures = self._current_signatures()
+        if signatures == self._signatures:
+            return False
+
+        # One pass over each file builds every reverse index
+        self.course_students = {}
+        self.course_waitlist = {}
+        self.course_instructor = {}
+        self.instructor_courses = {}
+        for student in load_records(self.students_file):
+            for course_id in student['registered_courses']:
+                self.course_students.setdefault(course_id, set()).add(student['student_id'])
+        for instructor in load_records(self.instructors_file):
+            for course_id in instructor.get('assigned_courses', []):
+                self.instructor_courses.setdefault(instructor['instructor_id'], set()).add(course_id)
+        for course in load_records(self.courses_file):
+            if course.get('instructor'):
+                instructor_id = course['instructor']['instructor_id']
+                self.course_instructor[course['course_id']] = instructor_id
+                self.instructor_courses.setdefault(instructor_id, set()).add(course['course_id'])
+            for student_id in course.get('enrolled_students', []):
+                self.course_students.setdefault(course['course_id'], set()).add(student_id)
+            for student_id in course.get('waitlist', []):
+                self.course_waitlist.setdefault(course['course_id'], set()).add(student_id)
+        self._signatures = signatures
+        return True
+
+    def students_of(self, course_id):
+        self.refresh()
+        return set(self.course_students.get(course_id, ()))
+
+    def instructor_of(self, course_id):
+        self.refresh()
+        return self.course_instructor.get(course_id)
+
+    def courses_of_instructor(self, instructor_id):
+        self.refresh()
+        return set(self.instructor_courses.get(instructor_id, ()))
+
+    def delete_courses(self, course_ids):
+        self.refresh()
+        course_ids = set(course_ids)
+        affected_students = set()
+        affected_instructors = set()
+        for course_id in course_ids:
+            affected_students |= self.course_students.get(course_id, set())
+            if course_id in self.course_instructor:
+                affected_instructors.add(self.course_instructor[course_id])
+        affected_instructors |= {instructor_id for instructor_id, courses in self.instructor_courses.items() if courses & course_ids}
+
+        def drop_courses(record, field):
+            record[field] = [course_id for course_id in record.get(field, []) if course_id not in course_ids]
+            return record
+
+        students = [drop_courses(student, 'registered_courses') for student in self._records(self.students_file, 'student_id', affected_students)]
+        instructors = [drop_courses(instructor, 'assigned_courses') for instructor in self._records(self.instructors_file, 'instructor_id', affected_instructors)]
+
+        # Other courses of the same instructors embed a copy listing the deleted courses
+        sibling_ids = set()
+        for instructor_id in affected_instructors:
+            sibling_ids |= self.instructor_courses.get(instructor_id, set())
+        siblings = []
+        for course in self._records(self.courses_file, 'course_id', sibling_ids - course_ids):
+            if course.get('instructor'):
+                drop_courses(course['instructor'], 'assigned_courses')
+            siblings.append(course)
+
+        with self._writes():
+            self._write(replace_records, self.students_file, 'student_id', students)
+            self._write(replace_records, self.instructors_file, 'instructor_id', instructors)
+            deleted = self._write(apply_changes, self.courses_file, 'course_id', updated=siblings, deleted=course_ids)[1]
+        # A deleted course takes its waitlist with it; waitlisted students hold no reference to it
+        for course_id in course_ids:
+            self.course_students.pop(course_id, None)
+            self.course_waitlist.pop(course_id, None)
+            self.course_instructor.pop(course_id, None)
+        for instructor_id in affected_instructors:
+            self.instructor_courses.get(instructor_id, set()).difference_update(course_ids)
+        return deleted
+
+    def delete_students(self, student_ids):
+        self.refresh()
+        student_ids = set(student_ids)
+        affected_courses = {course_id for index in (self.course_students, self.course_waitlist)
+                            for course_id, students in index.items() if students & student_ids}
+        courses = []
+        for course in self._records(self.courses_file, 'course_id', affected_courses):
+            # Taken off waitlists too, so a deleted student can never be promoted into a seat
+            course['enrolled_students'] = [student_id for student_id in course.get('enrolled_students', []) if student_id not in student_ids]
+            waitlist = [student_id for student_id in course.get('waitlist', []) if student_id not in student_ids]
+            if waitlist:
+                course['waitlist'] = waitlist
+            else:
+                course.pop('waitlist', None)
+            courses.append(course)
+        with self._writes():
+            self._write(replace_records, self.courses_file, 'course_id', courses)
+            deleted = self._write(delete_records, self.students_file, 'student_id', student_ids)
+        for course_id in affected_courses:
+            for index in (self.course_students, self.course_waitlist):
+                if course_id in index:
+                    index[course_id] -= student_ids
+        return deleted
+
+    def delete_instructors(self, instructor_ids):
+        self.refresh()
+        instructor_ids = set(instructor_ids)
+        affected_courses = set()
+        for instructor_id in instructor_ids:
+            affected_courses |= self.instructor_courses.get(instructor_id, set())
+        courses = []
+        for course in self._records(self.courses_file, 'course_id', affected_courses):
+            if course.get('instructor') and course['instructor']['instructor_id'] in instructor_ids:
+                course['instructor'] = None
+            courses.append(course)
+        with self._writes():
+            self._write(replace_records, self.courses_file, 'course_id', courses)
+            deleted = self._write(delete_records, self.instructors_file, 'instructor_id', instructor_ids)
+        for instructor_id in instructor_ids:
+            for course_id in self.instructor_courses.pop(instructor_id, set()):
+                if self.course_instructor.get(course_id) == instructor_id:
+                    del self.course_instructor[course_id]
+        return deleted
+
+    def rename_course(self, old_id, new_id):
+        self.refresh()
+        if any(course['course_id'] == new_id for course in load_records(self.courses_file)):
+            raise ValueError("Course ID already exists!")
+
+        def rename(ids):
+            return [new_id if course_id == old_id else course_id for course_id in ids]
+
+        students = self._records(self.students_file, 'student_id', self.course_students.get(old_id, set()))
+        for student in students:
+            student['registered_courses'] = rename(student['registered_courses'])
+        instructor_id = self.course_instructor.get(old_id)
+        instructors = self._records(self.instructors_file, 'instructor_id', {instructor_id} if instructor_id else set())
+        for instructor in instructors:
+            instructor['assigned_courses'] = rename(instructor.get('assigned_courses', []))
+
+        courses = self._records(self.courses_file, 'course_id', {old_id} | self.instructor_courses.get(instructor_id, set()))
+        for course in courses:
+            if course['course_id'] == old_id:
+                course['course_id'] = new_id
+            if course.get('instructor') and course['instructor']['instructor_id'] == instructor_id:
+                course['instructor']['assigned_courses'] = rename(course['instructor'].get('assigned_courses', []))
+
+        with self._writes():
+            self._write(replace_records, self.students_file, 'student_id', students)
+            self._write(replace_records, self.instructors_file, 'instructor_id', instructors)
+            # The renamed course is written as a delete and an add so every change stays per record
+            self._write(apply_changes, self.courses_file, 'course_id',
+                        updated=[course for course in courses if course['course_id'] != new_id], deleted=[old_id])
+            self._write(append_records, self.courses_file, 'course_id', [course for course in courses if course['course_id'] == new_id])
+        # The course record carries its waitlist over under the new ID
+        for index in (self.course_students, self.course_waitlist, self.course_instructor):
+            if old_id in index:
+                index[new_id] = index.pop(old_id)
+        if old_id in self.instructor_courses.get(instructor_id, ()):
+            self.instructor_courses[instructor_id].discard(old_id)
+            self.instructor_courses[instructor_id].add(new_id)
+
+    def check_integrity(self):
+        # Set lookups keep this O(N + M) instead of comparing every pair of records
+        students = load_records(self.students_file)
+        instructors = load_records(self.instructors_file)
+        courses = load_records(self.courses_file)
+        student_ids = {student['student_id'] for student in students}
+        instructor_ids = {instructor['instructor_id'] for instructor in instructors}
+        course_ids = {course['course_id'] for course in courses}
+        enrolled = {(student_id, course['course_id']) for course in courses for student_id in course.get('enrolled_students', [])}
+        taught = {course['course_id']: course['instructor']['instructor_id'] for course in courses if course.get('instructor')}
+
+        problems = []
+        for student in students:
+            for course_id in student['registered_courses']:
+                if course_id not in course_ids:
+                    problems.append(f"Student {student['student_id']} is registered in missing course {course_id}")
+                elif (student['student_id'], course_id) not in enrolled:
+                    problems.append(f"Student {student['student_id']} is not in the roster of course {course_id}")
+        for instructor in instructors:
+            for course_id in instructor.get('assigned_courses', []):
+                if course_id not in course_ids:
+                    problems.append(f"Instructor {instructor['instructor_id']} is assigned to missing course {course_id}")
+                elif taught.get(course_id) != instructor['instructor_id']:
+                    problems.append(f"Instructor {instructor['instructor_id']} is not the instructor of course {course_id}")
+        for course in courses:
+            for student_id in course.get('enrolled_students', []):
+                if student_id not in student_ids:
+                    problems.append(f"Course {course['course_id']} lists missing student {student_id}")
+            for student_id in course.get('waitlist', []):
+                if student_id not in student_ids:
+                    problems.append(f"Course {course['course_id']} waitlists missing student {student_id}")
+                elif (student_id, course['course_id']) in enrolled:
+                    problems.append(f"Course {course['course_id']} waitlists enrolled student {student_id}")
+            if course['course_id'] in taught and taught[course['course_id']] not in instructor_ids:
+                problems.append(f"Course {course['course_id']} is taught by missing instructor {taught[course['course_id']]}")
+        return problems
+
+    @contextmanager
+    def _writes(self):
+        # A cascade writes up to three files one after another. If a write fails, the records
+        # already written are put back (an undo of the changes seen so far) and the indexes are
+        # rebuilt. This only holds while the process survives: a crash between two writes
+        # leaves the earlier ones on disk, and check_integrity() reports what they left behind.
+        from .history import StorageCommand
+        command = StorageCommand('cascade')
+        files = {os.path.normpath(filename) for filename in self._files()}
+
+        def on_change(filename, id_field, changes):
+            if os.path.normpath(filename) in files:
+                command.record(filename, id_field, changes)
+
+        add_change_listener(on_change)
+        try:
+            yield
+        except BaseException:
+            remove_change_listener(on_change)
+            self._signatures = None
+            try:
+                command.undo()
+            except Exception:
+                logger.exception("Could not put back a partly written cascade")
+            raise
+        finally:
+            remove_change_listener(on_change)
+
+    def _write(self, function, filename, *args, **kwargs):
+        # After a write made here the indexes describe the file, provided they described it just
+        # before; a write by anything else in between leaves the old signature, so refresh() rebuilds
+        previous = last_write(filename)
+        result = function(filename, *args, **kwargs)
+        write = last_write(filename)
+        if write is not previous and write is not None and self._signatures is not None:
+            position = self._files().index(filename)
+            if write[0] == self._signatures[position]:
+                self._signatures = self._signatures[:position] + (write[1],) + self._signatures[position + 1:]
+        return result
+
+    @staticmethod
+    def _records(filename, id_field, record_ids):
+        if not record_ids:
+            return []
+        return [record for record in load_records(filename) if record[id_field] in record_ids]
+
+def start_periodic_check(index, interval=3600):
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            for problem in index.check_integrity():
+                logger.warning(problem)
+
+    threading.Thread(target=run, name='integrity-check', daemon=True).start()
+    return stop
+
+_indexes = {}
+
+def index_for(students_file='Data/students.json', instructors_file='Data/instructors.json', courses_file='Data/courses.json'):
+    key = (students_file, instructors_file, courses_file)
+    if key not in _indexes:
+        _indexes[key] = ReferenceIndex(*key)
+    return _indexes[key]
+
+def index_near(filename, kind):
+    # The index over filename (the 'students', 'instructors' or 'courses' file) and the other
+    # two data files in the same directory, which a cascade from filename has to edit
+    directory = os.path.dirname(filename)
+    files = {name: os.path.join(directory, name + '.json') for name in ('students', 'instructors', 'courses')}
+    files[kind] = filename
+    return index_for(files['students'], files['instructors'], files['courses'])
@@ -0,0 +1,177 @@
+from . import instrumentation
+from .seats import REJECTED, Outcome, SeatMap
+from .storage import file_signature, last_write, load_records
+from collections import Counter, deque
+import csv
+import logging
+import sys
+import threading
+import time
+
+# Requests submitted within one slice are validated together and written with one commit
+SLICE_SECONDS = 0.2
+MAX_BATCH = 5000
+# Times a batch is rerun when another writer changed the files while it was being validated;
+# after that it goes back on the queue rather than being committed over the other writes
+COMMIT_RETRIES = 3
+
+logger = logging.getLogger('sms.registration')
+
+class _FilesChanged(Exception):
+    # The files kept changing under every rerun of a batch
+    pass
+
+class RegistrationRequest:
+
+    def __init__(self, action, student_id, course_id, callback=None):
+        self.action = action
+        self.student_id = student_id
+        self.course_id = course_id
+        self.callback = callback
+        self.outcome = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self.outcome
+
+    def _finish(self, outcome):
+        self.outcome = outcome
+        self._done.set()
+        if self.callback is not None:
+            self.callback(outcome)
+
+class RegistrationQueue:
+    # Registrations are queued by submit() and applied by process_pending(), which callers run
+    # on a timer (the tkinter app) or start() runs on a background thread. Seats and students
+    # stay in memory between batches and are reloaded only when another writer changed the
+    # files; the seat map checks every enrolment against the student's timetable.
+
+    def __init__(self, students_file='Data/students.json', courses_file='Data/courses.json', max_batch=MAX_BATCH):
+        self.students_file = students_file
+        self.courses_file = courses_file
+        self.max_batch = max_batch
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._process_lock = threading.Lock()
+        self._seat_map = None
+        self._students = None
+        self._signatures = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def submit(self, student_id, course_id, action='register', callback=None):
+        # callback(outcome) runs on whichever thread processes the batch
+        request = RegistrationRequest(action, student_id, course_id, callback)
+        with self._lock:
+            self._pending.append(request)
+        return request
+
+    def process_pending(self):
+        with self._process_lock:
+            with self._lock:
+                batch = [self._pending.popleft() for _ in range(min(len(self._pending), self.max_batch))]
+            if not batch:
+                return []
+            with instrumentation.timer('registration.batch'):
+                try:
+                    outcomes = self._apply(batch)
+                except _FilesChanged:
+                    # Committing would write over the other writer's changes; the batch goes back
+                    # to the front of the queue and is rerun on the next slice
+                    self._seat_map = None
+                    with self._lock:
+                        self._pending.extendleft(reversed(batch))
+                    instrumentation.increment('registration.requeued', len(batch))
+                    return []
+                except Exception as error:
+                    # Nothing was committed; the in-memory state may be ahead of the files, so drop it
+                    if not isinstance(error, (OSError, ValueError)):
+                        logger.exception("Registration batch of %d requests failed", len(batch))
+                    self._seat_map = None
+                    outcomes = [Outcome(request.student_id, request.course_id, REJECTED, str(error)) for request in batch]
+            instrumentation.increment('registration.requests', len(batch))
+        # Every request is finished even if a callback raises; the first error is raised afterwards
+        errors = []
+        for request, outcome in zip(batch, outcomes):
+            try:
+                request._finish(outcome)
+            except Exception as error:
+                errors.append(error)
+        if errors:
+            raise errors[0]
+        return outcomes
+
+    def start(self, slice_seconds=SLICE_SECONDS):
+        if self._thread is not None:
+            return self._thread
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(slice_seconds):
+                self.process_pending()
+            self.process_pending()
+
+        self._thread = threading.Thread(target=run, name='registration', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _current_signatures(self):
+        return (file_signature(self.students_file), file_signature(self.courses_file))
+
+    def _load(self):
+        signatures = self._current_signatures()
+        if self._seat_map is not None and signatures == self._signatures:
+            return
+        with instrumentation.timer('registration.load'):
+            self._students = {record['student_id']: record for record in load_records(self.students_file)}
+            self._seat_map = SeatMap(load_records(self.courses_file), students=self._students)
+        self._signatures = signatures
+
+    def _apply(self, batch):
+        for _ in range(COMMIT_RETRIES):
+            self._load()
+            outcomes = [self._process(request) for request in batch]
+            if self._current_signatures() == self._signatures:
+                break
+            # Another writer got in while the batch was validated; rerun it on the new files
+            self._seat_map = None
+        else:
+            raise _FilesChanged()
+
+        self._seat_map.commit(self.students_file, self.courses_file, self._students)
+        # The indexes now describe the written files if they described them just before
+        signatures = []
+        for filename, signature in zip((self.students_file, self.courses_file), self._signatures):
+            write = last_write(filename)
+            signatures.append(write[1] if write is not None and write[0] == signature else signature)
+        self._signatures = tuple(signatures)
+        return outcomes
+
+    def _process(self, request):
+        return self._seat_map.process([(request.action, request.student_id, request.course_id)])[0]
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m OOP.registration REQUESTS.csv  (columns: action,student_id,course_id)")
+    queue = RegistrationQueue()
+    with open(sys.argv[1], newline='') as f:
+        for row in csv.DictReader(f):
+            queue.submit(row['student_id'], row['course_id'], row['action'])
+    start = time.perf_counter()
+    statuses = Counter()
+    while queue.pending:
+        statuses.update(outcome.status for outcome in queue.process_pending())
+    elapsed = time.perf_counter() - start
+    print(', '.join(f"{status}: {count}" for status, count in sorted(statuses.items())),
+          f"({sum(statuses.values()) / elapsed if elapsed else 0:.0f} requests/s)")
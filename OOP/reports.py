@@ -0,0 +1,163 @@
+from . import instrumentation
+from .storage import file_signature, last_write, load_records
+from collections import Counter
+import csv
+import os
+import sys
+
+class EnrollmentReport:
+
+    def __init__(self, students_file='Data/students.json', instructors_file='Data/instructors.json', courses_file='Data/courses.json'):
+        self.students_file = students_file
+        self.instructors_file = instructors_file
+        self.courses_file = courses_file
+        self._signatures = {students_file: None, instructors_file: None, courses_file: None}
+        self.age_distribution = Counter()
+        self.unregistered_students = set()
+        self.courses_per_instructor = Counter()
+        self.enrollments_per_course = Counter()
+        self.course_capacity = {}
+        self.course_names = {}
+        self.unassigned_courses = set()
+
+    def refresh(self):
+        # Only files whose signature moved since the last scan (or counter update) are read again
+        rescanned = []
+        for filename, scan in ((self.students_file, self._scan_students),
+                               (self.instructors_file, self._scan_instructors),
+                               (self.courses_file, self._scan_courses)):
+            signature = file_signature(filename)
+            if signature == self._signatures[filename] and signature is not None:
+                instrumentation.increment('reports.hit')
+                continue
+            instrumentation.increment('reports.miss')
+            with instrumentation.timer('reports.scan'):
+                scan(load_records(filename))
+            self._signatures[filename] = signature
+            rescanned.append(filename)
+        return rescanned
+
+    def _scan_students(self, students):
+        self.age_distribution = Counter()
+        self.unregistered_students = set()
+        for student in students:
+            self.age_distribution[student['age']] += 1
+            if not student['registered_courses']:
+                self.unregistered_students.add(student['student_id'])
+
+    def _scan_instructors(self, instructors):
+        self.courses_per_instructor = Counter()
+        for instructor in instructors:
+            self.courses_per_instructor[instructor['instructor_id']] = len(instructor.get('assigned_courses', []))
+
+    def _scan_courses(self, courses):
+        self.enrollments_per_course = Counter()
+        self.course_capacity = {}
+        self.course_names = {}
+        self.unassigned_courses = set()
+        for course in courses:
+            course_id = course['course_id']
+            self.enrollments_per_course[course_id] = len(course.get('enrolled_students', []))
+            self.course_names[course_id] = course['course_name']
+            if course.get('capacity') is not None:
+                self.course_capacity[course_id] = course['capacity']
+            if not course.get('instructor'):
+                self.unassigned_courses.add(course_id)
+
+    def record_registration(self, student_id, course_id):
+        self.enrollments_per_course[course_id] += 1
+        self.unregistered_students.discard(student_id)
+        self._adopt_writes(self.students_file, self.courses_file)
+
+    def record_seats(self, course_records, student_records):
+        # A seat map commit: the counts are taken from the written records, so drops,
+        # promotions and capacity changes in the batch are all covered
+        for course in course_records:
+            course_id = course['course_id']
+            self.enrollments_per_course[course_id] = len(course.get('enrolled_students', []))
+            if course.get('capacity') is not None:
+                self.course_capacity[course_id] = course['capacity']
+            else:
+                self.course_capacity.pop(course_id, None)
+        for student in student_records:
+            if student['registered_courses']:
+                self.unregistered_students.discard(student['student_id'])
+            else:
+                self.unregistered_students.add(student['student_id'])
+        self._adopt_writes(self.students_file, self.courses_file)
+
+    def record_assignment(self, instructor_id, course_id):
+        self.courses_per_instructor[instructor_id] += 1
+        self.unassigned_courses.discard(course_id)
+        self._adopt_writes(self.instructors_file, self.courses_file)
+
+    def _adopt_writes(self, *filenames):
+        # The counters now describe the written files, but only if they described the
+        # files as they were just before the write; otherwise the next refresh rescans
+        for filename in filenames:
+            write = last_write(filename)
+            if write is not None and self._signatures[filename] is not None and write[0] == self._signatures[filename]:
+                self._signatures[filename] = write[1]
+
+    def fill_rates(self):
+        return {course_id: self.enrollments_per_course[course_id] / capacity if capacity else 0.0
+                for course_id, capacity in self.course_capacity.items()}
+
+    def summary(self):
+        self.refresh()
+        return {
+            'students': sum(self.age_distribution.values()),
+            'instructors': len(self.courses_per_instructor),
+            'courses': len(self.course_names),
+            'enrollments': sum(self.enrollments_per_course.values()),
+            'enrollments_per_course': dict(self.enrollments_per_course),
+            'courses_per_instructor': dict(self.courses_per_instructor),
+            'age_distribution': dict(sorted(self.age_distribution.items())),
+            'unregistered_students': sorted(self.unregistered_students),
+            'unassigned_courses': sorted(self.unassigned_courses),
+            'fill_rates': self.fill_rates()
+        }
+
+    def to_csv(self, path):
+        summary = self.summary()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['report', 'key', 'value'])
+            for report in ('students', 'instructors', 'courses', 'enrollments'):
+                writer.writerow([report, '', summary[report]])
+            for report in ('enrollments_per_course', 'courses_per_instructor', 'age_distribution', 'fill_rates'):
+                for key, value in summary[report].items():
+                    writer.writerow([report, key, value])
+            for report in ('unregistered_students', 'unassigned_courses'):
+                for key in summary[report]:
+                    writer.writerow([report, key, ''])
+        return path
+
+_reports = {}
+
+def report_for(students_file='Data/students.json', instructors_file='Data/instructors.json', courses_file='Data/courses.json'):
+    key = (students_file, instructors_file, courses_file)
+    if key not in _reports:
+        _reports[key] = EnrollmentReport(*key)
+    return _reports[key]
+
+def _same_file(a, b):
+    return os.path.normpath(a) == os.path.normpath(b)
+
+def record_registration(students_file, courses_file, student_id, course_id):
+    for report in _reports.values():
+        if _same_file(report.students_file, students_file) and _same_file(report.courses_file, courses_file):
+            report.record_registration(student_id, course_id)
+
+def record_seats(students_file, courses_file, course_records, student_records):
+    for report in _reports.values():
+        if _same_file(report.students_file, students_file) and _same_file(report.courses_file, courses_file):
+            report.record_seats(course_records, student_records)
+
+def record_assignment(instructors_file, courses_file, instructor_id, course_id):
+    for report in _reports.values():
+        if _same_file(report.instructors_file, instructors_file) and _same_file(report.courses_file, courses_file):
+            report.record_assignment(instructor_id, course_id)
+
+if __name__ == '__main__':
+    print(report_for().to_csv(sys.argv[1] if len(sys.argv) > 1 else 'report.csv'))
@@ -0,0 +1,181 @@
+from . import instrumentation
+from .storage import file_signature, load_records
+from bisect import bisect_left
+from heapq import heappop, heappush
+import re
+import sys
+
+# A meeting is {'day': 'Mon', 'start': '09:00', 'end': '10:15'}; internally it is the
+# half-open interval [start, end) in minutes from Monday 00:00
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_TIME = re.compile(r"^([01]?[0-9]|2[0-3]):([0-5][0-9])$")
+
+def _minutes(value):
+    match = _TIME.match(value) if isinstance(value, str) else None
+    if match is None:
+        raise ValueError(f"Invalid time '{value}', expected HH:MM")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+def meeting_interval(meeting):
+    if not isinstance(meeting, dict) or meeting.get('day') not in DAYS:
+        raise ValueError(f"Invalid meeting {meeting!r}, expected a day among {', '.join(DAYS)}")
+    start, end = _minutes(meeting.get('start')), _minutes(meeting.get('end'))
+    if end <= start:
+        raise ValueError(f"Meeting on {meeting['day']} ends before it starts")
+    offset = DAYS.index(meeting['day']) * 1440
+    return offset + start, offset + end
+
+def meeting_intervals(meetings):
+    return [meeting_interval(meeting) for meeting in meetings or ()]
+
+class Timetable:
+    # The meetings of one student or instructor sorted by start, so a clash check is a bisect
+    # per meeting instead of a scan. Clashes already on file are kept as they are, so meetings
+    # may overlap; _reach[i] is the meeting ending last among the first i + 1, which finds an
+    # earlier meeting still open even when its neighbour has ended.
+    # Updates shift the sorted lists, O(n) in the meetings of one person. That n is a few dozen
+    # at most, where a list shift is a short memmove and beats any balanced tree built out of
+    # Python objects, so the lists are kept.
+
+    def __init__(self):
+        self._starts = []
+        self._slots = []
+        self._reach = []
+        self._courses = {}
+
+    def __contains__(self, course_id):
+        return course_id in self._courses
+
+    def conflict(self, intervals):
+        # Returns the course clashing with any of the intervals, or None
+        for start, end in intervals:
+            index = bisect_left(self._starts, start)
+            if index > 0 and self._reach[index - 1][1] > start:
+                return self._reach[index - 1][2]
+            if index < len(self._slots) and self._slots[index][0] < end:
+                return self._slots[index][2]
+        return None
+
+    def add(self, course_id, intervals):
+        clash = self.conflict(intervals)
+        if clash is not None:
+            raise ValueError(f"Course {course_id} clashes with course {clash}")
+        for start, end in intervals:
+            self.insert(start, end, course_id)
+
+    def insert(self, start, end, course_id):
+        index = bisect_left(self._starts, start)
+        slot = (start, end, course_id)
+        self._courses[course_id] = self._courses.get(course_id, 0) + 1
+        self._starts.insert(index, start)
+        self._slots.insert(index, slot)
+        reach = slot if index == 0 or end > self._reach[index - 1][1] else self._reach[index - 1]
+        self._reach.insert(index, reach)
+        # Later prefixes only change while the new meeting ends after them
+        for later in range(index + 1, len(self._reach)):
+            if self._reach[later][1] >= end:
+                break
+            self._reach[later] = slot
+
+    def remove(self, course_id):
+        # Drops every meeting of course_id; the prefixes are recomputed in one pass
+        if self._courses.pop(course_id, None) is None:
+            return
+        self._slots = [slot for slot in self._slots if slot[2] != course_id]
+        self._starts = [slot[0] for slot in self._slots]
+        self._reach = []
+        for slot in self._slots:
+            self._reach.append(slot if not self._reach or slot[1] > self._reach[-1][1] else self._reach[-1])
+
+def _sweep(meetings):
+    # meetings: (start, end, course_id) of one person. Taken in order of start, each meeting
+    # is paired with every meeting still open (a heap by end time), so the cost is
+    # O(m log m) plus the pairs reported rather than comparing every pair
+    clashes = set()
+    active = []
+    for start, end, course_id in sorted(meetings):
+        while active and active[0][0] <= start:
+            heappop(active)
+        for _, other in active:
+            if other != course_id:
+                clashes.add(tuple(sorted((other, course_id))))
+        heappush(active, (end, course_id))
+    return clashes
+
+class ScheduleIndex:
+
+    def __init__(self, students_file='Data/students.json', instructors_file='Data/instructors.json', courses_file='Data/courses.json'):
+        self.students_file = students_file
+        self.instructors_file = instructors_file
+        self.courses_file = courses_file
+        self._signature = None
+        self._meetings = {}
+        self._timetables = {}
+
+    def refresh(self):
+        signature = file_signature(self.courses_file)
+        if signature == self._signature and signature is not None:
+            return False
+        self._meetings = {}
+        for course in load_records(self.courses_file):
+            if course.get('meeting_times'):
+                self._meetings[course['course_id']] = meeting_intervals(course['meeting_times'])
+        self._timetables = {}
+        self._signature = signature
+        return True
+
+    def meetings(self, course_id):
+        self.refresh()
+        return self._meetings.get(course_id, [])
+
+    def timetable(self, owner, course_ids):
+        # Timetables are cached per owner (e.g. ('student', id)) while their course list is unchanged
+        self.refresh()
+        course_ids = tuple(course_ids)
+        cached = self._timetables.get(owner)
+        if cached is not None and cached[0] == course_ids:
+            return cached[1]
+        timetable = Timetable()
+        for course_id in course_ids:
+            # Clashes already on file are inserted as they are and left to conflict_report
+            for start, end in self._meetings.get(course_id, ()):
+                timetable.insert(start, end, course_id)
+        self._timetables[owner] = (course_ids, timetable)
+        return timetable
+
+    def check(self, owner, course_ids, course_id, meeting_times=None):
+        # Raises ValueError if course_id (with meeting_times, or its meetings on file) clashes
+        # with the owner's courses
+        intervals = meeting_intervals(meeting_times) if meeting_times is not None else self.meetings(course_id)
+        if not intervals:
+            return
+        clash = self.timetable(owner, [other for other in course_ids if other != course_id]).conflict(intervals)
+        if clash is not None:
+            raise ValueError(f"Course {course_id} clashes with course {clash}")
+
+    def conflict_report(self):
+        # Every clashing pair of courses per student and per instructor across the term
+        self.refresh()
+        report = []
+        with instrumentation.timer('schedule.report'):
+            for kind, filename, id_field, field in (('student', self.students_file, 'student_id', 'registered_courses'),
+                                                    ('instructor', self.instructors_file, 'instructor_id', 'assigned_courses')):
+                for record in load_records(filename):
+                    meetings = [(start, end, course_id) for course_id in record.get(field, ())
+                                for start, end in self._meetings.get(course_id, ())]
+                    if len(meetings) > 1:
+                        for first, second in sorted(_sweep(meetings)):
+                            report.append((kind, record[id_field], first, second))
+        return report
+
+_indexes = {}
+
+def schedule_for(students_file='Data/students.json', instructors_file='Data/instructors.json', courses_file='Data/courses.json'):
+    key = (students_file, instructors_file, courses_file)
+    if key not in _indexes:
+        _indexes[key] = ScheduleIndex(*key)
+    return _indexes[key]
+
+if __name__ == '__main__':
+    for kind, owner_id, first, second in schedule_for().conflict_report():
+        print(f"{kind} {owner_id}: {first} clashes with {second}")
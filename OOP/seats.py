@@ -0,0 +1,303 @@
+from . import instrumentation
+from .schedule import Timetable, meeting_intervals
+from .storage import load_records, replace_records
+from collections import deque
+import csv
+import sys
+
+ENROLLED = 'enrolled'
+WAITLISTED = 'waitlisted'
+DROPPED = 'dropped'
+REJECTED = 'rejected'
+
+class Outcome:
+
+    def __init__(self, student_id, course_id, status, message='', promoted=None):
+        self.student_id = student_id
+        self.course_id = course_id
+        self.status = status
+        self.message = message
+        self.promoted = promoted
+
+    def __repr__(self):
+        return f"Outcome({self.student_id!r}, {self.course_id!r}, {self.status!r}, {self.message!r}, promoted={self.promoted!r})"
+
+class CourseSeats:
+    # Seats of one course: enrolled IDs in a dict (ordered, O(1) membership and removal) and a
+    # FIFO waitlist. Leaving the waitlist only retires the student's ticket; stale deque entries
+    # are skipped on promotion, so joining, leaving and promoting are all O(1) amortised.
+
+    def __init__(self, record):
+        self.record = record
+        self.capacity = record.get('capacity')
+        self.meetings = meeting_intervals(record.get('meeting_times'))
+        self.enrolled = dict.fromkeys(record.get('enrolled_students', ()))
+        self._queue = deque()
+        self._tickets = {}
+        self._next_ticket = 0
+        for student_id in record.get('waitlist', ()):
+            self.wait(student_id)
+
+    @property
+    def free(self):
+        # Seats left, or None when the course has no capacity limit
+        return None if self.capacity is None else self.capacity - len(self.enrolled)
+
+    def has_seat(self):
+        return self.capacity is None or len(self.enrolled) < self.capacity
+
+    def waiting(self, student_id):
+        return student_id in self._tickets
+
+    def wait(self, student_id):
+        self._tickets[student_id] = self._next_ticket
+        self._queue.append((student_id, self._next_ticket))
+        self._next_ticket += 1
+        return len(self._tickets)
+
+    def leave(self, student_id):
+        return self._tickets.pop(student_id, None) is not None
+
+    def promote(self, admits=None):
+        # Moves waitlisted students into free seats; returns their IDs in promotion order.
+        # Students admits(student_id) turns down are passed over and keep their place.
+        promoted = []
+        passed_over = []
+        while self._queue and self.has_seat():
+            student_id, ticket = self._queue.popleft()
+            if self._tickets.get(student_id) != ticket:
+                continue
+            if admits is not None and not admits(student_id):
+                passed_over.append((student_id, ticket))
+                continue
+            del self._tickets[student_id]
+            self.enrolled[student_id] = None
+            promoted.append(student_id)
+        self._queue.extendleft(reversed(passed_over))
+        return promoted
+
+    def waitlist(self):
+        return [student_id for student_id, ticket in self._queue if self._tickets.get(student_id) == ticket]
+
+    def to_record(self):
+        record = dict(self.record)
+        record['enrolled_students'] = list(self.enrolled)
+        if self.capacity is not None:
+            record['capacity'] = self.capacity
+        else:
+            record.pop('capacity', None)
+        waitlist = self.waitlist()
+        if waitlist:
+            record['waitlist'] = waitlist
+        else:
+            record.pop('waitlist', None)
+        return record
+
+class SeatMap:
+    # In-memory seat state for a set of courses. Requests only touch counters and sets;
+    # the student and course records that changed are written once by commit().
+    # Given the student records ({student_id: record}), every enrolment, whether requested or
+    # promoted from a waitlist, is checked against the student's timetable; meetings(course_id)
+    # gives the meeting intervals of courses outside the map.
+
+    def __init__(self, courses, student_ids=None, students=None, meetings=None):
+        self.courses = {record['course_id']: CourseSeats(record) for record in courses}
+        if student_ids is None and students is not None:
+            student_ids = students
+        # Without a set of known students every student ID is accepted
+        self.student_ids = set(student_ids) if student_ids is not None else None
+        self.students = students
+        self._meetings = meetings
+        self.changed_courses = set()
+        self.registrations = {}
+        # Each student's timetable, built on the first clash check and kept in step with the
+        # enrolments and drops after it
+        self._timetables = {}
+
+    def _registration(self, student_id, course_id, registered):
+        self.registrations.setdefault(student_id, {})[course_id] = registered
+        timetable = self._timetables.get(student_id)
+        if timetable is None:
+            return
+        if not registered:
+            timetable.remove(course_id)
+        elif course_id not in timetable:
+            for start, end in self.meetings(course_id):
+                timetable.insert(start, end, course_id)
+
+    def _timetable(self, student_id):
+        timetable = self._timetables.get(student_id)
+        if timetable is None:
+            timetable = self._timetables[student_id] = self._build_timetable(student_id)
+        return timetable
+
+    def _build_timetable(self, student_id, without=None):
+        timetable = Timetable()
+        for course_id in self.registered_courses(student_id):
+            if course_id != without:
+                for start, end in self.meetings(course_id):
+                    timetable.insert(start, end, course_id)
+        return timetable
+
+    def registered_courses(self, student_id):
+        # The student's courses as of the requests processed so far
+        registered = dict.fromkeys(self.students[student_id]['registered_courses'])
+        for course_id, is_registered in self.registrations.get(student_id, {}).items():
+            if is_registered:
+                registered[course_id] = None
+            else:
+                registered.pop(course_id, None)
+        return list(registered)
+
+    def meetings(self, course_id):
+        seats = self.courses.get(course_id)
+        if seats is not None:
+            return seats.meetings
+        return self._meetings(course_id) if self._meetings is not None else []
+
+    def clash(self, student_id, course_id):
+        # The course of the student's timetable that course_id clashes with, or None
+        if self.students is None or student_id not in self.students:
+            return None
+        intervals = self.meetings(course_id)
+        if not intervals:
+            return None
+        timetable = self._timetable(student_id)
+        if course_id in timetable:
+            # Only when the files disagree: the student record lists a course its roster does not
+            timetable = self._build_timetable(student_id, without=course_id)
+        return timetable.conflict(intervals)
+
+    def _promote(self, course_id):
+        promoted = self.courses[course_id].promote(lambda student_id: self.clash(student_id, course_id) is None)
+        for student_id in promoted:
+            self._registration(student_id, course_id, True)
+        return promoted
+
+    def request(self, student_id, course_id):
+        seats = self.courses.get(course_id)
+        if seats is None:
+            return Outcome(student_id, course_id, REJECTED, f"Course {course_id} does not exist")
+        if self.student_ids is not None and student_id not in self.student_ids:
+            return Outcome(student_id, course_id, REJECTED, f"Student {student_id} does not exist")
+        if student_id in seats.enrolled:
+            return Outcome(student_id, course_id, REJECTED, "This student is already registered in the course")
+        if seats.waiting(student_id):
+            return Outcome(student_id, course_id, REJECTED, "This student is already on the waitlist")
+        clash = self.clash(student_id, course_id)
+        if clash is not None:
+            return Outcome(student_id, course_id, REJECTED, f"Course {course_id} clashes with course {clash}")
+
+        self.changed_courses.add(course_id)
+        if seats.has_seat():
+            seats.enrolled[student_id] = None
+            self._registration(student_id, course_id, True)
+            return Outcome(student_id, course_id, ENROLLED)
+        position = seats.wait(student_id)
+        return Outcome(student_id, course_id, WAITLISTED, f"Waitlist position {position}")
+
+    def drop(self, student_id, course_id):
+        seats = self.courses.get(course_id)
+        if seats is None:
+            return Outcome(student_id, course_id, REJECTED, f"Course {course_id} does not exist")
+        if seats.leave(student_id):
+            self.changed_courses.add(course_id)
+            return Outcome(student_id, course_id, DROPPED, "Left the waitlist")
+        if student_id not in seats.enrolled:
+            return Outcome(student_id, course_id, REJECTED, "This student is not registered in the course")
+
+        del seats.enrolled[student_id]
+        self.changed_courses.add(course_id)
+        self._registration(student_id, course_id, False)
+        promoted = self._promote(course_id)
+        return Outcome(student_id, course_id, DROPPED, promoted=promoted[0] if promoted else None)
+
+    def set_capacity(self, course_id, capacity):
+        # Raising the capacity promotes waitlisted students straight away
+        if capacity is not None and (type(capacity) is not int or capacity < 0):
+            raise ValueError("Capacity must be a non-negative integer")
+        seats = self.courses[course_id]
+        seats.capacity = capacity
+        self.changed_courses.add(course_id)
+        return self._promote(course_id)
+
+    def process(self, requests):
+        # One pass over (action, student_id, course_id) requests, action being 'register' or 'drop'
+        outcomes = []
+        for action, student_id, course_id in requests:
+            if action == 'drop':
+                outcomes.append(self.drop(student_id, course_id))
+            elif action == 'register':
+                outcomes.append(self.request(student_id, course_id))
+            else:
+                outcomes.append(Outcome(student_id, course_id, REJECTED, f"Unknown action '{action}'"))
+        return outcomes
+
+    def commit(self, students_file='Data/students.json', courses_file='Data/courses.json', students=None):
+        # One write per file for everything processed since the last commit. If the student
+        # write fails the course records are put back, so neither file describes half a batch;
+        # that rollback needs the process to survive, a crash between the writes is not undone.
+        if not self.changed_courses:
+            return 0
+        course_records = [self.courses[course_id].to_record() for course_id in self.changed_courses]
+        student_records = []
+        if self.registrations:
+            if students is None:
+                students = {record['student_id']: record for record in load_records(students_file)
+                            if record['student_id'] in self.registrations}
+            for student_id, changes in self.registrations.items():
+                record = students.get(student_id)
+                if record is None:
+                    continue
+                registered = dict.fromkeys(record['registered_courses'])
+                for course_id, is_registered in changes.items():
+                    if is_registered:
+                        registered[course_id] = None
+                    else:
+                        registered.pop(course_id, None)
+                student_records.append(dict(record, registered_courses=list(registered)))
+
+        from .reports import record_seats
+        replace_records(courses_file, 'course_id', course_records)
+        try:
+            replace_records(students_file, 'student_id', student_records)
+        except Exception:
+            replace_records(courses_file, 'course_id', [self.courses[course_id].record for course_id in self.changed_courses])
+            raise
+        record_seats(students_file, courses_file, course_records, student_records)
+        for record in student_records:
+            students[record['student_id']] = record
+        for seats in (self.courses[course_id] for course_id in self.changed_courses):
+            seats.record = seats.to_record()
+        self.changed_courses.clear()
+        self.registrations.clear()
+        return len(course_records) + len(student_records)
+
+def load_seats(students_file='Data/students.json', courses_file='Data/courses.json'):
+    students = {record['student_id']: record for record in load_records(students_file)}
+    return SeatMap(load_records(courses_file), students=students)
+
+def allocate(requests, students_file='Data/students.json', courses_file='Data/courses.json'):
+    # Processes a queue of registration requests against the files and writes the result once
+    with instrumentation.timer('seats.allocate'):
+        seat_map = load_seats(students_file, courses_file)
+        outcomes = seat_map.process(requests)
+        seat_map.commit(students_file, courses_file, seat_map.students)
+    instrumentation.increment('seats.requests', len(outcomes))
+    return outcomes
+
+def set_capacity(course_id, capacity, students_file='Data/students.json', courses_file='Data/courses.json'):
+    seat_map = load_seats(students_file, courses_file)
+    if course_id not in seat_map.courses:
+        raise ValueError(f"Course {course_id} does not exist")
+    promoted = seat_map.set_capacity(course_id, capacity)
+    seat_map.commit(students_file, courses_file, seat_map.students)
+    return promoted
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m OOP.seats REQUESTS.csv  (columns: action,student_id,course_id)")
+    with open(sys.argv[1], newline='') as f:
+        rows = [(row['action'], row['student_id'], row['course_id']) for row in csv.DictReader(f)]
+    for outcome in allocate(rows):
+        print(outcome.student_id, outcome.course_id, outcome.status, outcome.message)
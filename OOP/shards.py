@@ -0,0 +1,114 @@
+from bisect import bisect_right
+import json
+import os
+import sys
+import zlib
+
+# A sharded data file is replaced by a manifest (<stem>.manifest.json) listing shard files
+# (<stem>.shard<N>.json) that sit next to it. Each shard is an ordinary data file, so
+# snapshots and record files work per shard. The manifest generation is bumped on every
+# write, which gives the logical file a signature that changes like a real file's would.
+VERSION = 1
+STRATEGIES = ('hash', 'range')
+
+_manifests = {}
+
+def manifest_path(filename):
+    return os.path.splitext(filename)[0] + '.manifest.json'
+
+def read_manifest(filename):
+    path = manifest_path(filename)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        _manifests.pop(path, None)
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _manifests.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != VERSION or manifest.get('strategy') not in STRATEGIES:
+        raise ValueError(f"Unsupported shard manifest {path}")
+    _manifests[path] = (signature, manifest)
+    return manifest
+
+def write_manifest(filename, manifest):
+    path = manifest_path(filename)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(temp_path, path)
+
+def bump_generation(filename, manifest):
+    manifest['generation'] = manifest.get('generation', 0) + 1
+    write_manifest(filename, manifest)
+
+def shard_paths(filename, manifest):
+    directory = os.path.dirname(filename)
+    return [os.path.join(directory, shard['file']) for shard in manifest['shards']]
+
+def shard_index(manifest, record_id):
+    if manifest['strategy'] == 'hash':
+        # crc32 rather than hash() so every process agrees on the placement
+        return zlib.crc32(str(record_id).encode()) % len(manifest['shards'])
+    lowers = [shard['lower'] for shard in manifest['shards'][1:]]
+    return bisect_right(lowers, str(record_id))
+
+def shard_for(filename, manifest, record_id):
+    return shard_paths(filename, manifest)[shard_index(manifest, record_id)]
+
+def partition(manifest, records):
+    parts = [[] for _ in manifest['shards']]
+    id_field = manifest['id_field']
+    for record in records:
+        parts[shard_index(manifest, record[id_field])].append(record)
+    return parts
+
+def shard_file(filename, id_field, count=8, strategy='hash'):
+    # Splits an existing data file into shards; the original file is removed afterwards
+    from .storage import load_records, write_json
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown shard strategy '{strategy}'")
+    if read_manifest(filename) is not None:
+        raise ValueError(f"{filename} is already sharded")
+    if count < 1:
+        raise ValueError("A sharded file needs at least one shard")
+
+    records = load_records(filename)
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    shards = [{'file': f"{stem}.shard{index}.json"} for index in range(count)]
+    if strategy == 'range':
+        # Lower bounds taken from the current IDs so the shards start out evenly filled
+        ids = sorted(str(record[id_field]) for record in records)
+        for index, shard in enumerate(shards):
+            shard['lower'] = ids[index * len(ids) // count] if index and ids else ''
+    manifest = {'version': VERSION, 'id_field': id_field, 'strategy': strategy, 'shards': shards, 'generation': 0}
+
+    for path, part in zip(shard_paths(filename, manifest), partition(manifest, records)):
+        write_json(path, part)
+    write_manifest(filename, manifest)
+    if os.path.exists(filename):
+        os.remove(filename)
+    return manifest_path(filename)
+
+def unshard_file(filename):
+    from .storage import load_records, write_json
+    manifest = read_manifest(filename)
+    if manifest is None:
+        raise ValueError(f"{filename} is not sharded")
+    records = load_records(filename)
+    paths = shard_paths(filename, manifest)
+    os.remove(manifest_path(filename))
+    _manifests.pop(manifest_path(filename), None)
+    write_json(filename, records)
+    for path in paths:
+        os.remove(path)
+    return filename
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit("usage: python -m OOP.shards DATA_FILE ID_FIELD [COUNT] [hash|range]")
+    print(shard_file(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 8,
+                     sys.argv[4] if len(sys.argv) > 4 else 'hash'))
@@ -0,0 +1,89 @@
+import gc
+import json
+import marshal
+import os
+import struct
+import sys
+import zlib
+
+# Snapshot layout: fixed header followed by the record list in marshal format, which decodes
+# faster than JSON. Snapshots sit in Data/ next to the files anyone can edit, so only plain
+# data is accepted: marshal never runs code, the payload must match its checksum, and the
+# result must be a list of dicts. The marshal format can change between Python versions, so
+# the header records the version that wrote it and a snapshot from another one is ignored.
+# The header also stores the mtime/size of the JSON file the snapshot was taken from, so a
+# snapshot is only used while that JSON file is unchanged.
+MAGIC = b'SMSSNAP\0'
+VERSION = 3
+CODEC = (sys.version_info[0] << 8 | sys.version_info[1], marshal.version)
+_HEADER = struct.Struct('<8sHHBqQQI')
+
+def snapshot_path(filename):
+    return os.path.splitext(filename)[0] + '.snap'
+
+def _source_signature(filename):
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def write_snapshot(filename, records):
+    signature = _source_signature(filename)
+    if signature is None:
+        raise FileNotFoundError(f"Cannot snapshot missing file {filename}")
+    payload = marshal.dumps(records)
+    header = _HEADER.pack(MAGIC, VERSION, *CODEC, signature[0], signature[1], len(payload), zlib.crc32(payload))
+
+    path = snapshot_path(filename)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(temp_path, path)
+    return path
+
+def read_snapshot(filename):
+    signature = _source_signature(filename)
+    if signature is None:
+        return None
+    try:
+        with open(snapshot_path(filename), 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                return None
+            magic, version, python, marshal_version, mtime_ns, size, length, checksum = _HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION or (python, marshal_version) != CODEC:
+                return None
+            if (mtime_ns, size) != signature:
+                return None
+            payload = f.read(length)
+    except FileNotFoundError:
+        return None
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        return None
+    # Every container decoded here is new and alive, so cyclic collections during the decode
+    # would only walk the growing heap; they are paused until it is done
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        records = marshal.loads(payload)
+    except (EOFError, ValueError, TypeError):
+        return None
+    finally:
+        if collecting:
+            gc.enable()
+    if type(records) is not list or not all(type(record) is dict for record in records):
+        return None
+    return records
+
+def build_snapshot(filename):
+    with open(filename, 'r') as f:
+        records = json.load(f)
+    if not isinstance(records, list):
+        raise ValueError(f"{filename} does not contain a list of records")
+    return write_snapshot(filename, records)
+
+if __name__ == '__main__':
+    for filename in sys.argv[1:] or ['Data/students.json', 'Data/instructors.json', 'Data/courses.json']:
+        print(f"{filename} -> {build_snapshot(filename)}")
@@ -0,0 +1,382 @@
+from . import instrumentation
+from .recordfile import RecordFile, read_header
+from .shards import bump_generation, manifest_path, partition, read_manifest, shard_for, shard_paths
+from .snapshot import read_snapshot, snapshot_path, write_snapshot
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import errno
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Data files are written compactly; pretty output is reserved for exports.
+# Set SMS_PRETTY_JSON=1 to keep the old indented layout for the data files too.
+PRETTY_OUTPUT = os.environ.get('SMS_PRETTY_JSON') == '1'
+# Use orjson for parsing and serialising when it is installed
+USE_FAST_JSON = orjson is not None
+
+# Open record files (see recordfile.py), keyed by the path of their data file
+_record_files = {}
+# Data files whose record file this process appended to
+_written_record_files = set()
+# Signature of each file just before and just after the last write made by this process
+_last_writes = {}
+# Callbacks told about record-level changes (see add_change_listener)
+_change_listeners = []
+
+def dumps(data, pretty=False):
+    if USE_FAST_JSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(data, indent=4).encode()
+    return json.dumps(data, separators=(',', ':')).encode()
+
+def loads(payload):
+    if USE_FAST_JSON:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+@instrumentation.timed('storage.read')
+def load_records(filename):
+    manifest = read_manifest(filename)
+    if manifest is not None:
+        return [record for records in map_shards(filename, _read_file, manifest) for record in records]
+    return _read_file(filename)
+
+def check_exists(filename):
+    # Raises FileNotFoundError for a data file that is neither on disk nor sharded, as opening it would
+    if not os.path.exists(filename) and read_manifest(filename) is None:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
+
+def _read_file(filename):
+    record_file = _pending_record_file(filename)
+    if record_file is not None:
+        instrumentation.increment('record_file.read')
+        return list(record_file.records())
+
+    records = read_snapshot(filename)
+    if records is not None:
+        instrumentation.increment('snapshot.hit')
+        return records
+    instrumentation.increment('snapshot.miss')
+
+    try:
+        with open(filename, 'rb') as f:
+            data = loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return []
+    if not isinstance(data, list):
+        return []
+    return data
+
+@instrumentation.timed('storage.write')
+def write_json(filename, data, pretty=None):
+    if pretty is None:
+        pretty = PRETTY_OUTPUT
+    manifest = read_manifest(filename) if isinstance(data, list) else None
+    if manifest is not None:
+        before = file_signature(filename)
+        for path, part in zip(shard_paths(filename, manifest), partition(manifest, data)):
+            _write_file(path, part, pretty)
+        _touch_manifest(filename, manifest, before)
+        return
+    _write_file(filename, data, pretty)
+
+def _write_file(filename, data, pretty):
+    before = file_signature(filename)
+    _write_payload(filename, dumps(data, pretty))
+    if isinstance(data, list):
+        record_file = _existing_record_file(filename)
+        if record_file is not None:
+            # A whole-file write replaces whatever the record file held
+            record_file.rebuild(data, _json_signature(filename))
+        if os.path.exists(snapshot_path(filename)):
+            write_snapshot(filename, data)
+    _last_writes[os.path.normpath(filename)] = (before, file_signature(filename))
+
+def _write_payload(filename, payload):
+    # Write to a temporary file first so readers never see a half-written file
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as f:
+        f.write(payload)
+    os.replace(temp_filename, filename)
+
+def export_json(filename, data):
+    write_json(filename, data, pretty=True)
+
+def file_signature(filename):
+    signature = _json_signature(filename)
+    if signature is None:
+        # A sharded file is represented by its manifest, which every write rewrites
+        if filename.endswith('.manifest.json') or not os.path.exists(manifest_path(filename)):
+            return None
+        return file_signature(manifest_path(filename))
+    # While a record file holds the data its appends are the writes, so the signature follows
+    # the record file; copying its entries into the JSON file leaves the signature alone
+    header = read_header(record_file_path(filename))
+    if header is not None and header[0] == signature:
+        return ('records', header[3], header[4])
+    return signature
+
+def _json_signature(filename):
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def map_shards(filename, function, manifest=None, executor=None):
+    # Applies function to every shard path of a sharded file, by default on a thread pool;
+    # pass a ProcessPoolExecutor for CPU-bound scans with a picklable function
+    manifest = manifest or read_manifest(filename)
+    paths = shard_paths(filename, manifest)
+    if executor is not None:
+        return list(executor.map(function, paths))
+    with ThreadPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1) or 1) as pool:
+        return list(pool.map(function, paths))
+
+def _touch_manifest(filename, manifest, before):
+    bump_generation(filename, manifest)
+    _last_writes[os.path.normpath(filename)] = (before, file_signature(filename))
+
+def _group_by_shard(filename, manifest, records, id_field):
+    groups = {}
+    for record in records:
+        groups.setdefault(shard_for(filename, manifest, record[id_field]), []).append(record)
+    return groups
+
+def last_write(filename):
+    return _last_writes.get(os.path.normpath(filename))
+
+def record_file_path(filename):
+    return os.path.splitext(filename)[0] + '.rec'
+
+def build_record_file(filename, id_field):
+    manifest = read_manifest(filename)
+    if manifest is not None:
+        return [build_record_file(path, id_field) for path in shard_paths(filename, manifest)]
+    records = load_records(filename)
+    key = os.path.normpath(filename)
+    if key in _record_files:
+        _record_files.pop(key).close()
+    path = record_file_path(filename)
+    _record_files[key] = RecordFile.build(path, records, id_field, _json_signature(filename) or (0, 0))
+    return path
+
+# Record files are opt-in: they are only used once built for a data file. From then on the
+# record file is where record-level writes go: replace_records, delete_records and
+# append_records append to it and leave the JSON file as it is. Reads never write: while
+# the record file holds entries the JSON file lacks, load_records reads them from the record
+# file. The JSON file is caught up by sync_record_file, which runs before a compaction, at
+# exit for the files this process wrote, and whenever a maintenance job calls it.
+
+def _existing_record_file(filename):
+    key = os.path.normpath(filename)
+    record_file = _record_files.get(key)
+    if record_file is None:
+        if read_header(record_file_path(filename)) is None:
+            return None
+        record_file = _record_files[key] = RecordFile(record_file_path(filename))
+    else:
+        record_file.refresh()
+    return record_file
+
+def _open_record_file(filename, id_field):
+    record_file = _existing_record_file(filename)
+    if record_file is None:
+        return None
+    if record_file.source_signature != (_json_signature(filename) or (0, 0)):
+        # The JSON file was changed by something that did not go through this module; it
+        # wins over any record file entries that had not been copied into it yet
+        record_file.rebuild(load_records(filename), _json_signature(filename) or (0, 0))
+    return record_file
+
+def _pending_record_file(filename):
+    # The record file of filename if it holds entries its JSON file does not have yet
+    record_file = _existing_record_file(filename)
+    if record_file is None or not record_file.pending:
+        return None
+    if record_file.source_signature != (_json_signature(filename) or (0, 0)):
+        return None
+    return record_file
+
+def sync_record_file(filename):
+    # Copies the live records of the record file into its JSON file (for tools that read the
+    # JSON file directly); returns whether there was anything to copy
+    manifest = read_manifest(filename)
+    if manifest is not None:
+        return any([sync_record_file(path) for path in shard_paths(filename, manifest)])
+    record_file = _pending_record_file(filename)
+    if record_file is None:
+        return False
+
+    def write(records):
+        _write_payload(filename, dumps(records, PRETTY_OUTPUT))
+        if os.path.exists(snapshot_path(filename)):
+            write_snapshot(filename, records)
+        return _json_signature(filename)
+
+    with instrumentation.timer('record_file.sync'):
+        record_file.copy_out(write)
+    return True
+
+def _write_records(record_file, filename, changes):
+    # changes as (record_id, before, after); only the changed records are appended
+    before = file_signature(filename)
+    for record_id, _, record in changes:
+        if record is None:
+            record_file.delete(record_id)
+        else:
+            record_file.put(record_id, record)
+    _written_record_files.add(os.path.normpath(filename))
+    if record_file.needs_compaction:
+        sync_record_file(filename)
+        record_file.compact()
+    _last_writes[os.path.normpath(filename)] = (before, file_signature(filename))
+
+def find_record(filename, id_field, record_id):
+    manifest = read_manifest(filename)
+    if manifest is not None:
+        return find_record(shard_for(filename, manifest, record_id), id_field, record_id)
+    record_file = _open_record_file(filename, id_field)
+    if record_file is not None:
+        instrumentation.increment('record_file.hit')
+        return record_file.get(record_id)
+    instrumentation.increment('record_file.miss')
+    for record in load_records(filename):
+        if record[id_field] == record_id:
+            return record
+    return None
+
+def append_record(filename, id_field, record):
+    append_records(filename, id_field, [record])
+
+def append_records(filename, id_field, new_records):
+    # Adds many records with a single write; callers are responsible for validation and uniqueness
+    new_records = list(new_records)
+    if not new_records:
+        return 0
+    manifest = read_manifest(filename)
+    if manifest is not None:
+        before = file_signature(filename)
+        for path, records in _group_by_shard(filename, manifest, new_records, id_field).items():
+            _append_file(path, id_field, records)
+        _touch_manifest(filename, manifest, before)
+    else:
+        _append_file(filename, id_field, new_records)
+    if _change_listeners:
+        _notify(filename, id_field, [(record[id_field], None, record) for record in new_records])
+    return len(new_records)
+
+def _append_file(filename, id_field, new_records):
+    record_file = _open_record_file(filename, id_field)
+    if record_file is not None:
+        _write_records(record_file, filename, [(record[id_field], None, record) for record in new_records])
+        return
+    records = load_records(filename)
+    records.extend(new_records)
+    write_json(filename, records)
+
+def replace_record(filename, id_field, record):
+    return replace_records(filename, id_field, [record]) == 1
+
+def replace_records(filename, id_field, records):
+    return apply_changes(filename, id_field, updated=records)[0]
+
+def delete_records(filename, id_field, record_ids):
+    return apply_changes(filename, id_field, deleted=record_ids)[1]
+
+def apply_changes(filename, id_field, updated=(), deleted=()):
+    # Replaces and deletes raw records with a single write; nothing is constructed or re-validated
+    updates = {record[id_field]: record for record in updated}
+    deleted = set(deleted)
+    if not updates and not deleted:
+        return 0, 0
+    manifest = read_manifest(filename)
+    if manifest is not None:
+        changes = _apply_sharded_changes(filename, manifest, id_field, updates, deleted)
+    else:
+        changes = _apply_file(filename, id_field, updates, deleted)
+    if changes and _change_listeners:
+        _notify(filename, id_field, changes)
+    replaced = sum(1 for _, _, after in changes if after is not None)
+    return replaced, len(changes) - replaced
+
+def _apply_file(filename, id_field, updates, deleted):
+    # Returns (record_id, before, after) for every record replaced or removed
+    record_file = _open_record_file(filename, id_field)
+    if record_file is not None:
+        changes = []
+        for record_id in deleted:
+            before = record_file.get(record_id)
+            if before is not None:
+                changes.append((record_id, before, None))
+        for record_id, update in updates.items():
+            before = record_file.get(record_id) if record_id not in deleted else None
+            if before is not None:
+                changes.append((record_id, before, update))
+        if changes:
+            _write_records(record_file, filename, changes)
+        return changes
+
+    records = load_records(filename)
+    kept = []
+    changes = []
+    for record in records:
+        record_id = record[id_field]
+        if record_id in deleted:
+            changes.append((record_id, record, None))
+            continue
+        update = updates.get(record_id)
+        if update is not None:
+            changes.append((record_id, record, update))
+            record = update
+        kept.append(record)
+    if changes:
+        write_json(filename, kept)
+    return changes
+
+def _apply_sharded_changes(filename, manifest, id_field, updates, deleted):
+    # Only the shards holding an updated or deleted ID are read and rewritten
+    before = file_signature(filename)
+    updated_by_shard = _group_by_shard(filename, manifest, updates.values(), id_field)
+    deleted_by_shard = {}
+    for record_id in deleted:
+        deleted_by_shard.setdefault(shard_for(filename, manifest, record_id), set()).add(record_id)
+    changes = []
+    for path in set(updated_by_shard) | set(deleted_by_shard):
+        shard_updates = {record[id_field]: record for record in updated_by_shard.get(path, ())}
+        changes += _apply_file(path, id_field, shard_updates, deleted_by_shard.get(path, set()))
+    if changes:
+        _touch_manifest(filename, manifest, before)
+    return changes
+
+def add_change_listener(callback):
+    # callback(filename, id_field, changes) runs after every record-level write, with
+    # changes as (record_id, before, after) tuples; before/after is None for adds/deletes
+    _change_listeners.append(callback)
+    return callback
+
+def remove_change_listener(callback):
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+def _notify(filename, id_field, changes):
+    for callback in list(_change_listeners):
+        callback(filename, id_field, changes)
+
+@atexit.register
+def close_record_files():
+    # The JSON files this process wrote through record files are caught up first, so that
+    # whatever reads them directly next finds every write
+    for filename, record_file in _record_files.items():
+        if not record_file.closed:
+            if filename in _written_record_files:
+                sync_record_file(filename)
+            record_file.close()
+    _record_files.clear()
+    _written_record_files.clear()
@@ -1,5 +1,6 @@
+from .formats import normalize_student, student_record
 from .person import Person
-import json
+from .storage import append_record, check_exists, find_record, load_records, replace_record, write_json
 import re
 
 class Student(Person):
@@ -20,25 +21,66 @@ class Student(Person):
     
     def register_course(self, course):
         from .course import Course
+        from .reports import record_registration
+        from .schedule import schedule_for
         if not isinstance(course, Course):
             raise TypeError("The course parameter must be an instance of Course")
         if self.student_id in course.enrolled_students:
             raise ValueError("This student is already registered in the course")
+        schedule_for().check(('student', self.student_id), self.registered_courses, course.course_id, course.meeting_times)
+        if course.is_full():
+            # A full course queues the student instead; returns False so callers can say so
+            course.join_waitlist(self.student_id)
+            course.update('Data/courses.json')
+            return False
 
         self.registered_courses.append(course.course_id)
         course.add_student(self)
 
         course.update('Data/courses.json')
         self.update_file('Data/students.json')
+        record_registration('Data/students.json', 'Data/courses.json', self.student_id, course.course_id)
+        return True
+
+    def drop_course(self, course):
+        from .course import Course
+        from .schedule import schedule_for
+        from .seats import SeatMap
+        if not isinstance(course, Course):
+            raise TypeError("The course parameter must be an instance of Course")
+        if self.student_id not in course.enrolled_students and self.student_id not in course.waitlist:
+            raise ValueError("This student is not registered in the course")
+
+        # The seat engine frees the place and promotes the first waitlisted student the course
+        # fits; those it would clash for keep their place
+        students = {self.student_id: self.to_json()}
+        for student_id in course.waitlist:
+            record = find_record('Data/students.json', 'student_id', student_id)
+            if record is not None:
+                students[student_id] = record
+        seat_map = SeatMap([course.to_json()], students=students, meetings=schedule_for().meetings)
+        outcome = seat_map.drop(self.student_id, course.course_id)
+        seat_map.commit('Data/students.json', 'Data/courses.json', students)
+
+        record = seat_map.courses[course.course_id].record
+        course.enrolled_students = record['enrolled_students']
+        course.waitlist = record.get('waitlist', [])
+        if course.course_id in self.registered_courses:
+            self.registered_courses.remove(course.course_id)
+        return outcome.promoted
 
     def to_json(self):
-        return {
-            'name': self.name,
-            'age': self.age,
-            'email': self.get_email(),
-            'student_id': self.student_id,
-            'registered_courses': [course_id for course_id in self.registered_courses]
-        }
+        return student_record(self.name, self.age, self.get_email(), self.student_id, self.registered_courses)
+
+    @classmethod
+    def from_json(cls, data):
+        data = normalize_student(data)
+        return cls(data['name'], data['age'], data['email'], data['student_id'], data['registered_courses'])
+
+    @classmethod
+    def query(cls, filepath='Data/students.json'):
+        from .query import Query
+        return Query(cls, filepath, 'student_id')
 
     def save_to_file(self, filepath):
         from .instructor import Instructor
@@ -48,49 +90,24 @@ class Student(Person):
         if not self.is_email_unique(filepath, self.get_email()):
             raise ValueError("Email address already exists!")
 
-        try:
-            with open(filepath, 'r') as file:
-                try:
-                    records = json.load(file)
-                    if not isinstance(records, list):
-                        records = []
-                except json.JSONDecodeError:
-                    records = []
-        except FileNotFoundError:
-            records = []
-
-        records.append(self.to_json())
-
-        with open(filepath, 'w') as file:
-            json.dump(records, file, indent=4)
+        append_record(filepath, 'student_id', self.to_json())
 
     @classmethod
     def is_id_unique(cls, filepath, student_id):
-        existing_ids = cls.get_existing_ids(filepath)
-        return student_id not in existing_ids
+        return find_record(filepath, 'student_id', student_id) is None
 
     @classmethod
     def get_existing_ids(cls, filepath):
-        try:
-            with open(filepath, 'r') as file:
-                try:
-                    records = json.load(file)
-                    if not isinstance(records, list):
-                        records = []
-                except json.JSONDecodeError:
-                    records = []
-        except FileNotFoundError:
-            records = []
+        records = cls._load_json(filepath)
         
         return {student['student_id'] for student in records}
     
     @classmethod
     def get_student_by_id(cls, filepath, student_id):
-        with open(filepath, 'r') as file:
-            records = json.load(file)
-        for student_data in records:
-            if student_data['student_id'] == student_id:
-                return Student(student_data['name'], student_data['age'], student_data['email'], student_data['student_id'], student_data['registered_courses'])
+        check_exists(filepath)
+        student_data = find_record(filepath, 'student_id', student_id)
+        if student_data is not None:
+            return cls.from_json(student_data)
         return None
     
     @classmethod
@@ -102,63 +119,39 @@ class Student(Person):
 
     @classmethod
     def get_existing_emails(cls, filepath):
-        try:
-            with open(filepath, 'r') as file:
-                try:
-                    records = json.load(file)
-                    if not isinstance(records, list):
-                        records = []
-                except json.JSONDecodeError:
-                    records = []
-        except FileNotFoundError:
-            records = []
+        records = cls._load_json(filepath)
 
         return {student['email'] for student in records}
 
     def update_file(self, filepath):
         if not self.is_id_unique(filepath, self.student_id):
-            try:
-                with open(filepath, 'r') as file:
-                    try:
-                        records = json.load(file)
-                        if not isinstance(records, list):
-                            records = []
-                    except json.JSONDecodeError:
-                        records = []
-            except FileNotFoundError:
-                records = []
-
-            for index, student_data in enumerate(records):
-                if student_data['student_id'] == self.student_id:
-                    records[index] = self.to_json()
-                    break
-            else:
+            if not replace_record(filepath, 'student_id', self.to_json()):
                 raise ValueError("Student ID not found!")
 
-            with open(filepath, 'w') as file:
-                json.dump(records, file, indent=4)
-
     @classmethod
     def load_all_students(cls, filepath):
         students_list = []
 
-        with open(filepath, 'r') as file:
-            try:
-                records = json.load(file)
-                if not isinstance(records, list):
-                    records = []
-            except json.JSONDecodeError:
-                records = []
+        check_exists(filepath)
+        records = cls._load_json(filepath)
 
         for student_data in records:
-            student_instance = Student(student_data['name'], student_data['age'], student_data['email'], student_data['student_id'], student_data['registered_courses'])
-            students_list.append(student_instance)
+            students_list.append(cls.from_json(student_data))
 
         return students_list
 
     def delete_from_file(self, filepath):
-        all_students = Student.load_all_students(filepath)
-        updated_students = [student for student in all_students if student.student_id != self.student_id]
-        
-        with open(filepath, 'w') as file:
-            json.dump([student.to_json() for student in updated_students], file, indent=4)
+        self.delete_many(filepath, [self.student_id])
+
+    @classmethod
+    def delete_many(cls, filepath, student_ids):
+        from .references import index_near
+        return index_near(filepath, 'students').delete_students(student_ids)
+
+    @staticmethod
+    def _load_json(filepath):
+        return load_records(filepath)
+
+    @staticmethod
+    def _write_json(filepath, data):
+        write_json(filepath, data)
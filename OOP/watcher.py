@@ -0,0 +1,158 @@
+from . import instrumentation
+from .shards import manifest_path, read_manifest
+from .storage import file_signature, load_records, record_file_path
+import ctypes
+import ctypes.util
+import json
+import os
+import struct
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+_EVENT_HEADER = struct.Struct('iIII')
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    _libc.inotify_init1
+    _libc.inotify_add_watch
+except (OSError, AttributeError, TypeError):
+    _libc = None
+
+class DataWatcher:
+
+    def __init__(self, use_inotify=True):
+        self._files = {}
+        self._subscribers = []
+        self._inotify_fd = None
+        self._watch_dirs = {}
+        if use_inotify and _libc is not None:
+            fd = _libc.inotify_init1(IN_NONBLOCK)
+            if fd >= 0:
+                self._inotify_fd = fd
+
+    @property
+    def uses_inotify(self):
+        return self._inotify_fd is not None
+
+    def watch(self, filename, id_field, records=None, signature=None):
+        # records/signature can be passed in when the file has already been read
+        filename = os.path.normpath(filename)
+        if records is None:
+            signature = self._file_signature(filename)
+            records = self._load_records(filename, id_field)
+        else:
+            records = {record[id_field]: record for record in records}
+        self._files[filename] = {
+            'id_field': id_field,
+            'signature': signature,
+            'records': records
+        }
+        if self._inotify_fd is not None:
+            directory = os.path.dirname(os.path.abspath(filename))
+            if directory not in self._watch_dirs.values():
+                mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+                wd = _libc.inotify_add_watch(self._inotify_fd, directory.encode(), mask)
+                if wd >= 0:
+                    self._watch_dirs[wd] = directory
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def poll(self):
+        if self._inotify_fd is not None:
+            candidates = self._read_inotify_events()
+        else:
+            candidates = list(self._files)
+
+        changed_files = []
+        for filename in candidates:
+            if self._check(filename):
+                changed_files.append(filename)
+        return changed_files
+
+    def close(self):
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def _read_inotify_events(self):
+        candidates = set()
+        while True:
+            try:
+                buffer = os.read(self._inotify_fd, 4096)
+            except BlockingIOError:
+                break
+            if not buffer:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset:offset + length].rstrip(b'\0').decode()
+                offset += length
+                directory = self._watch_dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                for filename in self._files:
+                    # Sharded files announce every write through their manifest, and files with a
+                    # record file through appends to it
+                    if path in (os.path.abspath(filename), os.path.abspath(manifest_path(filename)),
+                                os.path.abspath(record_file_path(filename))):
+                        candidates.add(filename)
+        return candidates
+
+    def _check(self, filename):
+        state = self._files[filename]
+        signature = self._file_signature(filename)
+        if signature == state['signature']:
+            return False
+
+        with instrumentation.timer('watcher.reload'):
+            records = self._load_records(filename, state['id_field'])
+        if records is None:
+            # Caught the file mid-write; try again on the next poll
+            return False
+        old_records = state['records'] or {}
+        added = {record_id: record for record_id, record in records.items() if record_id not in old_records}
+        changed = {record_id: record for record_id, record in records.items()
+                   if record_id in old_records and old_records[record_id] != record}
+        removed = set(old_records) - set(records)
+
+        state['signature'] = signature
+        state['records'] = records
+        if not (added or changed or removed):
+            return False
+
+        for callback in list(self._subscribers):
+            callback(filename, added, changed, removed)
+        return True
+
+    @staticmethod
+    def _file_signature(filename):
+        return file_signature(filename)
+
+    @staticmethod
+    def _load_records(filename, id_field):
+        if read_manifest(filename) is not None or os.path.exists(record_file_path(filename)):
+            return {record[id_field]: record for record in load_records(filename)}
+        try:
+            with open(filename, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, list):
+            return {}
+        return {record[id_field]: record for record in data}
@@ -0,0 +1,121 @@
+"""
+Deterministic synthetic data for the benchmarks.
+
+Writes students, instructors and courses in the ``Data/`` layout used by the
+OOP package. Every record passes the validation in ``OOP/`` and the
+enrollments and assignments are consistent across the three files.
+
+    python -m benchmarks.generate --students 10000 --out /tmp/bench
+"""
+
+import argparse
+import os
+import random
+
+from OOP.storage import write_json
+
+FIRST_NAMES = ['Hassan', 'Ounsi', 'Maya', 'Rami', 'Lina', 'Karim', 'Nour', 'Sara', 'Omar', 'Jad',
+               'Rita', 'Ziad', 'Hala', 'Fadi', 'Dana', 'Tarek', 'Yara', 'Nadim', 'Leila', 'Samir']
+LAST_NAMES = ['Miskawi', 'Kanaan', 'Haddad', 'Khoury', 'Saleh', 'Nasser', 'Aoun', 'Karam', 'Daher',
+              'Frem', 'Hajj', 'Sabbagh', 'Touma', 'Rizk', 'Bitar', 'Mansour']
+DEPARTMENTS = ['EECE', 'CMPS', 'MATH', 'PHYS', 'CHEM', 'BIOL', 'ECON', 'ENGL']
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+
+
+def _person(rng, index, domain):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    email = f"{name.split()[0].lower()}{index}@{domain}"
+    return name, rng.randint(17, 70), email
+
+
+def generate_dataset(students_count, seed=435, courses_per_student=4):
+    """
+    Builds the records for one synthetic dataset.
+
+    There is one course per 20 students and one instructor per two courses.
+
+    :return: The student, instructor and course records.
+    :rtype: tuple of lists
+    """
+    rng = random.Random(seed)
+    courses_count = max(1, students_count // 20)
+    instructors_count = max(1, courses_count // 2)
+
+    instructors = []
+    for index in range(instructors_count):
+        name, age, email = _person(rng, index, 'aub.edu.lb')
+        instructors.append({
+            'name': name,
+            'age': max(age, 25),
+            'email': email,
+            'instructor_id': f"I{index}",
+            'assigned_courses': []
+        })
+
+    courses = []
+    for index in range(courses_count):
+        instructor = instructors[index % instructors_count] if rng.random() < 0.9 else None
+        course_id = f"C{index}"
+        if instructor is not None:
+            instructor['assigned_courses'].append(course_id)
+        courses.append({
+            'course_id': course_id,
+            'course_name': f"{rng.choice(DEPARTMENTS)} {200 + index}",
+            'instructor': instructor,
+            'enrolled_students': []
+        })
+
+    students = []
+    for index in range(students_count):
+        name, age, email = _person(rng, index, 'mail.aub.edu')
+        student_id = f"S{index}"
+        registered = rng.sample(range(courses_count), min(courses_count, rng.randint(0, courses_per_student)))
+        for course_index in registered:
+            courses[course_index]['enrolled_students'].append(student_id)
+        students.append({
+            'name': name,
+            'age': age,
+            'email': email,
+            'student_id': student_id,
+            'registered_courses': [f"C{course_index}" for course_index in registered]
+        })
+
+    # Courses embed a copy of their instructor as it was when the course was written
+    for course in courses:
+        if course['instructor'] is not None:
+            course['instructor'] = dict(course['instructor'], assigned_courses=list(course['instructor']['assigned_courses']))
+
+    return students, instructors, courses
+
+
+def write_dataset(directory, students_count, seed=435):
+    """
+    Generates a dataset and writes it under ``directory/Data``.
+
+    :return: The path of the ``Data`` directory.
+    :rtype: str
+    """
+    students, instructors, courses = generate_dataset(students_count, seed)
+    data_dir = os.path.join(directory, 'Data')
+    os.makedirs(data_dir, exist_ok=True)
+    write_json(os.path.join(data_dir, 'students.json'), students)
+    write_json(os.path.join(data_dir, 'instructors.json'), instructors)
+    write_json(os.path.join(data_dir, 'courses.json'), courses)
+    return data_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic school dataset")
+    parser.add_argument('--scale', choices=SCALES, help="preset dataset size")
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=435)
+    parser.add_argument('--out', default='.', help="directory that will contain Data/")
+    args = parser.parse_args(argv)
+
+    count = SCALES[args.scale] if args.scale else args.students
+    print(write_dataset(args.out, count, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Scenario benchmarks for the persistence paths of the OOP package.
+
+Each scenario runs against a fresh copy of a synthetic dataset in the
+``Data/`` layout and is timed end to end. Results can be written as JSON
+and compared with an earlier run to catch regressions.
+
+    python -m benchmarks.persistence --scale 10k --output results.json
+    python -m benchmarks.persistence --scale 10k --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import SCALES, write_dataset
+from OOP import loader, storage
+from OOP.course import Course
+from OOP.snapshot import build_snapshot
+from OOP.student import Student
+
+STUDENTS_FILE = 'Data/students.json'
+COURSES_FILE = 'Data/courses.json'
+
+
+def scenario_bulk_add(rng, students_count, ops):
+    for index in range(ops):
+        Student('Bench Student', 20, f"bench{index}@mail.aub.edu", f"B{index}", []).save_to_file(STUDENTS_FILE)
+
+
+def scenario_lookup(rng, students_count, ops):
+    for _ in range(ops):
+        Student.get_student_by_id(STUDENTS_FILE, f"S{rng.randrange(students_count)}")
+
+
+def scenario_update(rng, students_count, ops):
+    for _ in range(ops):
+        student = Student.get_student_by_id(STUDENTS_FILE, f"S{rng.randrange(students_count)}")
+        student.age += 1
+        student.update_file(STUDENTS_FILE)
+
+
+def scenario_register(rng, students_count, ops):
+    courses_count = max(1, students_count // 20)
+    done = 0
+    while done < ops:
+        student = Student.get_student_by_id(STUDENTS_FILE, f"S{rng.randrange(students_count)}")
+        course = Course.load_course_by_id(COURSES_FILE, f"C{rng.randrange(courses_count)}")
+        if student.student_id in course.enrolled_students:
+            continue
+        student.register_course(course)
+        done += 1
+
+
+def scenario_search(rng, students_count, ops):
+    for _ in range(ops):
+        name = rng.choice(['Hassan', 'Maya', 'Omar'])
+        [student for student in Student.load_all_students(STUDENTS_FILE) if student.name.startswith(name)]
+
+
+def scenario_load_courses(rng, students_count, ops):
+    for _ in range(ops):
+        Course.load_all_courses_fully(COURSES_FILE)
+
+
+def scenario_delete(rng, students_count, ops):
+    for student_id in rng.sample(range(students_count), ops):
+        Student.get_student_by_id(STUDENTS_FILE, f"S{student_id}").delete_from_file(STUDENTS_FILE)
+
+
+def scenario_startup_sequential(rng, students_count, ops):
+    # What the apps did before OOP.loader: one file after another, objects built in-process
+    for _ in range(ops):
+        for kind, filename in loader.DATA_FILES.items():
+            loader.construct_chunk('OOP', kind, storage.load_records(filename))
+
+
+def scenario_startup_load(rng, students_count, ops):
+    for _ in range(ops):
+        loader.load_dataset()
+
+
+# A new interpreter that reads the three data files the way both apps do at startup
+COLD_START = "from OOP import storage\nfor filename in {files!r}:\n    storage.load_records(filename)\n"
+
+
+def scenario_cold_start(rng, students_count, ops):
+    script = COLD_START.format(files=list(loader.DATA_FILES.values()))
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    for _ in range(ops):
+        subprocess.run([sys.executable, '-c', script], env=env, check=True)
+
+
+def build_snapshots():
+    for filename in loader.DATA_FILES.values():
+        build_snapshot(filename)
+
+
+SCENARIOS = {
+    'bulk_add': scenario_bulk_add,
+    'lookup': scenario_lookup,
+    'update': scenario_update,
+    'register': scenario_register,
+    'search': scenario_search,
+    'load_courses_fully': scenario_load_courses,
+    'delete': scenario_delete,
+    'startup_sequential': scenario_startup_sequential,
+    'startup_load': scenario_startup_load,
+    'cold_start_json': scenario_cold_start,
+    'cold_start_snapshot': scenario_cold_start,
+}
+
+# Run before the timed part of a scenario
+SETUP = {
+    'cold_start_snapshot': build_snapshots,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(students_count, ops, scenarios, seed=435, record_files=False):
+    """
+    Runs the scenarios and returns one result per scenario.
+
+    :param students_count: The size of the synthetic dataset.
+    :param ops: The number of operations per scenario.
+    :param scenarios: The names of the scenarios to run.
+    :param seed: The seed for both the dataset and the operations.
+    :param record_files: Whether to build the ID-indexed record files first.
+    :rtype: list of dict
+    """
+    results = []
+    original_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'source')
+        write_dataset(source, students_count, seed)
+        for name in scenarios:
+            workdir = os.path.join(directory, name)
+            shutil.copytree(source, workdir)
+            os.chdir(workdir)
+            try:
+                if record_files:
+                    storage.build_record_file(STUDENTS_FILE, 'student_id')
+                    storage.build_record_file(COURSES_FILE, 'course_id')
+                if name in SETUP:
+                    SETUP[name]()
+                rng = random.Random(seed)
+                start = time.perf_counter()
+                SCENARIOS[name](rng, students_count, ops)
+                elapsed = time.perf_counter() - start
+            finally:
+                storage.close_record_files()
+                os.chdir(original_directory)
+            results.append({
+                'scenario': name,
+                'students': students_count,
+                'ops': ops,
+                'record_files': record_files,
+                'total_s': elapsed,
+                'per_op_ms': elapsed * 1000 / ops,
+            })
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Lists the scenarios that got slower than the baseline by more than `threshold`.
+
+    :rtype: list of str
+    """
+    key = lambda row: (row['scenario'], row['students'], row['ops'], row.get('record_files', False))
+    previous = {key(row): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        old = previous.get(key(row))
+        if old and row['per_op_ms'] > old['per_op_ms'] * threshold:
+            regressions.append(f"{row['scenario']}: {old['per_op_ms']:.3f} ms -> {row['per_op_ms']:.3f} ms per op")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OOP persistence paths")
+    parser.add_argument('--scale', choices=SCALES, default='1k')
+    parser.add_argument('--ops', type=int, default=50, help="operations per scenario")
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help="run only these scenarios")
+    parser.add_argument('--seed', type=int, default=435)
+    parser.add_argument('--record-files', action='store_true', help="build the ID-indexed record files first")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', help="fail if slower than this earlier JSON result file")
+    parser.add_argument('--threshold', type=float, default=1.2, help="allowed slowdown ratio for --compare")
+    args = parser.parse_args(argv)
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'record_files': args.record_files,
+        'results': run(SCALES[args.scale], args.ops, args.scenario or list(SCENARIOS), args.seed, args.record_files),
+    }
+
+    for row in report['results']:
+        print(f"{row['scenario']:<20}{row['ops']:>6} ops{row['total_s']:>10.3f} s{row['per_op_ms']:>12.3f} ms/op")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare(report['results'], json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
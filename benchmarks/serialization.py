@@ -0,0 +1,112 @@
+"""
+Compares the size and write/read time of the data files in the old indented
+layout against the compact layout and, when installed, orjson.
+
+Run from the repository root:
+
+    python -m benchmarks.serialization --scale 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from OOP import storage
+
+DATA_FILES = ['Data/students.json', 'Data/instructors.json', 'Data/courses.json']
+
+
+def scale_records(records, count):
+    """
+    Repeats the records of a real data file until there are `count` of them.
+
+    Only the first key ending in ``_id`` is rewritten so that the copies stay unique.
+    """
+    if not records:
+        return []
+    id_field = next(key for key in records[0] if key.endswith('_id'))
+    scaled = []
+    for index in range(count):
+        record = dict(records[index % len(records)])
+        record[id_field] = f"{record[id_field]}x{index}"
+        scaled.append(record)
+    return scaled
+
+
+def time_call(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_file(filename, count, repeat):
+    with open(filename, 'r') as f:
+        records = scale_records(json.load(f), count)
+
+    def write_indented(path):
+        with open(path, 'w') as f:
+            json.dump(records, f, indent=4)
+
+    def write_compact(path):
+        with open(path, 'w') as f:
+            json.dump(records, f, separators=(',', ':'))
+
+    def write_orjson(path):
+        with open(path, 'wb') as f:
+            f.write(storage.orjson.dumps(records))
+
+    writers = [('indent=4 (old)', write_indented), ('compact json', write_compact)]
+    if storage.orjson is not None:
+        writers.append(('compact orjson', write_orjson))
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'records.json')
+        for label, writer in writers:
+            write_time = time_call(lambda: writer(path), repeat)
+            with open(path, 'rb') as f:
+                payload = f.read()
+            read_time = time_call(lambda: json.loads(payload), repeat)
+            fast_read_time = time_call(lambda: storage.orjson.loads(payload), repeat) if storage.orjson else None
+            results.append({
+                'file': filename,
+                'records': count,
+                'format': label,
+                'bytes': len(payload),
+                'write_s': write_time,
+                'read_json_s': read_time,
+                'read_orjson_s': fast_read_time,
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10000, help="records per file")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="print machine-readable results")
+    args = parser.parse_args(argv)
+
+    results = []
+    for filename in DATA_FILES:
+        results.extend(bench_file(filename, args.scale, args.repeat))
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{'file':<24}{'format':<18}{'bytes':>12}{'write ms':>10}{'read ms':>10}{'orjson ms':>11}")
+    for row in results:
+        fast = f"{row['read_orjson_s'] * 1000:>11.1f}" if row['read_orjson_s'] is not None else f"{'-':>11}"
+        print(f"{row['file']:<24}{row['format']:<18}{row['bytes']:>12}"
+              f"{row['write_s'] * 1000:>10.1f}{row['read_json_s'] * 1000:>10.1f}{fast}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,41 @@
 import tkinter as tk
 from tkinter import ttk
+from tkinter import filedialog
 from tkinter import messagebox
+from OOP import instrumentation
+from OOP.catalogue import CourseCatalogue
 from OOP.course import Course
+from OOP.history import CommandLog
 from OOP.instructor import Instructor
+from OOP.labels import labels_for
+from OOP.loader import load_dataset
+from OOP.references import index_for, start_periodic_check
+from OOP.registration import RegistrationQueue
+from OOP.reports import report_for
+from OOP.seats import ENROLLED, WAITLISTED
 from OOP.student import Student
+from OOP.watcher import DataWatcher
+import os
 import re
 
+# Maximum number of courses listed in a course combobox at once
+COURSE_CHOICES_LIMIT = 100
+
+# How often the data files are checked for changes made by other desks
+DATA_POLL_INTERVAL_MS = 1000
+
+# Registrations are queued and committed together once per slice
+REGISTRATION_SLICE_MS = 200
+
+# Every edit and deletion made here is appended to this log; see OOP/history.py
+HISTORY_FILE = 'Data/history.jsonl'
+
+DATA_FILES = {
+    'student': ('Data/students.json', 'student_id'),
+    'instructor': ('Data/instructors.json', 'instructor_id'),
+    'course': ('Data/courses.json', 'course_id'),
+}
+
 class SchoolManagementApp:
     '''
     The SchoolManagementApp class creates a GUI for managing students, instructors, and courses.
@@ -33,6 +63,7 @@ class SchoolManagementApp:
         self.button_frame = tk.Frame(self.root)
         self.button_frame.pack(side="bottom", pady=10)
         self.display_frame = tk.Frame(self.root)
+        self.report_frame = tk.Frame(self.root)
 
         # Main menu UI components
         tk.Label(self.main_menu_frame, text="School Management System", font=("Arial", 20, "bold")).pack(pady=20)
@@ -54,8 +85,22 @@ class SchoolManagementApp:
         self.display_courses_button.pack(pady=5)
         self.search_button = tk.Button(self.main_menu_frame, text="Search", command=self.show_search_form)
         self.search_button.pack(pady=5)
+        self.report_button = tk.Button(self.main_menu_frame, text="Enrollment Report", command=self.display_report)
+        self.report_button.pack(pady=5)
         self.main_menu_frame.pack(fill="both", expand=True)
 
+        # Load and validate the data files once and seed the catalogue and the watcher with them
+        self.dataset = load_dataset(*(filename for filename, _ in DATA_FILES.values()))
+        preloaded = {filename: (self.dataset.records[kind + 's'], self.dataset.signatures[filename])
+                     for kind, (filename, _) in DATA_FILES.items()}
+        rejected = ", ".join(f"{count} {kind}" for kind, count in self.dataset.rejected.items() if count)
+        if rejected:
+            messagebox.showwarning("Warning", f"Some records in the data files are not valid: {rejected}")
+
+        # Course choices shared by the register and assign forms
+        self.course_catalogue = CourseCatalogue('Data/courses.json')
+        self.course_catalogue.load(*preloaded['Data/courses.json'])
+
         # Create forms
         self.create_student_form()
         self.create_instructor_form()
@@ -64,6 +109,115 @@ class SchoolManagementApp:
         self.create_assign_instructor_form()
         self.create_search_form()
 
+        # Pick up edits made to the data files outside this window
+        self.displayed_category = None
+        self.display_is_complete = False
+        self.data_watcher = DataWatcher()
+        for filename, id_field in DATA_FILES.values():
+            self.data_watcher.watch(filename, id_field, *preloaded[filename])
+        self.data_watcher.subscribe(self.on_data_file_changed)
+        self.root.after(DATA_POLL_INTERVAL_MS, self.poll_data_files)
+
+        # Edits and deletions can be undone; the views follow through the data watcher
+        self.history = CommandLog(HISTORY_FILE)
+        self.root.bind('<Control-z>', self.undo)
+        self.root.bind('<Control-y>', self.redo)
+
+        # Created up front so registrations and assignments made here keep its counters current
+        self.enrollment_report = report_for()
+
+        self.registrations = RegistrationQueue()
+        self.root.after(REGISTRATION_SLICE_MS, self.process_registrations)
+        instrumentation.start_periodic_log()
+        # Dangling references left by edits outside the app are logged from a background thread
+        self.integrity_check = start_periodic_check(index_for())
+
+    def poll_data_files(self):
+        '''Checks the data files for external changes and schedules the next check.'''
+        self.data_watcher.poll()
+        self.root.after(DATA_POLL_INTERVAL_MS, self.poll_data_files)
+
+    def process_registrations(self):
+        '''Commits the registrations queued since the last slice and schedules the next one.'''
+        try:
+            self.registrations.process_pending()
+        finally:
+            # An error in one slice must not stop the registrations for the rest of the session
+            self.root.after(REGISTRATION_SLICE_MS, self.process_registrations)
+
+    def on_registration_done(self, outcome):
+        '''Reports the outcome of a queued registration.
+
+        :param outcome: The outcome of the request.
+        :type outcome: OOP.seats.Outcome
+        '''
+        if outcome.status == ENROLLED:
+            messagebox.showinfo("Success", "Student registered for the course successfully")
+        elif outcome.status == WAITLISTED:
+            messagebox.showinfo("Waitlisted", f"The course is full; the student was added to its waitlist ({outcome.message})")
+        else:
+            messagebox.showerror("Error", outcome.message)
+
+    def undo(self, event=None):
+        '''Reverts the last edit or deletion.'''
+        if self.history.undo() is None:
+            messagebox.showinfo("Undo", "Nothing to undo.")
+            return
+        self.data_watcher.poll()
+
+    def redo(self, event=None):
+        '''Applies the last undone edit or deletion again.'''
+        if self.history.redo() is None:
+            messagebox.showinfo("Redo", "Nothing to redo.")
+            return
+        self.data_watcher.poll()
+
+    def on_data_file_changed(self, filename, added, changed, removed):
+        '''Applies the records changed in a data file to the catalogue and the open view.
+
+        :param filename: The data file that changed.
+        :type filename: str
+        :param added: The new records, keyed by ID.
+        :type added: dict
+        :param changed: The modified records, keyed by ID.
+        :type changed: dict
+        :param removed: The IDs of the deleted records.
+        :type removed: set
+        '''
+        category = next((name for name, (path, _) in DATA_FILES.items() if filename == os.path.normpath(path)), None)
+        if category == "course":
+            self.course_catalogue.apply_changes(added, changed, removed)
+
+        if category is None or category != self.displayed_category or not self.tree.winfo_exists():
+            return
+        for record_id in removed:
+            if self.tree.exists(record_id):
+                self.tree.delete(record_id)
+        for record_id, record in changed.items():
+            if self.tree.exists(record_id):
+                self.tree.item(record_id, values=self.record_row(category, record))
+        if self.display_is_complete:
+            for record_id, record in added.items():
+                self.tree.insert('', tk.END, iid=record_id, values=self.record_row(category, record))
+
+    @staticmethod
+    def record_row(category, record):
+        '''Formats a raw data file record the same way the display views do.
+
+        :param category: The type of record ('student', 'instructor', or 'course').
+        :type category: str
+        :param record: The record as stored in the data file.
+        :type record: dict
+        :return: The values for one Treeview row.
+        :rtype: tuple
+        '''
+        if category == "student":
+            return (record['name'], record['age'], record['email'], record['student_id'], ', '.join(record['registered_courses']))
+        if category == "instructor":
+            return (record['name'], record['age'], record['email'], record['instructor_id'], ', '.join(record.get('assigned_courses', [])))
+        instructor = record.get('instructor')
+        return (record['course_id'], record['course_name'], instructor['name'] if instructor else 'None', ', '.join(record.get('enrolled_students', [])))
+
     def create_student_form(self):
         '''Creates the UI for adding a new student.'''
         tk.Label(self.student_frame, text="Add Student", font=("Arial", 16)).pack(pady=10)
@@ -142,16 +296,10 @@ class SchoolManagementApp:
 
         tk.Label(self.register_course_frame, text="Select Course").pack(pady=5)
 
-        courses = Course.load_all_courses('Data/courses.json')
-
-        if courses:
-            self.selected_course_var.set(courses[0])
-            self.course_dropdown = tk.OptionMenu(self.register_course_frame, self.selected_course_var, *courses)
-        else:
-            self.selected_course_var.set("No available courses")
-            self.course_dropdown = tk.OptionMenu(self.register_course_frame, self.selected_course_var, "No available courses")
-
+        self.course_dropdown = ttk.Combobox(self.register_course_frame, textvariable=self.selected_course_var)
+        self.course_dropdown.bind('<KeyRelease>', lambda event: self.filter_course_choices(self.course_dropdown, self.selected_course_var))
         self.course_dropdown.pack()
+        self.course_catalogue.subscribe(lambda catalogue: self.update_course_choices(self.course_dropdown, self.selected_course_var))
 
         tk.Button(self.register_course_frame, text="Register", command=self.register_student_for_course).pack(pady=10)
         tk.Button(self.register_course_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
@@ -170,20 +318,38 @@ class SchoolManagementApp:
 
         tk.Label(self.assign_instructor_frame, text="Select Course").pack(pady=5)
 
-        courses = Course.load_all_courses('Data/courses.json')
-        if courses:
-            self.assign_course_var.set(courses[0]) 
-            self.assign_course_dropdown = tk.OptionMenu(self.assign_instructor_frame, self.assign_course_var, *courses)
-        else:
-            self.assign_course_var.set("No available courses")
-            self.assign_course_dropdown = tk.OptionMenu(self.assign_instructor_frame, self.assign_course_var, "No available courses")
-
+        self.assign_course_dropdown = ttk.Combobox(self.assign_instructor_frame, textvariable=self.assign_course_var)
+        self.assign_course_dropdown.bind('<KeyRelease>', lambda event: self.filter_course_choices(self.assign_course_dropdown, self.assign_course_var))
         self.assign_course_dropdown.pack()
+        self.course_catalogue.subscribe(lambda catalogue: self.update_course_choices(self.assign_course_dropdown, self.assign_course_var))
 
         tk.Button(self.assign_instructor_frame, text="Assign", command=self.assign_instructor_to_course).pack(pady=10)
         tk.Button(self.assign_instructor_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
 
-    def create_display_treeview(self, headers, data, category):
+    def update_course_choices(self, dropdown, selected_var):
+        '''Reloads a course combobox after the course catalogue has changed.
+
+        :param dropdown: The combobox listing the course IDs.
+        :type dropdown: ttk.Combobox
+        :param selected_var: The variable holding the selected course ID.
+        :type selected_var: tkinter.StringVar
+        '''
+        courses = self.course_catalogue.filter("", limit=COURSE_CHOICES_LIMIT)
+        dropdown['values'] = courses
+        if selected_var.get() not in self.course_catalogue.course_names:
+            selected_var.set(courses[0] if courses else "No available courses")
+
+    def filter_course_choices(self, dropdown, selected_var):
+        '''Narrows a course combobox to the courses matching what was typed so far.
+
+        :param dropdown: The combobox listing the course IDs.
+        :type dropdown: ttk.Combobox
+        :param selected_var: The variable holding the typed text.
+        :type selected_var: tkinter.StringVar
+        '''
+        dropdown['values'] = self.course_catalogue.filter(selected_var.get(), limit=COURSE_CHOICES_LIMIT)
+
+    def create_display_treeview(self, headers, data, category, complete=True):
         '''Creates a Treeview for displaying records.
 
         :param headers: The column headers for the Treeview.
@@ -192,6 +358,8 @@ class SchoolManagementApp:
         :type data: list of tuples
         :param category: The category of records being displayed.
         :type category: str
+        :param complete: Whether the view lists every record of the category, so records added elsewhere should appear in it.
+        :type complete: bool
         '''
         for widget in self.display_frame.winfo_children():
             widget.destroy()
@@ -202,8 +370,11 @@ class SchoolManagementApp:
             self.tree.heading(header, text=header)
             self.tree.column(header, width=100)
 
+        id_index = 0 if category == "course" else 3
         for row in data:
-            self.tree.insert('', tk.END, values=row)
+            self.tree.insert('', tk.END, iid=str(row[id_index]), values=row)
+        self.displayed_category = category
+        self.display_is_complete = complete
 
         self.tree.pack(fill="both", expand=True)
 
@@ -213,6 +384,9 @@ class SchoolManagementApp:
         self.delete_button = tk.Button(self.display_frame, text="Delete", command=lambda: self.delete_record(category))
         self.delete_button.pack(side=tk.LEFT, padx=5, pady=10)
 
+        tk.Button(self.display_frame, text="Undo", command=self.undo).pack(side=tk.LEFT, padx=5, pady=10)
+        tk.Button(self.display_frame, text="Redo", command=self.redo).pack(side=tk.LEFT, padx=5, pady=10)
+
         tk.Button(self.display_frame, text="Back to Main Menu", command=self.show_main_menu).pack(side=tk.LEFT, padx=5, pady=10)
 
         self.hide_all_frames()
@@ -241,6 +415,7 @@ class SchoolManagementApp:
         tk.Button(self.search_frame, text="Search", command=self.perform_search).pack(pady=10)
         tk.Button(self.search_frame, text="Back to Main Menu", command=self.show_main_menu).pack(pady=10)
 
+    @instrumentation.action('add_student')
     def add_student(self):
         '''Adds a new student to the system.
 
@@ -265,6 +440,7 @@ class SchoolManagementApp:
         else:
             messagebox.showwarning("Warning", "All fields must be filled")
 
+    @instrumentation.action('add_instructor')
     def add_instructor(self):
         '''Adds a new instructor to the system.
 
@@ -289,6 +465,7 @@ class SchoolManagementApp:
         else:
             messagebox.showwarning("Warning", "All fields must be filled")
 
+    @instrumentation.action('add_course')
     def add_course(self):
         '''Adds a new course to the system.
 
@@ -327,6 +504,7 @@ class SchoolManagementApp:
         self.assign_instructor_frame.pack_forget() 
         self.display_frame.pack_forget()
         self.search_frame.pack_forget()
+        self.report_frame.pack_forget()
 
     def show_student_form(self):
         '''
@@ -364,19 +542,21 @@ class SchoolManagementApp:
     def show_register_course_form(self):
         '''Displays the form for registering a student in a course.
 
-        This method hides all other frames, creates the registration form, and displays it.
+        This method hides all other frames, refreshes the course choices if the
+        course file changed, and displays the registration form.
         '''
         self.hide_all_frames()
-        self.create_register_course_form()
+        self.course_catalogue.refresh()
         self.register_course_frame.pack(fill="both", expand=True)
 
     def show_assign_instructor_form(self):
         '''Displays the form for assigning an instructor to a course.
 
-        This method hides all other frames, creates the assignment form, and displays it.
+        This method hides all other frames, refreshes the course choices if the
+        course file changed, and displays the assignment form.
         '''
         self.hide_all_frames()
-        self.create_assign_instructor_form()
+        self.course_catalogue.refresh()
         self.assign_instructor_frame.pack(fill="both", expand=True)
 
     def show_main_menu(self):
@@ -415,11 +595,13 @@ class SchoolManagementApp:
         self.course_id_var.set("")
         self.course_name_var.set("")
 
+    @instrumentation.action('register_student_for_course')
     def register_student_for_course(self):
         '''Registers a student for a specific course.
 
-        Retrieves the student ID and selected course ID from the input fields,
-        and updates the student's record accordingly.
+        Retrieves the student ID and selected course ID from the input fields
+        and queues the registration; it is validated and written with the other
+        registrations of the same slice, and its outcome is reported when it is.
 
         :raises: ValueError: If any input field is empty.
         '''
@@ -427,22 +609,14 @@ class SchoolManagementApp:
         selected_course_id = self.selected_course_var.get()
 
         if student_id and selected_course_id:
-            try:
-                student = Student.get_student_by_id('Data/students.json', student_id)
-                course = Course.load_course_by_id('Data/courses.json', selected_course_id)
-                if student and course:
-                    student.register_course(course)
-                    messagebox.showinfo("Success", "Student registered for the course successfully")
-                    self.register_student_id_var.set("")
-                    self.selected_course_var.set("")
-                    self.show_main_menu()
-                else:
-                    messagebox.showerror("Error", "Student or Course not found")
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            self.registrations.submit(student_id, selected_course_id, callback=self.on_registration_done)
+            self.register_student_id_var.set("")
+            self.selected_course_var.set("")
+            self.show_main_menu()
         else:
             messagebox.showwarning("Warning", "Please fill in all fields")
 
+    @instrumentation.action('assign_instructor_to_course')
     def assign_instructor_to_course(self):
         '''Assigns an instructor to a specific course.
 
@@ -471,6 +645,7 @@ class SchoolManagementApp:
         else:
             messagebox.showwarning("Warning", "Please fill in all fields")
 
+    @instrumentation.action('display_all_students')
     def display_all_students(self):
         '''Displays all students in the system.
 
@@ -478,9 +653,11 @@ class SchoolManagementApp:
         '''
         students = Student.load_all_students('Data/students.json')
         headers = ["Name", "Age", "Email", "Student ID", "Registered Courses"]
-        data = [(s.name, s.age, s.get_email(), s.student_id, ', '.join(s.registered_courses)) for s in students]
+        labels = labels_for('Data/students.json')
+        data = [(s.name, s.age, s.get_email(), s.student_id, labels.label(s.student_id, s.registered_courses)) for s in students]
         self.create_display_treeview(headers, data,"student")
 
+    @instrumentation.action('display_all_instructors')
     def display_all_instructors(self):
         '''Displays all instructors in the system.
 
@@ -488,9 +665,11 @@ class SchoolManagementApp:
         '''
         instructors = Instructor.load_all_instructors('Data/instructors.json')
         headers = ["Name", "Age", "Email", "Instructor ID", "Courses Taught"]
-        data = [(i.name, i.age, i.get_email(), i.instructor_id, ', '.join(i.assigned_courses)) for i in instructors]
+        labels = labels_for('Data/instructors.json')
+        data = [(i.name, i.age, i.get_email(), i.instructor_id, labels.label(i.instructor_id, i.assigned_courses)) for i in instructors]
         self.create_display_treeview(headers, data,"instructor")
 
+    @instrumentation.action('display_all_courses')
     def display_all_courses(self):
         '''Displays all courses in the system.
 
@@ -498,9 +677,56 @@ class SchoolManagementApp:
         '''
         courses = Course.load_all_courses_fully('Data/courses.json')
         headers = ["Course ID", "Course Name", "Instructor", "Enrolled Students"]
-        data = [(c.course_id, c.course_name, c.instructor.name if c.instructor else 'None', ', '.join(c.enrolled_students)) for c in courses]
+        labels = labels_for('Data/courses.json')
+        data = [(c.course_id, c.course_name, c.instructor.name if c.instructor else 'None', labels.label(c.course_id, c.enrolled_students)) for c in courses]
         self.create_display_treeview(headers, data,"course")
     
+    @instrumentation.action('display_report')
+    def display_report(self):
+        '''Displays the enrollment report.
+
+        Only the data files changed since the report was last shown are read again.
+        '''
+        summary = self.enrollment_report.summary()
+        for widget in self.report_frame.winfo_children():
+            widget.destroy()
+
+        tk.Label(self.report_frame, text="Enrollment Report", font=("Arial", 16)).pack(pady=10)
+        totals = ", ".join(f"{summary[key]} {key}" for key in ('students', 'instructors', 'courses', 'enrollments'))
+        tk.Label(self.report_frame, text=totals).pack(pady=5)
+
+        headers = ["Report", "Key", "Value"]
+        tree = ttk.Treeview(self.report_frame, columns=headers, show='headings')
+        for header in headers:
+            tree.heading(header, text=header)
+            tree.column(header, width=150)
+        for report in ('enrollments_per_course', 'fill_rates', 'courses_per_instructor', 'age_distribution'):
+            for key, value in summary[report].items():
+                tree.insert('', tk.END, values=(report, key, f"{value:.0%}" if report == 'fill_rates' else value))
+        for report in ('unregistered_students', 'unassigned_courses'):
+            for key in summary[report]:
+                tree.insert('', tk.END, values=(report, key, ''))
+        tree.pack(fill="both", expand=True)
+
+        tk.Button(self.report_frame, text="Export CSV", command=self.export_report).pack(side=tk.LEFT, padx=5, pady=10)
+        tk.Button(self.report_frame, text="Back to Main Menu", command=self.show_main_menu).pack(side=tk.LEFT, padx=5, pady=10)
+
+        self.hide_all_frames()
+        self.report_frame.pack(fill="both", expand=True)
+
+    def export_report(self):
+        '''Writes the enrollment report to a CSV file chosen by the user.'''
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not path:
+            return
+        try:
+            self.enrollment_report.to_csv(path)
+        except OSError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        messagebox.showinfo("Success", f"Report exported to {path}")
+
+    @instrumentation.action('perform_search')
     def perform_search(self):
         '''Performs a search for students, instructors, or courses based on user input.
 
@@ -517,47 +743,48 @@ class SchoolManagementApp:
             return
 
         if search_in == "Student":
-            students = Student.load_all_students('Data/students.json')
             if search_by == "ID":
-                results = [s for s in students if s.student_id == search_value]
+                results = Student.query('Data/students.json').where(student_id=search_value).all()
             else:
-                results = [s for s in students if s.name == search_value]
+                results = Student.query('Data/students.json').where(name=search_value).all()
 
             if results:
                 headers = ["Name", "Age", "Email", "Student ID", "Registered Courses"]
-                data = [(s.name, s.age, s.get_email(), s.student_id, ', '.join(s.registered_courses)) for s in results]
-                self.create_display_treeview(headers, data,"student")
+                labels = labels_for('Data/students.json')
+                data = [(s.name, s.age, s.get_email(), s.student_id, labels.label(s.student_id, s.registered_courses)) for s in results]
+                self.create_display_treeview(headers, data,"student", complete=False)
             else:
                 messagebox.showinfo("No Results", "No student found.")
 
         elif search_in == "Instructor":
-            instructors = Instructor.load_all_instructors('Data/instructors.json')
             if search_by == "ID":
-                results = [i for i in instructors if i.instructor_id == search_value]
-            else: 
-                results = [i for i in instructors if i.name == search_value]
+                results = Instructor.query('Data/instructors.json').where(instructor_id=search_value).all()
+            else:
+                results = Instructor.query('Data/instructors.json').where(name=search_value).all()
 
             if results:
                 headers = ["Name", "Age", "Email", "Instructor ID", "Courses Taught"]
-                data = [(i.name, i.age, i.get_email(), i.instructor_id, ', '.join(i.assigned_courses)) for i in results]
-                self.create_display_treeview(headers, data,"instructor")
+                labels = labels_for('Data/instructors.json')
+                data = [(i.name, i.age, i.get_email(), i.instructor_id, labels.label(i.instructor_id, i.assigned_courses)) for i in results]
+                self.create_display_treeview(headers, data,"instructor", complete=False)
             else:
                 messagebox.showinfo("No Results", "No instructor found.")
 
         elif search_in == "Course":
-            courses = Course.load_all_courses_fully('Data/courses.json')
             if search_by == "ID":
-                results = [c for c in courses if c.course_id == search_value]
+                results = Course.query('Data/courses.json').where(course_id=search_value).all()
             else:
-                results = [c for c in courses if c.course_name == search_value]
+                results = Course.query('Data/courses.json').where(course_name=search_value).all()
 
             if results:
                 headers = ["Course ID", "Course Name", "Instructor", "Enrolled Students"]
-                data = [(c.course_id, c.course_name, c.instructor.name if c.instructor else 'None', ', '.join(c.enrolled_students)) for c in results]
-                self.create_display_treeview(headers, data,"course")
+                labels = labels_for('Data/courses.json')
+                data = [(c.course_id, c.course_name, c.instructor.name if c.instructor else 'None', labels.label(c.course_id, c.enrolled_students)) for c in results]
+                self.create_display_treeview(headers, data,"course", complete=False)
             else:
                 messagebox.showinfo("No Results", "No course found.")
 
+    @instrumentation.action('delete_record')
     def delete_record(self, category):
         '''Deletes a selected record based on the specified category.
 
@@ -575,10 +802,13 @@ class SchoolManagementApp:
             messagebox.showwarning("Warning", f"No {category} selected for deletion.")
             return
 
+        if len(selected_item) > 1:
+            self.delete_records(category, list(selected_item))
+            return
+
         selected_id = self.tree.item(selected_item)['values'][3]
         if (category == "course"):
             selected_id = self.tree.item(selected_item)['values'][0]
-        print(selected_id)
         record = None
         if category == "student":
             record = Student.get_student_by_id('Data/students.json', str(selected_id))
@@ -593,12 +823,13 @@ class SchoolManagementApp:
         if record:
             if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete this {category}?"):
                 try:
-                    if category == "student":
-                        record.delete_from_file('Data/students.json')
-                    elif category == "instructor":
-                        record.delete_from_file('Data/instructors.json')
-                    elif category == "course":
-                        record.delete_from_file('Data/courses.json')
+                    with self.history.command(f"Delete {category} {selected_id}"):
+                        if category == "student":
+                            record.delete_from_file('Data/students.json')
+                        elif category == "instructor":
+                            record.delete_from_file('Data/instructors.json')
+                        elif category == "course":
+                            record.delete_from_file('Data/courses.json')
 
                     messagebox.showinfo("Success", f"{category.capitalize()} record deleted successfully")
                     if (category == "student"):
@@ -662,6 +893,33 @@ class SchoolManagementApp:
 
         tk.Button(self.display_frame, text="Back to Main Menu", command=self.show_main_menu).pack(side=tk.LEFT, padx=5, pady=10)
 
+    def delete_records(self, category, record_ids):
+        '''Deletes several selected records of one category with a single write.
+
+        :param category: The type of records to delete ('student', 'instructor', or 'course').
+        :param record_ids: The IDs of the records to delete.
+        '''
+        if not messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete these {len(record_ids)} {category} records?"):
+            return
+        try:
+            with self.history.command(f"Delete {len(record_ids)} {category} records"):
+                if category == "student":
+                    Student.delete_many('Data/students.json', record_ids)
+                elif category == "instructor":
+                    Instructor.delete_many('Data/instructors.json', record_ids)
+                elif category == "course":
+                    Course.delete_many('Data/courses.json', record_ids)
+            if category == "student":
+                self.display_all_students()
+            elif category == "instructor":
+                self.display_all_instructors()
+            elif category == "course":
+                self.display_all_courses()
+            messagebox.showinfo("Success", f"{len(record_ids)} {category} records deleted successfully")
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    @instrumentation.action('save_changes')
     def save_changes(self, category, original_data):
         '''Saves changes made to a selected record.
 
@@ -672,48 +930,48 @@ class SchoolManagementApp:
         '''
         updated_data = [entry.get() for entry in self.entry_fields]
         try:
-            if category == "student":
-                print(original_data[3])
-                student = Student.get_student_by_id('Data/students.json', str(original_data[3])) 
-                if student:
-                    name = updated_data[0]
-                    assert (type(name) == str), "Name must be a string" 
-                    assert(name.strip() != ""), "name cannot be empty"
-                    assert re.match(r"^[a-zA-Z\s]+$", name), "Name must contain only alphabetic characters and spaces"
-                    student.name = name
-                    age = int(updated_data[1])
-                    assert (age >= 0), "Age cannot be negative"
-                    student.age = age
-                    email = updated_data[2]
-                    regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-                    assert(re.match(regex, email) is not None), "Wrong email format"
-                    student._email = email
-                    student.update_file('Data/students.json') 
-            elif category == "instructor":
-                instructor = Instructor.load_instructor_by_id('Data/instructors.json', str(original_data[3]))
-                if instructor:
-                    name = updated_data[0]
-                    assert (type(name) == str), "Name must be a string" 
-                    assert(name.strip() != ""), "name cannot be empty"
-                    assert re.match(r"^[a-zA-Z\s]+$", name), "Name must contain only alphabetic characters and spaces"
-                    instructor.name = name
-                    age = int(updated_data[1])
-                    assert (age >= 0), "Age cannot be negative"
-                    instructor.age = age
-                    email = updated_data[2]
-                    regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-                    assert(re.match(regex, email) is not None), "Wrong email format"
-                    instructor._email = email
-                    instructor.update('Data/instructors.json')
-            elif category == "course":
-                course = Course.load_course_by_id('Data/courses.json', str(original_data[0]))
-                if course:
-                    name = updated_data[0]
-                    assert (type(name) == str), "Name must be a string" 
-                    assert(name.strip() != ""), "name cannot be empty"
-                    assert re.match(r"^[a-zA-Z\s]+$", name), "Name must contain only alphabetic characters and spaces"
-                    course.course_name = name
-                    course.update('Data/courses.json')
+            with self.history.command(f"Edit {category} {original_data[0] if category == 'course' else original_data[3]}"):
+                if category == "student":
+                    student = Student.get_student_by_id('Data/students.json', str(original_data[3])) 
+                    if student:
+                        name = updated_data[0]
+                        assert (type(name) == str), "Name must be a string" 
+                        assert(name.strip() != ""), "name cannot be empty"
+                        assert re.match(r"^[a-zA-Z\s]+$", name), "Name must contain only alphabetic characters and spaces"
+                        student.name = name
+                        age = int(updated_data[1])
+                        assert (age >= 0), "Age cannot be negative"
+                        student.age = age
+                        email = updated_data[2]
+                        regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
+                        assert(re.match(regex, email) is not None), "Wrong email format"
+                        student._email = email
+                        student.update_file('Data/students.json') 
+                elif category == "instructor":
+                    instructor = Instructor.load_instructor_by_id('Data/instructors.json', str(original_data[3]))
+                    if instructor:
+                        name = updated_data[0]
+                        assert (type(name) == str), "Name must be a string" 
+                        assert(name.strip() != ""), "name cannot be empty"
+                        assert re.match(r"^[a-zA-Z\s]+$", name), "Name must contain only alphabetic characters and spaces"
+                        instructor.name = name
+                        age = int(updated_data[1])
+                        assert (age >= 0), "Age cannot be negative"
+                        instructor.age = age
+                        email = updated_data[2]
+                        regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
+                        assert(re.match(regex, email) is not None), "Wrong email format"
+                        instructor._email = email
+                        instructor.update('Data/instructors.json')
+                elif category == "course":
+                    course = Course.load_course_by_id('Data/courses.json', str(original_data[0]))
+                    if course:
+                        name = updated_data[0]
+                        assert (type(name) == str), "Name must be a string" 
+                        assert(name.strip() != ""), "name cannot be empty"
+                        assert re.match(r"^[a-zA-Z\s]+$", name), "Name must contain only alphabetic characters and spaces"
+                        course.course_name = name
+                        course.update('Data/courses.json')
         except Exception as e:
              messagebox.showerror("Error "+str(e))
              return
@@ -0,0 +1,26 @@
+from OOP.formats import course_record, instructor_record, student_record
+from OOP.storage import write_json
+import pytest
+
+def student(student_id, courses=()):
+    return student_record('Test Student', 20, f'{student_id.lower()}@school.edu', student_id, list(courses))
+
+def instructor(instructor_id, courses=()):
+    return instructor_record('Test Instructor', 40, f'{instructor_id.lower()}@school.edu', instructor_id, list(courses))
+
+def course(course_id, students=(), capacity=None, waitlist=None, meetings=None, instructor=None):
+    return course_record(course_id, f'Course {course_id}', instructor, list(students), capacity, waitlist, meetings)
+
+def meeting(day, start, end):
+    return {'day': day, 'start': start, 'end': end}
+
+@pytest.fixture
+def data_files(tmp_path):
+    # Writes the given records to fresh files and returns their paths
+    def write(students=(), instructors=(), courses=()):
+        files = {name: str(tmp_path / f'{name}.json') for name in ('students', 'instructors', 'courses')}
+        write_json(files['students'], list(students))
+        write_json(files['instructors'], list(instructors))
+        write_json(files['courses'], list(courses))
+        return files
+    return write
@@ -0,0 +1,38 @@
+from OOP.assignment import plan_assignment
+from OOP.course import Course
+from OOP.instructor import Instructor
+from conftest import course, instructor, meeting
+
+def courses(*records):
+    return [Course.from_json(record) for record in records]
+
+def test_loads_and_allowed_courses_are_respected():
+    instructors = [Instructor.from_json(instructor('I1')), Instructor.from_json(instructor('I2'))]
+    catalogue = courses(course('C1'), course('C2'), course('C3'), course('C4'))
+    constraints = {'I1': {'max_load': 2}, 'I2': {'max_load': 3, 'allowed_courses': ['C1']}}
+
+    result = plan_assignment(instructors, catalogue, constraints)
+
+    assert len(result.assigned) == 3
+    assert sum(1 for instructor_id in result.assigned.values() if instructor_id == 'I1') == 2
+    assert [course_id for course_id, instructor_id in result.assigned.items() if instructor_id == 'I2'] == ['C1']
+    assert len(result.unassigned) == 1
+
+def test_courses_already_held_count_towards_the_load():
+    instructors = [Instructor.from_json(instructor('I1', ['C1']))]
+    catalogue = courses(course('C1', instructor=instructor('I1', ['C1'])), course('C2'), course('C3'))
+
+    result = plan_assignment(instructors, catalogue, {'I1': {'max_load': 2}})
+
+    assert len(result.assigned) == 1
+    assert len(result.unassigned) == 1
+
+def test_no_instructor_gets_clashing_courses():
+    instructors = [Instructor.from_json(instructor('I1')), Instructor.from_json(instructor('I2'))]
+    catalogue = courses(course('C1', meetings=[meeting('Thu', '09:00', '10:00')]),
+                        course('C2', meetings=[meeting('Thu', '09:30', '10:30')]))
+
+    result = plan_assignment(instructors, catalogue, {'I2': {'allowed_courses': ['C1', 'C2']}})
+
+    assert sorted(result.assigned) == ['C1', 'C2']
+    assert result.assigned['C1'] != result.assigned['C2']
@@ -0,0 +1,51 @@
+from OOP import instrumentation
+from OOP.catalogue import CourseCatalogue
+from OOP.storage import write_json
+from conftest import course
+import pytest
+
+@pytest.fixture
+def counters():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+def test_catalogue_rereads_only_after_the_file_changes(data_files, counters):
+    filename = data_files(courses=[course('C1'), course('C2')])['courses']
+    catalogue = CourseCatalogue(filename)
+    seen = []
+    catalogue.subscribe(lambda catalogue: seen.append(list(catalogue.course_ids)))
+
+    catalogue.filter('')
+    catalogue.filter('c')
+    write_json(filename, [course('C1'), course('C2'), course('C3')])
+    catalogue.filter('')
+
+    assert seen == [['C1', 'C2'], ['C1', 'C2', 'C3']]
+    stats = instrumentation.stats()
+    assert stats['counters']['catalogue.miss'] == 2
+    assert stats['counters']['catalogue.hit'] == 2
+    assert stats['hit_rates']['catalogue'] == pytest.approx(0.5)
+    assert 'catalogue.hit_rate=50%' in instrumentation.summary_line()
+
+def test_type_ahead_matches_ids_and_names_by_prefix(data_files):
+    courses = [dict(course('C10'), course_name='Algebra'), dict(course('C2'), course_name='Calculus'),
+               dict(course('M1'), course_name='Algorithms')]
+    catalogue = CourseCatalogue(data_files(courses=courses)['courses'])
+
+    assert catalogue.filter('al') == ['C10', 'M1']
+    assert catalogue.filter('C') == ['C10', 'C2']
+    assert catalogue.filter('c', limit=1) == ['C10']
+
+def test_applied_changes_update_the_keys(data_files):
+    filename = data_files(courses=[course('C1')])['courses']
+    catalogue = CourseCatalogue(filename)
+    catalogue.refresh()
+
+    catalogue.apply_changes({'C2': dict(course('C2'), course_name='Biology')},
+                            {'C1': dict(course('C1'), course_name='Physics')}, [])
+    assert catalogue.filter('phy') == ['C1'] and catalogue.filter('course') == []
+    catalogue.apply_changes({}, {}, ['C1'])
+    assert catalogue.course_ids == ['C2'] and catalogue.filter('b') == ['C2']
@@ -0,0 +1,73 @@
+from OOP.history import CommandLog, ObjectCommand, replay
+from OOP.storage import append_record, delete_records, load_records, replace_record
+from OOP.student import Student
+from conftest import student
+import pytest
+
+@pytest.fixture
+def log(tmp_path):
+    log = CommandLog(str(tmp_path / 'history.jsonl'))
+    yield log
+    log.close()
+
+def test_undo_and_redo_a_command_across_writes(data_files, log):
+    files = data_files(students=[student('S1'), student('S2')])
+    filename = files['students']
+    original = load_records(filename)
+
+    with log.command("Edit and delete"):
+        replace_record(filename, 'student_id', student('S1', ['C1']))
+        delete_records(filename, 'student_id', ['S2'])
+        append_record(filename, 'student_id', student('S3'))
+    edited = load_records(filename)
+
+    assert log.undo().description == "Edit and delete"
+    assert sorted(load_records(filename), key=lambda record: record['student_id']) == original
+    assert not log.can_undo and log.can_redo
+
+    log.redo()
+    assert sorted(load_records(filename), key=lambda record: record['student_id']) == \
+        sorted(edited, key=lambda record: record['student_id'])
+
+def test_undo_does_not_record_itself_and_a_new_command_clears_redo(data_files, log):
+    files = data_files(students=[student('S1')])
+    filename = files['students']
+    with log.command("Edit"):
+        replace_record(filename, 'student_id', student('S1', ['C1']))
+    log.undo()
+
+    with log.command("Other edit"):
+        replace_record(filename, 'student_id', student('S1', ['C2']))
+
+    assert not log.can_redo
+    assert log.undo().description == "Other edit"
+    assert load_records(filename) == [student('S1')]
+
+def test_audit_log_replays_to_the_current_state(data_files, log):
+    files = data_files(students=[student('S1')])
+    filename = files['students']
+    with log.command("Edit"):
+        replace_record(filename, 'student_id', student('S1', ['C1']))
+    with log.command("Add"):
+        append_record(filename, 'student_id', student('S2'))
+    log.undo()
+
+    state = replay(log.audit_path, {filename: {'S1': student('S1')}})
+
+    assert state[filename] == {record['student_id']: record for record in load_records(filename)}
+
+def test_object_command_restores_edits_and_removals():
+    first = Student('Ann Lee', 20, 'ann@school.edu', 'S1', [])
+    second = Student('Bo Kim', 21, 'bo@school.edu', 'S2', [])
+    students = [first, second]
+    command = ObjectCommand("Edit and remove")
+    command.capture('students', first)
+    first.name = 'Ann Smith'
+    command.removed('students', students, 1, second)
+    students.remove(second)
+    command.finish()
+
+    command.undo()
+    assert first.name == 'Ann Lee' and students == [first, second]
+    command.redo()
+    assert first.name == 'Ann Smith' and students == [first]
@@ -0,0 +1,65 @@
+from OOP.export import ExportJob, columns_for, export_many
+from OOP.importer import import_file
+from OOP.storage import load_records
+from conftest import course, instructor, meeting, student
+import csv
+import json
+
+def test_exported_courses_import_with_capacity_and_meeting_times(data_files, tmp_path):
+    exported = [course('C1', ['S1'], capacity=30, meetings=[meeting('Mon', '09:00', '10:15')],
+                       instructor=instructor('I1', ['C1'])),
+                course('C2')]
+    source = data_files(courses=exported)['courses']
+    path = str(tmp_path / 'courses.csv')
+    export_many([ExportJob(path, columns_for('courses'), source=source)])
+    files = data_files(students=[student('S1')], instructors=[instructor('I1')])
+
+    result = import_file('courses', path, files['courses'], students_file=files['students'],
+                         instructors_file=files['instructors'], courses_file=files['courses'], workers=0)
+
+    assert (result.imported, result.rejected) == (2, 0)
+    courses = {record['course_id']: record for record in load_records(files['courses'])}
+    assert courses['C1']['capacity'] == 30
+    assert courses['C1']['meeting_times'] == [meeting('Mon', '09:00', '10:15')]
+    assert courses['C1']['enrolled_students'] == ['S1']
+    assert courses['C1']['instructor']['instructor_id'] == 'I1'
+    assert courses['C2'].get('capacity') is None and not courses['C2'].get('meeting_times')
+
+def write_csv(path, header, *rows):
+    with open(path, 'w', newline='') as f:
+        f.write('\n'.join([header, *rows]) + '\n')
+    return str(path)
+
+def test_rows_are_validated_deduplicated_and_rejected_with_reasons(data_files, tmp_path):
+    files = data_files(students=[student('S1')], courses=[course('C1')])
+    path = write_csv(tmp_path / 'students.csv', 'student_id,name,age,email,registered_courses',
+                     'S2,New Student,19,s2@school.edu,C1',
+                     'S1,Taken Id,19,other@school.edu,',
+                     'S3,Taken Email,19,s1@school.edu,',
+                     'S4,Bad Email,19,not-an-email,',
+                     'S5,Unknown Course,19,s5@school.edu,C9',
+                     'S2,Repeated,19,repeat@school.edu,')
+
+    result = import_file('students', path, files['students'], students_file=files['students'],
+                         courses_file=files['courses'], instructors_file=files['instructors'], workers=0)
+
+    assert (result.imported, result.rejected) == (1, 5)
+    with open(result.reject_path, newline='') as f:
+        rejects = list(csv.DictReader(f))
+    assert [row['line'] for row in rejects] == ['3', '4', '5', '6', '7']
+    assert 'already exists' in rejects[0]['error'] and 'already exists' in rejects[1]['error']
+    assert rejects[3]['error'] == "Registered in a course that does not exist"
+    assert [record['student_id'] for record in load_records(files['students'])] == ['S1', 'S2']
+    assert load_records(files['courses'])[0]['enrolled_students'] == ['S2']
+
+def test_json_lines_are_validated_on_a_process_pool(data_files, tmp_path):
+    files = data_files()
+    path = tmp_path / 'instructors.jsonl'
+    lines = [json.dumps(instructor(f'I{number}')) for number in range(5)] + ['{not json']
+    path.write_text('\n'.join(lines) + '\n')
+
+    result = import_file('instructors', str(path), files['instructors'], students_file=files['students'],
+                         courses_file=files['courses'], instructors_file=files['instructors'], workers=2)
+
+    assert (result.imported, result.rejected) == (5, 1)
+    assert len(load_records(files['instructors'])) == 5
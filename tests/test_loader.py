@@ -0,0 +1,45 @@
+from OOP import loader
+from conftest import course, instructor, student
+
+def dataset_files(data_files):
+    return data_files(
+        students=[student('S1', ['C1']), student('S2', ['C1']), student('bad id')],
+        instructors=[instructor('I1', ['C1'])],
+        courses=[course('C1', ['S1', 'S2'], instructor=instructor('I1', ['C1'])), course('C2')])
+
+def load(files, **options):
+    return loader.load_dataset(files['students'], files['instructors'], files['courses'], **options)
+
+def test_load_dataset_links_courses_to_the_loaded_objects(data_files):
+    files = dataset_files(data_files)
+
+    dataset = load(files)
+
+    assert sorted(dataset.students) == ['S1', 'S2']
+    assert dataset.rejected == {'students': 1, 'instructors': 0, 'courses': 0}
+    assert len(dataset.records['students']) == 3
+    assert dataset.courses['C1'].instructor is dataset.instructors['I1']
+    assert dataset.students_of('C1') == [dataset.students['S1'], dataset.students['S2']]
+    assert dataset.students_of('C2') == []
+    assert set(dataset.signatures) == set(files.values())
+
+def test_classes_models_are_linked_through_objects(data_files):
+    dataset = load(dataset_files(data_files), models='Classes')
+
+    c1 = dataset.courses['C1']
+    assert c1.enrolled_students == [dataset.students['S1'], dataset.students['S2']]
+    assert dataset.students['S1'].registered_courses == [c1]
+    assert dataset.instructors['I1'].assigned_courses == [c1]
+    assert c1.instructor is dataset.instructors['I1']
+
+def test_large_files_are_built_on_a_process_pool(data_files, monkeypatch):
+    files = dataset_files(data_files)
+    inline = load(files)
+    monkeypatch.setattr(loader, 'PROCESS_THRESHOLD', 2)
+    monkeypatch.setattr(loader, 'CHUNK_SIZE', 1)
+
+    pooled = load(files, workers=2)
+
+    assert pooled.rejected == inline.rejected
+    assert [s.to_json() for s in pooled.students.values()] == [s.to_json() for s in inline.students.values()]
+    assert pooled.courses['C1'].instructor is pooled.instructors['I1']
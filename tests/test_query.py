@@ -0,0 +1,26 @@
+from OOP.student import Student
+from conftest import student
+
+def test_missing_values_sort_last_either_way(data_files):
+    records = [student('S1'), student('S2'), student('S3')]
+    records[0]['age'] = None
+    records[1]['age'] = 30
+    records[2]['age'] = 25
+    files = data_files(students=records)
+    query = Student.query(files['students'])
+
+    assert [record['student_id'] for record in query.order_by('age').records()] == ['S3', 'S2', 'S1']
+    assert [record['student_id'] for record in query.order_by('-age').records()] == ['S2', 'S3', 'S1']
+    assert [record['student_id'] for record in query.order_by('age').limit(2).records()] == ['S3', 'S2']
+
+def test_repeated_ids_are_returned_once(data_files):
+    files = data_files(students=[student('S1'), student('S2')])
+
+    students = Student.query(files['students']).where(student_id__in=['S2', 'S2', 'S1']).all()
+
+    assert [s.student_id for s in students] == ['S2', 'S1']
+
+def test_where_filters_on_nested_lookups(data_files):
+    files = data_files(students=[student('S1', ['C1']), student('S2', ['C2'])])
+
+    assert Student.query(files['students']).where(registered_courses__contains='C2').count() == 1
@@ -0,0 +1,73 @@
+from OOP import storage
+from OOP.recordfile import RecordFile
+from conftest import student
+import os
+import subprocess
+import sys
+
+def test_reads_leave_the_json_file_until_it_is_synced(data_files):
+    files = data_files(students=[student('S1'), student('S2')])
+    filename = files['students']
+    storage.build_record_file(filename, 'student_id')
+    with open(filename, 'rb') as f:
+        on_disk = f.read()
+
+    storage.replace_record(filename, 'student_id', student('S1', ['C1']))
+    signature = storage.file_signature(filename)
+
+    assert storage.find_record(filename, 'student_id', 'S1')['registered_courses'] == ['C1']
+    assert [record['registered_courses'] for record in storage.load_records(filename)] == [['C1'], []]
+    with open(filename, 'rb') as f:
+        assert f.read() == on_disk
+
+    assert storage.sync_record_file(filename)
+    assert not storage.sync_record_file(filename)
+    with open(filename) as f:
+        assert '"C1"' in f.read()
+    # Catching the JSON file up is not a change of its own
+    assert storage.file_signature(filename) == signature
+    assert storage.load_records(filename)[0]['registered_courses'] == ['C1']
+
+def test_whole_file_write_replaces_the_record_file(data_files):
+    files = data_files(students=[student('S1')])
+    filename = files['students']
+    storage.build_record_file(filename, 'student_id')
+
+    storage.write_json(filename, [student('S2')])
+
+    assert storage.find_record(filename, 'student_id', 'S1') is None
+    assert storage.find_record(filename, 'student_id', 'S2') is not None
+
+def test_two_writers_on_one_record_file_keep_every_entry(tmp_path):
+    path = str(tmp_path / 'students.rec')
+    RecordFile.build(path, [], 'student_id').close()
+    script = (
+        "import sys\n"
+        "from OOP.recordfile import RecordFile\n"
+        "record_file = RecordFile(sys.argv[1])\n"
+        "for number in range(300):\n"
+        "    record_file.put(f'{sys.argv[2]}{number}', {'student_id': f'{sys.argv[2]}{number}'})\n"
+        "record_file.close()\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    writers = [subprocess.Popen([sys.executable, '-c', script, path, prefix], env=env) for prefix in ('A', 'B')]
+    assert [writer.wait() for writer in writers] == [0, 0]
+
+    record_file = RecordFile(path)
+    assert len(record_file) == 600
+    assert record_file.get('A299') == {'student_id': 'A299'} and record_file.get('B0') == {'student_id': 'B0'}
+    record_file.close()
+
+def test_a_stale_writer_appends_after_the_other_writers_entries(tmp_path):
+    path = str(tmp_path / 'students.rec')
+    first = RecordFile.build(path, [student('S1')], 'student_id')
+    second = RecordFile(path)
+
+    first.put('S2', student('S2'))
+    second.put('S3', student('S3'))
+    first.refresh()
+
+    assert sorted(first.ids()) == sorted(second.ids()) == ['S1', 'S2', 'S3']
+    assert first.get('S2') == student('S2')
+    first.close()
+    second.close()
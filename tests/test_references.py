@@ -0,0 +1,85 @@
+from OOP import storage
+from OOP.references import index_for
+from OOP.storage import load_records
+from conftest import course, instructor, student
+import pytest
+
+def records_by_id(filename, id_field):
+    return {record[id_field]: record for record in load_records(filename)}
+
+@pytest.fixture
+def school(data_files):
+    teacher = instructor('I1', ['C1', 'C2'])
+    files = data_files(students=[student('S1', ['C1']), student('S2', ['C1', 'C2']), student('S3')],
+                       instructors=[teacher],
+                       courses=[course('C1', ['S1', 'S2'], capacity=2, waitlist=['S3'], instructor=teacher),
+                                course('C2', ['S2'], instructor=teacher)])
+    return files, index_for(files['students'], files['instructors'], files['courses'])
+
+def assert_index_matches_the_files(index):
+    kept = {name: dict(getattr(index, name)) for name in ('course_students', 'course_waitlist', 'course_instructor', 'instructor_courses')}
+    index._signatures = None
+    index.refresh()
+    for name, values in kept.items():
+        assert {key: value for key, value in values.items() if value} == {key: value for key, value in getattr(index, name).items() if value}
+    assert index.check_integrity() == []
+
+def test_deleting_a_student_clears_rosters_and_waitlists(school):
+    files, index = school
+
+    assert index.delete_students(['S2', 'S3']) == 2
+
+    courses = records_by_id(files['courses'], 'course_id')
+    assert courses['C1']['enrolled_students'] == ['S1']
+    assert 'waitlist' not in courses['C1']
+    assert courses['C2']['enrolled_students'] == []
+    assert_index_matches_the_files(index)
+
+def test_deleting_a_course_clears_students_instructors_and_embedded_copies(school):
+    files, index = school
+
+    assert index.delete_courses(['C1']) == 1
+
+    students = records_by_id(files['students'], 'student_id')
+    assert students['S1']['registered_courses'] == [] and students['S2']['registered_courses'] == ['C2']
+    assert records_by_id(files['instructors'], 'instructor_id')['I1']['assigned_courses'] == ['C2']
+    assert records_by_id(files['courses'], 'course_id')['C2']['instructor']['assigned_courses'] == ['C2']
+    assert_index_matches_the_files(index)
+
+def test_renaming_a_course_follows_every_reference(school):
+    files, index = school
+
+    index.rename_course('C1', 'C9')
+
+    assert records_by_id(files['students'], 'student_id')['S2']['registered_courses'] == ['C9', 'C2']
+    assert records_by_id(files['instructors'], 'instructor_id')['I1']['assigned_courses'] == ['C9', 'C2']
+    courses = records_by_id(files['courses'], 'course_id')
+    assert courses['C9']['waitlist'] == ['S3'] and 'C1' not in courses
+    assert index.students_of('C9') == {'S1', 'S2'}
+    assert_index_matches_the_files(index)
+    with pytest.raises(ValueError):
+        index.rename_course('C2', 'C9')
+
+def test_deleting_an_instructor_unassigns_their_courses(school):
+    files, index = school
+
+    assert index.delete_instructors(['I1']) == 1
+
+    assert all(course['instructor'] is None for course in load_records(files['courses']))
+    assert index.instructor_of('C1') is None
+    assert_index_matches_the_files(index)
+
+def test_a_failed_write_puts_back_the_files_already_written(school, monkeypatch):
+    files, index = school
+    before = {name: load_records(filename) for name, filename in files.items()}
+    delete_records = storage.delete_records
+    def failing_delete(filename, id_field, record_ids):
+        raise OSError("disk full")
+    monkeypatch.setattr('OOP.references.delete_records', failing_delete)
+
+    with pytest.raises(OSError):
+        index.delete_students(['S2'])
+
+    assert {name: load_records(filename) for name, filename in files.items()} == before
+    monkeypatch.setattr('OOP.references.delete_records', delete_records)
+    assert index.students_of('C1') == {'S1', 'S2'}
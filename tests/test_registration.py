@@ -0,0 +1,78 @@
+from OOP import registration, seats
+from OOP.registration import RegistrationQueue
+from OOP.seats import ENROLLED
+from OOP.storage import load_records, replace_record
+from conftest import course, student
+import pytest
+
+def records_by_id(filename, id_field):
+    return {record[id_field]: record for record in load_records(filename)}
+
+def queue_for(files):
+    return RegistrationQueue(files['students'], files['courses'])
+
+def interfere(monkeypatch, files, times):
+    # Another desk renames the registering student while the batch is validated, `times` times
+    process = RegistrationQueue._process
+    calls = []
+    def process_and_write(queue, request):
+        if len(calls) < times:
+            calls.append(request)
+            replace_record(files['students'], 'student_id', dict(student('S1'), name=f'Other Desk {"I" * len(calls)}'))
+        return process(queue, request)
+    monkeypatch.setattr(RegistrationQueue, '_process', process_and_write)
+
+def test_batch_is_committed_once(data_files):
+    files = data_files(students=[student('S1'), student('S2')], courses=[course('C1', capacity=1)])
+    queue = queue_for(files)
+    first = queue.submit('S1', 'C1')
+    second = queue.submit('S2', 'C1')
+
+    outcomes = queue.process_pending()
+
+    assert [outcome.status for outcome in outcomes] == [ENROLLED, 'waitlisted']
+    assert first.wait(0) is outcomes[0] and second.wait(0) is outcomes[1]
+    assert records_by_id(files['students'], 'student_id')['S1']['registered_courses'] == ['C1']
+    assert records_by_id(files['courses'], 'course_id')['C1']['waitlist'] == ['S2']
+
+def test_batch_is_rerun_after_another_write(data_files, monkeypatch):
+    files = data_files(students=[student('S1')], courses=[course('C1')])
+    interfere(monkeypatch, files, times=1)
+    queue = queue_for(files)
+    queue.submit('S1', 'C1')
+
+    assert [outcome.status for outcome in queue.process_pending()] == [ENROLLED]
+    assert records_by_id(files['students'], 'student_id')['S1'] == dict(student('S1', ['C1']), name='Other Desk I')
+
+def test_batch_goes_back_on_the_queue_when_the_files_keep_changing(data_files, monkeypatch):
+    files = data_files(students=[student('S1')], courses=[course('C1')])
+    interfere(monkeypatch, files, times=registration.COMMIT_RETRIES)
+    queue = queue_for(files)
+    request = queue.submit('S1', 'C1')
+
+    assert queue.process_pending() == []
+    assert queue.pending == 1 and request.wait(0) is None
+    renamed = dict(student('S1'), name='Other Desk ' + 'I' * registration.COMMIT_RETRIES)
+    assert records_by_id(files['students'], 'student_id')['S1'] == renamed
+    assert records_by_id(files['courses'], 'course_id')['C1']['enrolled_students'] == []
+
+    assert [outcome.status for outcome in queue.process_pending()] == [ENROLLED]
+    assert records_by_id(files['students'], 'student_id')['S1'] == dict(renamed, registered_courses=['C1'])
+
+def test_failed_student_write_restores_the_courses(data_files, monkeypatch):
+    files = data_files(students=[student('S1')], courses=[course('C1', capacity=2)])
+    before = load_records(files['courses'])
+    seat_map = seats.load_seats(files['students'], files['courses'])
+    assert seat_map.request('S1', 'C1').status == ENROLLED
+
+    replace_records = seats.replace_records
+    def failing_replace(filename, id_field, records):
+        if filename == files['students']:
+            raise OSError("disk full")
+        return replace_records(filename, id_field, records)
+    monkeypatch.setattr(seats, 'replace_records', failing_replace)
+
+    with pytest.raises(OSError):
+        seat_map.commit(files['students'], files['courses'], seat_map.students)
+    assert load_records(files['courses']) == before
+    assert seat_map.students['S1']['registered_courses'] == []
@@ -0,0 +1,42 @@
+from OOP.registration import RegistrationQueue
+from OOP.reports import report_for
+from conftest import course, instructor, student
+import csv
+
+def test_summary_counts_every_aggregate(data_files):
+    files = data_files(students=[student('S1', ['C1']), student('S2')],
+                       instructors=[instructor('I1', ['C1'])],
+                       courses=[course('C1', ['S1'], capacity=4, instructor=instructor('I1', ['C1'])), course('C2')])
+    report = report_for(files['students'], files['instructors'], files['courses'])
+
+    summary = report.summary()
+
+    assert (summary['students'], summary['instructors'], summary['courses'], summary['enrollments']) == (2, 1, 2, 1)
+    assert summary['unregistered_students'] == ['S2']
+    assert summary['unassigned_courses'] == ['C2']
+    assert summary['courses_per_instructor'] == {'I1': 1}
+    assert summary['fill_rates'] == {'C1': 0.25}
+
+def test_registration_queue_keeps_the_counters_without_a_rescan(data_files):
+    files = data_files(students=[student('S1', ['C1']), student('S2')],
+                       courses=[course('C1', ['S1'], capacity=2), course('C2')])
+    report = report_for(files['students'], files['instructors'], files['courses'])
+    report.refresh()
+    queue = RegistrationQueue(files['students'], files['courses'])
+    queue.submit('S2', 'C1')
+    queue.submit('S1', 'C1', action='drop')
+    queue.process_pending()
+
+    assert report.refresh() == []
+    assert report.enrollments_per_course['C1'] == 1
+    assert report.unregistered_students == {'S1'}
+    assert report.fill_rates()['C1'] == 0.5
+
+def test_csv_export(data_files, tmp_path):
+    files = data_files(students=[student('S1', ['C1'])], courses=[course('C1', ['S1'])])
+    path = report_for(files['students'], files['instructors'], files['courses']).to_csv(str(tmp_path / 'report.csv'))
+
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['report', 'key', 'value']
+    assert ['enrollments_per_course', 'C1', '1'] in rows
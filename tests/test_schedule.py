@@ -0,0 +1,70 @@
+from OOP.schedule import Timetable, schedule_for
+from OOP.seats import REJECTED, SeatMap
+from conftest import course, meeting, student
+
+def test_conflict_finds_a_meeting_hidden_behind_a_shorter_one():
+    timetable = Timetable()
+    timetable.insert(540, 720, 'C1')
+    timetable.insert(570, 600, 'C2')
+
+    assert timetable.conflict([(630, 660)]) == 'C1'
+    assert timetable.conflict([(720, 780)]) is None
+
+def test_report_lists_every_pair_of_a_nested_clash(data_files):
+    files = data_files(
+        students=[student('S1', ['C1', 'C2', 'C3'])],
+        courses=[course('C1', ['S1'], meetings=[meeting('Wed', '09:00', '12:00')]),
+                 course('C2', ['S1'], meetings=[meeting('Wed', '09:30', '10:00')]),
+                 course('C3', ['S1'], meetings=[meeting('Wed', '10:30', '11:00')])])
+
+    report = schedule_for(files['students'], files['instructors'], files['courses']).conflict_report()
+
+    assert report == [('student', 'S1', 'C1', 'C2'), ('student', 'S1', 'C1', 'C3')]
+
+def test_promotion_skips_a_student_it_would_give_a_clash():
+    monday = [meeting('Mon', '09:00', '10:00')]
+    students = {record['student_id']: record for record in
+                [student('S1', ['C1']), student('S2', ['C2']), student('S3')]}
+    seat_map = SeatMap([course('C1', ['S1'], capacity=1, waitlist=['S2', 'S3'], meetings=monday),
+                        course('C2', ['S2'], meetings=monday)], students=students)
+
+    outcome = seat_map.drop('S1', 'C1')
+
+    # S2 already has C2 at that time, so the seat goes to S3 and S2 keeps its place in line
+    assert outcome.promoted == 'S3'
+    assert list(seat_map.courses['C1'].enrolled) == ['S3']
+    assert seat_map.courses['C1'].waitlist() == ['S2']
+    assert seat_map.registered_courses('S2') == ['C2']
+
+def test_request_rejects_a_clash():
+    students = {'S1': student('S1', ['C1'])}
+    seat_map = SeatMap([course('C1', ['S1'], meetings=[meeting('Tue', '10:00', '12:00')]),
+                        course('C2', meetings=[meeting('Tue', '11:00', '11:30')])], students=students)
+
+    outcome = seat_map.request('S1', 'C2')
+
+    assert outcome.status == REJECTED
+    assert outcome.message == "Course C2 clashes with course C1"
+
+def test_removing_a_course_recomputes_the_reach():
+    timetable = Timetable()
+    timetable.insert(540, 720, 'C1')
+    timetable.insert(570, 600, 'C2')
+
+    timetable.remove('C1')
+
+    assert 'C1' not in timetable and 'C2' in timetable
+    assert timetable.conflict([(630, 660)]) is None
+    assert timetable.conflict([(580, 590)]) == 'C2'
+
+def test_a_students_cached_timetable_follows_enrolments_and_drops():
+    monday = [meeting('Mon', '09:00', '10:00')]
+    students = {'S1': student('S1')}
+    seat_map = SeatMap([course('C1', meetings=monday), course('C2', meetings=monday)], students=students)
+
+    outcomes = seat_map.process([('register', 'S1', 'C1'), ('register', 'S1', 'C2'),
+                                 ('drop', 'S1', 'C1'), ('register', 'S1', 'C2')])
+
+    assert [outcome.status for outcome in outcomes][1] == REJECTED
+    assert outcomes[3].status != REJECTED
+    assert seat_map.registered_courses('S1') == ['C2']
@@ -0,0 +1,29 @@
+from OOP.seats import DROPPED, WAITLISTED, allocate, set_capacity
+from OOP.storage import load_records
+from conftest import course, student
+
+def records_by_id(filename, id_field):
+    return {record[id_field]: record for record in load_records(filename)}
+
+def test_full_course_waitlists_and_promotes_on_drop(data_files):
+    files = data_files(students=[student('S1', ['C1']), student('S2'), student('S3')],
+                       courses=[course('C1', ['S1'], capacity=1)])
+
+    outcomes = allocate([('register', 'S2', 'C1'), ('register', 'S3', 'C1'), ('drop', 'S1', 'C1')],
+                        files['students'], files['courses'])
+
+    assert [outcome.status for outcome in outcomes] == [WAITLISTED, WAITLISTED, DROPPED]
+    assert outcomes[2].promoted == 'S2'
+    courses = records_by_id(files['courses'], 'course_id')
+    students = records_by_id(files['students'], 'student_id')
+    assert courses['C1']['enrolled_students'] == ['S2']
+    assert courses['C1']['waitlist'] == ['S3']
+    assert students['S1']['registered_courses'] == []
+    assert students['S2']['registered_courses'] == ['C1']
+
+def test_raising_the_capacity_promotes_in_arrival_order(data_files):
+    files = data_files(students=[student('S1', ['C1']), student('S2'), student('S3')],
+                       courses=[course('C1', ['S1'], capacity=1, waitlist=['S3', 'S2'])])
+
+    assert set_capacity('C1', 2, files['students'], files['courses']) == ['S3']
+    assert records_by_id(files['courses'], 'course_id')['C1']['waitlist'] == ['S2']
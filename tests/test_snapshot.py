@@ -0,0 +1,41 @@
+from OOP import storage
+from OOP import snapshot
+from OOP.snapshot import build_snapshot, read_snapshot, snapshot_path
+from OOP.student import Student
+from conftest import student
+import os
+import pytest
+
+def test_snapshot_is_used_while_the_json_file_is_unchanged(data_files):
+    files = data_files(students=[student('S1')])
+    filename = files['students']
+    build_snapshot(filename)
+
+    assert read_snapshot(filename) == [student('S1')]
+    storage.write_json(filename, [student('S2')])
+    assert read_snapshot(filename) == [student('S2')]
+
+def test_snapshots_of_another_codec_or_with_other_data_are_ignored(data_files, monkeypatch):
+    filename = data_files(students=[student('S1')])['students']
+    build_snapshot(filename)
+    monkeypatch.setattr(snapshot, 'CODEC', (0, 0))
+    assert read_snapshot(filename) is None
+    monkeypatch.undo()
+
+    snapshot.write_snapshot(filename, ['not a record'])
+    assert read_snapshot(filename) is None
+
+    build_snapshot(filename)
+    with open(snapshot_path(filename), 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b'\xff')
+    assert read_snapshot(filename) is None
+    assert storage.load_records(filename) == [student('S1')]
+
+def test_missing_student_file_raises(tmp_path):
+    filename = os.path.join(tmp_path, 'missing.json')
+
+    with pytest.raises(FileNotFoundError):
+        Student.get_student_by_id(filename, 'S1')
+    with pytest.raises(FileNotFoundError):
+        Student.load_all_students(filename)
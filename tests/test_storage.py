@@ -0,0 +1,47 @@
+from OOP import instrumentation, storage
+from OOP.course import Course
+from conftest import course, student
+import os
+
+def test_record_level_writes(data_files):
+    files = data_files(students=[student('S1'), student('S2')])
+    filename = files['students']
+
+    storage.append_record(filename, 'student_id', student('S3'))
+    assert storage.replace_records(filename, 'student_id', [student('S2', ['C1']), student('S9')]) == 1
+    assert storage.delete_records(filename, 'student_id', ['S1']) == 1
+
+    assert [(record['student_id'], record['registered_courses']) for record in storage.load_records(filename)] == \
+        [('S2', ['C1']), ('S3', [])]
+    assert storage.find_record(filename, 'student_id', 'S3')['student_id'] == 'S3'
+    assert storage.find_record(filename, 'student_id', 'S1') is None
+
+def test_bulk_delete_builds_no_model_objects(data_files):
+    files = data_files(students=[student('S1', ['C1', 'C3'])],
+                       courses=[course('C1', ['S1']), course('C2'), course('C3', ['S1'])])
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        assert Course.delete_many(files['courses'], ['C1', 'C2', 'C9']) == 2
+        assert 'objects.Course' not in instrumentation.stats()['counters']
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
+
+    assert [record['course_id'] for record in storage.load_records(files['courses'])] == ['C3']
+    assert storage.find_record(files['students'], 'student_id', 'S1')['registered_courses'] == ['C3']
+
+def test_deletes_go_to_the_record_file_as_tombstones(data_files):
+    filename = data_files(students=[student('S1'), student('S2')])['students']
+    storage.build_record_file(filename, 'student_id')
+    with open(filename, 'rb') as f:
+        on_disk = f.read()
+    size = os.path.getsize(storage.record_file_path(filename))
+
+    assert storage.delete_records(filename, 'student_id', ['S1']) == 1
+
+    with open(filename, 'rb') as f:
+        assert f.read() == on_disk
+    assert os.path.getsize(storage.record_file_path(filename)) > size
+    assert storage.find_record(filename, 'student_id', 'S1') is None
+    assert [record['student_id'] for record in storage.load_records(filename)] == ['S2']
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip('PyQt5.QtWidgets')
+
+class FakeTable:
+
+    def __init__(self, objects):
+        self.rows = list(objects)
+        self.rendered = []
+
+    def removeRow(self, row):
+        del self.rows[row]
+
+def render(table, row, obj):
+    table.rendered.append((row, obj))
+
+@pytest.fixture
+def gui(tmp_path, monkeypatch):
+    # The module keeps its autosave and history files in the working directory
+    monkeypatch.chdir(tmp_path)
+    import GUI_pyqt5
+    return GUI_pyqt5
+
+def test_rows_follow_their_objects_after_a_removal(gui):
+    objects = [object() for _ in range(4)]
+    table = FakeTable(objects)
+    rows = gui.TableRows(table, objects, [], render)
+
+    rows.remove(objects[1])
+    rows.update(objects[3])
+    rows.remove(objects[1])
+
+    assert table.rows == [objects[0], objects[2], objects[3]]
+    assert [rows.row_of(obj) for obj in objects] == [0, None, 1, 2]
+    assert table.rendered == [(2, objects[3])]
@@ -0,0 +1,57 @@
+from OOP import storage
+from OOP.watcher import DataWatcher
+from conftest import student
+import pytest
+
+def watched(filename, use_inotify=False):
+    watcher = DataWatcher(use_inotify=use_inotify)
+    watcher.watch(filename, 'student_id')
+    changes = []
+    watcher.subscribe(lambda filename, added, changed, removed: changes.append(
+        (filename, sorted(added), sorted(changed), sorted(removed))))
+    return watcher, changes
+
+def test_poll_reports_only_the_changed_records(data_files):
+    filename = data_files(students=[student('S1'), student('S2')])['students']
+    watcher, changes = watched(filename)
+
+    assert watcher.poll() == []
+    storage.write_json(filename, [student('S1', ['C1']), student('S3')])
+
+    assert watcher.poll() == [filename]
+    assert changes == [(filename, ['S3'], ['S1'], ['S2'])]
+    assert watcher.poll() == []
+
+def test_a_file_caught_mid_write_is_read_again_on_the_next_poll(data_files):
+    filename = data_files(students=[student('S1')])['students']
+    watcher, changes = watched(filename)
+
+    with open(filename, 'w') as f:
+        f.write('[{"student_id": ')
+    assert watcher.poll() == []
+    storage.write_json(filename, [student('S2')])
+    assert watcher.poll() == [filename]
+    assert changes == [(filename, ['S2'], [], ['S1'])]
+
+def test_record_level_writes_are_noticed(data_files):
+    filename = data_files(students=[student('S1')])['students']
+    storage.build_record_file(filename, 'student_id')
+    watcher, changes = watched(filename)
+
+    storage.replace_record(filename, 'student_id', student('S1', ['C1']))
+
+    assert watcher.poll() == [filename]
+    assert changes == [(filename, [], ['S1'], [])]
+
+def test_inotify_events_select_the_written_file(data_files):
+    files = data_files(students=[student('S1')])
+    watcher, changes = watched(files['students'], use_inotify=True)
+    if not watcher.uses_inotify:
+        pytest.skip("inotify is not available")
+    watcher.watch(files['courses'], 'course_id')
+
+    storage.write_json(files['students'], [student('S2')])
+
+    assert watcher.poll() == [files['students']]
+    assert changes == [(files['students'], ['S2'], [], ['S1'])]
+    watcher.close()